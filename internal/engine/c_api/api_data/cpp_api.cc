@@ -74,6 +74,12 @@ int CPPSearch2(void *engine, vearch::VectorResult *result) {
   return ret;
 }
 
+std::string CPPGetSearchStats(vearch::Response *response) {
+  PerfTool *perf_tool = response->GetPerfTool();
+  if (perf_tool == nullptr) return "";
+  return perf_tool->ToJson();
+}
+
 int CPPAddOrUpdateDoc(void *engine, vearch::Doc *doc) {
   return static_cast<vearch::Engine *>(engine)->AddOrUpdate(*doc);
 }
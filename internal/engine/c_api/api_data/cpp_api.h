@@ -25,3 +25,7 @@ int CPPAddOrUpdateDoc(void *engine, vearch::Doc *doc);
 void CPPSetNprobe(void *engine, int nprobe, std::string index_type);
 
 void CPPSetRerank(void *engine, int rerank, std::string index_type);
+
+// Return phase costs and native counters recorded by the last search of
+// response as json, an empty string if the response doesn't trace
+std::string CPPGetSearchStats(vearch::Response *response);
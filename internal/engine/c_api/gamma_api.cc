@@ -202,6 +202,49 @@ int DeleteDoc(void *engine, const char *docid, int docid_len) {
   return ret;
 }
 
+int DeleteDocs(void *engine, const char *docids, const int *docid_lens,
+               int num, int *codes) {
+  vearch::Engine *gamma_engine = static_cast<vearch::Engine *>(engine);
+  int deleted_num = 0;
+  const char *docid = docids;
+  for (int i = 0; i < num; ++i) {
+    std::string id = std::string(docid, docid_lens[i]);
+    docid += docid_lens[i];
+    codes[i] = gamma_engine->Delete(id);
+    if (codes[i] == 0) ++deleted_num;
+  }
+  return deleted_num;
+}
+
+int GetDocsByIDs(void *engine, const char *docids, const int *docid_lens,
+                 int num, char **docs_str, int *len, int *doc_lens,
+                 int *codes) {
+  vearch::Engine *gamma_engine = static_cast<vearch::Engine *>(engine);
+  std::string docs;
+  int found_num = 0;
+  const char *docid = docids;
+  for (int i = 0; i < num; ++i) {
+    std::string id = std::string(docid, docid_lens[i]);
+    docid += docid_lens[i];
+    doc_lens[i] = 0;
+
+    vearch::Doc doc;
+    codes[i] = gamma_engine->GetDoc(id, doc);
+    if (codes[i] != 0) continue;
+
+    char *doc_str = nullptr;
+    doc.Serialize(&doc_str, &doc_lens[i]);
+    docs.append(doc_str, doc_lens[i]);
+    free(doc_str);
+    ++found_num;
+  }
+
+  *len = docs.length();
+  *docs_str = (char *)malloc(*len * sizeof(char));
+  memcpy(*docs_str, docs.c_str(), *len);
+  return found_num;
+}
+
 int GetDocByID(void *engine, const char *docid, int docid_len, char **doc_str,
                int *len) {
   vearch::Doc doc;
@@ -60,6 +60,20 @@ int AddOrUpdateDoc(void *engine, const char *doc_str, int len);
  */
 int DeleteDoc(void *engine, const char *docid, int docid_len);
 
+/**
+ * @brief delete a batch of docs from table
+ *
+ * @param engine      search engine pointer
+ * @param docids      doc ids packed one after another
+ * @param docid_lens  length of each doc id in docids
+ * @param num         number of doc ids
+ * @param codes       [out] result of each doc id, 0 successed, others failed;
+ *                    allocated by caller with num elements
+ * @return number of deleted docs
+ */
+int DeleteDocs(void *engine, const char *docids, const int *docid_lens,
+               int num, int *codes);
+
 /**
  * @brief get the engine status
  *
@@ -78,6 +92,25 @@ void GetMemoryInfo(void *engine, char **memory_info, int *len);
 int GetDocByID(void *engine, const char *docid, int docid_len, char **doc_str,
                int *len);
 
+/** get a batch of docs by id
+ *
+ * @param engine
+ * @param docids      doc ids packed one after another
+ * @param docid_lens  length of each doc id in docids
+ * @param num         number of doc ids
+ * @param docs_str    [out] serialized docs packed one after another in the
+ *                    order of docids, should be freed by caller
+ * @param len         [out] total length of docs_str
+ * @param doc_lens    [out] serialized length of each doc, 0 if not found;
+ *                    allocated by caller with num elements
+ * @param codes       [out] result of each doc id, 0 successed, others failed;
+ *                    allocated by caller with num elements
+ * @return number of found docs
+ */
+int GetDocsByIDs(void *engine, const char *docids, const int *docid_lens,
+                 int num, char **docs_str, int *len, int *doc_lens,
+                 int *codes);
+
 /**
  * @brief get a doc by docid
  *
@@ -303,6 +303,11 @@ int GammaFLATIndex::Search(RetrievalContext *retrieval_context, int n,
     }
   }  // parallel
 
+  if (retrieval_context->GetPerfTool()) {
+    retrieval_context->GetPerfTool()->Count("vectors_scanned",
+                                            (int64_t)n * num_vectors);
+  }
+
 #ifdef PERFORMANCE_TESTING
   if (retrieval_context->GetPerfTool()) {
     std::string compute_msg = "flat compute ";
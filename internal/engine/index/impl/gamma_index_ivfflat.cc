@@ -691,6 +691,11 @@ void GammaIndexIVFFlat::search_preassigned(RetrievalContext *retrieval_context,
     }
   }  // parallel section
 
+  if (retrieval_context->GetPerfTool()) {
+    retrieval_context->GetPerfTool()->Count("clusters_probed", nlistv);
+    retrieval_context->GetPerfTool()->Count("vectors_scanned", ndis);
+  }
+
   if (interrupt) {
     FAISS_THROW_MSG("computation interrupted");
   }
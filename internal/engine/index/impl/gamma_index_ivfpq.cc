@@ -879,6 +879,14 @@ void GammaIVFPQIndex::search_preassigned(
     LOG(TRACE) << "parallel_mode: " << parallel_mode << ", nprobe: " << nprobe
                << ", ndis: " << ndis;
   }
+  if (retrieval_context->GetPerfTool()) {
+    PerfTool *perf_tool = retrieval_context->GetPerfTool();
+    perf_tool->Count("clusters_probed", (int64_t)n * nprobe);
+    perf_tool->Count("vectors_scanned", ndis);
+    if (rerank) {
+      perf_tool->Count("rerank_num", (int64_t)n * recall_num);
+    }
+  }
 #ifdef PERFORMANCE_TESTING
   if (retrieval_context->GetPerfTool()) {
     std::string compute_msg = "compute ";
@@ -9,6 +9,9 @@
 
 #include <tbb/concurrent_queue.h>
 
+#include <map>
+#include <mutex>
+#include <sstream>
 #include <vector>
 
 #include "reflector.h"
@@ -31,25 +34,69 @@ class PerfTool {
   double start_time;
   std::stringstream perf_ss;
   int long_search_time;
+  // phase name -> accumulated cost in ms, in the order of first record
+  std::vector<std::pair<std::string, double>> phases;
+  // counter name -> accumulated value, e.g. vectors_scanned
+  std::map<std::string, int64_t> counters;
 
   // Record point of time with msg
   void Perf(const std::string &msg) { Perf(msg.c_str()); }
 
   // Record point of time with msg
-  void Perf(const char *msg) {
+  void Perf(const char *msg) { Perf(msg, msg); }
+
+  // Record point of time with msg, its cost is accumulated to phase name
+  void Perf(const std::string &name, const std::string &msg) {
+    std::lock_guard<std::mutex> lock(mutex_);
     double old_time = cur_time;
     cur_time = utils::getmillisecs();
     perf_ss << msg << " [" << cur_time - old_time << "]ms ";
+    for (auto &phase : phases) {
+      if (phase.first == name) {
+        phase.second += cur_time - old_time;
+        return;
+      }
+    }
+    phases.emplace_back(name, cur_time - old_time);
+  }
+
+  // Add num to counter name
+  void Count(const std::string &name, int64_t num) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    counters[name] += num;
   }
 
   double Cost() { return utils::getmillisecs() - start_time; }
 
+  // Return phases and counters as json:
+  // {"phases": {name: ms, ...}, "counters": {name: value, ...}, "total": ms}
+  std::string ToJson() {
+    std::lock_guard<std::mutex> lock(mutex_);
+    std::stringstream ss;
+    ss << "{\"phases\": {";
+    for (size_t i = 0; i < phases.size(); ++i) {
+      ss << (i ? ", " : "") << "\"" << phases[i].first
+         << "\": " << phases[i].second;
+    }
+    ss << "}, \"counters\": {";
+    size_t i = 0;
+    for (auto &counter : counters) {
+      ss << (i++ ? ", " : "") << "\"" << counter.first
+         << "\": " << counter.second;
+    }
+    ss << "}, \"total\": " << utils::getmillisecs() - start_time << "}";
+    return ss.str();
+  }
+
   // Return perf summary
   const std::stringstream &OutputPerf() {
     cur_time = utils::getmillisecs();
     perf_ss << "total [" << cur_time - start_time << "]ms ";
     return perf_ss;
   }
+
+ private:
+  std::mutex mutex_;
 };
 
 // RetrievalParameters is a base class, each model should implement it to parse
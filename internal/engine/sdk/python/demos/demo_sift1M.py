@@ -10,6 +10,7 @@ import random
 import numpy as np
 import vearch
 from vearch import GammaFieldInfo, GammaVectorInfo
+from vearch.loader import load_vectors, mmap_vectors
 
 #read sift
 def fvecs_read(fname):
@@ -111,22 +112,10 @@ def evaluate_vearch(xb, xq, xt, gt):
     else:
         print("create table failed")
 
-    doc_items = []
-
-    for i in range(xb.shape[0]):
-        profiles = {}
-        profiles["key"] = i
-
-        #The feature type supports numpy only.
-        profiles["feature"] = xb[i,:]
-
-        doc_items.append(profiles)
     start = time.time()
-    #print(doc_items[0])
-    engine.verbose = True
-    docs_id = engine.add(doc_items)
-    engine.verbose = False
-    print("add complete, success num: %d, cost %.4f s" % (len(docs_id), time.time() - start))
+    # xb is memory-mapped, it is read and converted to float32 chunk by chunk
+    add_num = load_vectors(engine, xb, fields_fn=lambda offset, num: {"key": np.arange(offset, offset + num)})
+    print("add complete, success num: %d, cost %.4f s" % (add_num, time.time() - start))
     time.sleep(5)
 
     #'min_indexed_num' = xb.shape[0]. Indexing complete.
@@ -149,7 +138,7 @@ if __name__ == '__main__':
         print("Usage: python xxx.py data_dir batch[0 or 1]")
         print("data_dir is: wget ftp://ftp.irisa.fr/local/texmex/corpus/sift.tar.gz && tar -zxvf sift.tar.gz")
         sys.exit(0)
-    xb = fvecs_read(sys.argv[1] + "/sift_base.fvecs")
+    xb = mmap_vectors(sys.argv[1] + "/sift_base.fvecs")
     xq = fvecs_read(sys.argv[1] + "/sift_query.fvecs")
     xt = fvecs_read(sys.argv[1] + "/sift_learn.fvecs")
     gt = ivecs_read(sys.argv[1] + "/sift_groundtruth.ivecs")
@@ -21,6 +21,7 @@ import copy
 import json
 import pickle
 import sys
+import threading
 import time
 import uuid
 from typing import List
@@ -128,6 +129,24 @@ def normalize_numpy_array(numpy_array):
     return (numpy_array, norm)
 
 
+def pack_doc_ids(doc_ids):
+    """pack str ids into one uint8 buffer and an int32 array of their lengths"""
+    if not isinstance(doc_ids, (list, tuple)):
+        ex = Exception('"doc_ids" type should is list.')
+        raise ex
+    bytes_ids = []
+    for doc_id in doc_ids:
+        if not isinstance(doc_id, str):
+            ex = Exception('"_id" type should is str.')
+            raise ex
+        bytes_ids.append(doc_id.encode("utf-8"))
+    ids_buf = np.frombuffer(b"".join(bytes_ids), dtype=np.uint8)
+    id_lens = np.fromiter(
+        (len(bytes_id) for bytes_id in bytes_ids), dtype=np.int32, count=len(bytes_ids)
+    )
+    return ids_buf, id_lens
+
+
 class GammaCacheInfo:
     def __init__(self, field_name, cache_size):
         self.field_name = field_name
@@ -523,7 +542,7 @@ class GammaDoc:
         self.parse_doc(table, doc_info, doc_info["_id"])
         self.doc = Doc()
         self.set_doc()
-        self.doc.SetKey(doc_id)
+        self.doc.SetKey(doc_info["_id"])
         return doc_info["_id"]
 
     def set_doc(self):
@@ -619,6 +638,78 @@ class GammaDoc:
             )
 
 
+class GammaDocs:
+    """docs returned by a batched get, decoded into one column per field"""
+
+    def __init__(self):
+        self.codes = None
+        self.columns = {}
+
+    def parse_fields(self, table, fields):
+        if fields is None:
+            return list(table.field_infos.keys()) + list(table.vec_infos.keys())
+        if not isinstance(fields, list):
+            ex = Exception('The "fields" parameter is of type list.')
+            raise ex
+        for name in fields:
+            if name not in table.field_infos and name not in table.vec_infos:
+                ex = Exception(name + " field does not exist.")
+                raise ex
+        return fields
+
+    def to_column(self, table, name, values, found):
+        num = found.shape[0]
+        if name in table.vec_infos:
+            if table.is_binaryivf_type():
+                dtype = np.uint8
+                dimension = int(table.vec_infos[name].dimension / 8)
+                skip = 4
+            else:
+                dtype = np.float32
+                dimension = table.vec_infos[name].dimension
+                skip = 1
+            column = np.zeros((num, dimension), dtype=dtype)
+            if len(values) > 0:
+                column[found] = (
+                    np.concatenate(values).view(dtype).reshape(len(values), -1)[:, skip:]
+                )
+            return column
+        data_type = table.field_infos[name].type
+        if data_type == dataType.STRING:
+            column = np.empty(num, dtype=object)
+            column[found] = [value.tobytes().decode("utf-8") for value in values]
+            return column
+        column = np.zeros(num, dtype=type_map[data_type])
+        if len(values) > 0:
+            column[found] = np.concatenate(values).view(type_map[data_type])
+        return column
+
+    def deserialize(self, buf, doc_lens, codes, table, doc_ids, fields=None):
+        fields = self.parse_fields(table, fields)
+        found = codes == 0
+        offsets = np.cumsum(doc_lens) - doc_lens
+        values = {name: [] for name in fields}
+        for offset in offsets[found]:
+            doc = PDoc.Doc.GetRootAsDoc(buf, int(offset))
+            for i in range(doc.FieldsLength()):
+                name = doc.Fields(i).Name().decode("utf-8")
+                if name in values:
+                    values[name].append(doc.Fields(i).ValueAsNumpy())
+        self.codes = codes
+        self.columns = {}
+        for name in fields:
+            self.columns[name] = self.to_column(table, name, values[name], found)
+        # keyed on the requested ids, so vectors are rescaled as by
+        # get_doc_by_id whether or not _id is a returned field
+        for name in table.vec_infos:
+            if name not in self.columns or len(table.norms[name]) == 0:
+                continue
+            for i in np.flatnonzero(found):
+                _id = doc_ids[i]
+                if _id in table.norms[name]:
+                    self.columns[name][i] *= table.norms[name][_id]
+
+
 class GammaRangeFilter:
     def __init__(self, field, lower_value, upper_value, include_lower, include_upper):
         self.field = field
@@ -662,7 +753,7 @@ class GammaTermFilter:
 
 class GammaVectorQuery:
     def __init__(
-        self, name, value, min_score, max_score, retrieval_type
+        self, name, value, min_score, max_score, retrieval_type=""
     ):
         self.name = name
         self.value = value
@@ -1019,6 +1110,164 @@ class GammaRequest:
         return builder.Output()
 
 
+class GammaPreparedQuery:
+    """a search whose return fields, filters, retrieval_param and topn are
+    parsed once. Its native request is kept and reused by every search, only
+    query vectors and optionally filter values are set per call.
+    It is not thread safe, prepare one for each thread.
+    """
+
+    def __init__(
+        self,
+        engine,
+        fields: List[str] = None,
+        filters_template: List[dict] = None,
+        retrieval_param: dict = None,
+        topn: int = 100,
+        vector_fields: List[str] = None,
+    ):
+        self.request = None
+        self.engine = engine
+        self.table = engine.gamma_table
+        if vector_fields is None:
+            vector_fields = list(self.table.vec_infos.keys())
+        self.vector_fields = vector_fields
+        self.vector_dtype = (
+            np.uint8 if self.table.is_binaryivf_type() else np.float32
+        )
+
+        querys = {"fields": fields if fields is not None else [], "topn": topn}
+        if retrieval_param is not None:
+            querys["retrieval_param"] = retrieval_param
+        if filters_template is not None:
+            querys["filter"] = filters_template
+        querys["vector"] = []
+        for name in self.vector_fields:
+            if name not in self.table.vec_infos:
+                ex = Exception("The " + name + " field is not table infor.")
+                raise ex
+            dimension = self.table.vec_infos[name].dimension
+            if self.table.is_binaryivf_type():
+                dimension = int(dimension / 8)
+            querys["vector"].append(
+                {"field": name, "feature": np.zeros(dimension, dtype=self.vector_dtype)}
+            )
+
+        # position of each filter of the template in range or term filters
+        self.filter_slots = []
+        range_index = 0
+        term_index = 0
+        for ft in querys.get("filter", []):
+            if "range" in ft:
+                self.filter_slots.append(("range", range_index, ft["range"]))
+                range_index += 1
+            elif "term" in ft:
+                self.filter_slots.append(("term", term_index, ft["term"]))
+                term_index += 1
+            else:
+                self.filter_slots.append((None, -1, None))
+
+        self.req = GammaRequest()
+        self.req.create_request(querys, self.table)
+        self.request = self.req.request
+
+    def set_vectors(self, vectors):
+        if not isinstance(vectors, dict):
+            if len(self.vector_fields) != 1:
+                ex = Exception(
+                    "Multiple vector fields are prepared, vectors should be a dict."
+                )
+                raise ex
+            vectors = {self.vector_fields[0]: vectors}
+        req_num = 0
+        for i, name in enumerate(self.vector_fields):
+            if name not in vectors:
+                ex = Exception("The " + name + " field has no query vector.")
+                raise ex
+            if not isinstance(vectors[name], np.ndarray):
+                ex = Exception("feature type is error. it is numpy")
+                raise ex
+            feature = np.ascontiguousarray(vectors[name], dtype=self.vector_dtype)
+            query_num = 1 if feature.ndim == 1 else feature.shape[0]
+            if req_num != 0 and req_num != query_num:
+                ex = Exception("Multiple vector searches, different number of vectors.")
+                raise ex
+            req_num = query_num
+            self.table.check_dimension(feature.shape[feature.ndim - 1], name)
+            feature = feature.reshape(-1)
+            swigSetVectorQueryValue(
+                self.request, i, swig_ptr(feature), feature.shape[0]
+            )
+        self.request.SetReqNum(1 if req_num == 0 else req_num)
+
+    def set_filter_values(self, filter_values):
+        if len(filter_values) != len(self.filter_slots):
+            ex = Exception(
+                "The number of filter values should equal to filters of the template."
+            )
+            raise ex
+        for value, (kind, index, template) in zip(filter_values, self.filter_slots):
+            if value is None:
+                continue
+            field_name = [key for key in template if key != "operator"][0]
+            if kind == "range":
+                range_filter = self.req.parse_range_filter({field_name: value}, self.table)
+                swigSetRangeFilterValue(
+                    self.request,
+                    index,
+                    swig_ptr(range_filter.lower_value),
+                    range_filter.lower_value.shape[0],
+                    swig_ptr(range_filter.upper_value),
+                    range_filter.upper_value.shape[0],
+                    range_filter.include_lower,
+                    range_filter.include_upper,
+                )
+            elif kind == "term":
+                term = {field_name: value}
+                if "operator" in template:
+                    term["operator"] = template["operator"]
+                term_filter = self.req.parse_term_filter(term, self.table)
+                swigSetTermFilterValue(
+                    self.request, index, term_filter.value, term_filter.is_union
+                )
+
+    def search(self, vectors, filter_values: List = None):
+        """search with the prepared request
+        vectors: numpy array of query vectors, a dict of vector field name to
+        numpy array if more than one vector field is prepared
+        filter_values: optional, one item for each filter of the template,
+        None keeps the template value, a dict with gte/lte for range filter
+        and a list of str for term filter
+        """
+        profile = self.engine.start_profile("search")
+        self.set_vectors(vectors)
+        if filter_values is not None:
+            self.set_filter_values(filter_values)
+        response = swigCreateResponse()
+        if profile:
+            profile.num = self.request.ReqNum()
+            profile.phase("build_request")
+        swigSearchCPP(self.engine.c_engine, self.request, response)
+        if profile:
+            profile.phase("native_search")
+            profile.set_native_stats(swigGetSearchStats(response))
+        results = self.engine.get_results(response)
+        swigDeleteResponse(response)
+        if profile:
+            profile.phase("convert_results")
+            self.engine.finish_profile(profile)
+        return results
+
+    def close(self):
+        """release the native request"""
+        if self.request is not None:
+            swigDeleteRequest(self.request)
+            self.request = None
+
+    def __del__(self):
+        self.close()
+
+
 class GammaEngineStatus:
     def __init__(self):
         self.index_status = None
@@ -1061,7 +1310,7 @@ class GammaEngineStatus:
         status = {}
         status["index_status"] = self.index_status
         status["table_mem"] = self.table_mem
-        status["vector_mem"] = self.vector_mem
+        status["index_mem"] = self.index_mem
         status["vector_mem"] = self.vector_mem
         status["field_range_mem"] = self.field_range_mem
         status["bitmap_mem"] = self.bitmap_mem
@@ -1099,7 +1348,7 @@ class GammaMemoryInfo:
     def get_status_dict(self):
         status = {}
         status["table_mem"] = self.table_mem
-        status["vector_mem"] = self.vector_mem
+        status["index_mem"] = self.index_mem
         status["vector_mem"] = self.vector_mem
         status["field_range_mem"] = self.field_range_mem
         status["bitmap_mem"] = self.bitmap_mem
@@ -1166,6 +1415,110 @@ class GammaResponse:
         self.query_results = query_results
 
 
+class GammaProfile:
+    """profile of one engine call
+    op: "add" or "search"
+    num: number of docs added or queries searched
+    phases_ms: phase name -> cost in ms, measured in python
+    native_phases_ms: phase name -> cost in ms, recorded inside the engine
+    counters: native counters of search, such as vectors_scanned,
+    clusters_probed, filter_result_num and rerank_num
+    memory_delta: engine memory info change during the call, only set when
+    the profiler traces memory
+    """
+
+    def __init__(self, op: str, num: int = 0):
+        self.op = op
+        self.num = num
+        self.phases_ms = {}
+        self.native_phases_ms = {}
+        self.counters = {}
+        self.memory_delta = {}
+        self.last_time = time.perf_counter()
+
+    def phase(self, name: str):
+        """end the current phase with name"""
+        now = time.perf_counter()
+        cost = (now - self.last_time) * 1000
+        self.phases_ms[name] = self.phases_ms.get(name, 0) + cost
+        self.last_time = now
+
+    def set_native_stats(self, stats_str: str):
+        if not stats_str:
+            return
+        stats = json.loads(stats_str)
+        self.native_phases_ms = stats["phases"]
+        self.counters = stats["counters"]
+
+    def total_ms(self):
+        return sum(self.phases_ms.values())
+
+    def to_dict(self):
+        return {
+            "op": self.op,
+            "num": self.num,
+            "phases_ms": self.phases_ms,
+            "native_phases_ms": self.native_phases_ms,
+            "counters": self.counters,
+            "memory_delta": self.memory_delta,
+        }
+
+    def __str__(self):
+        phases = ", ".join(
+            "%s %.4f ms" % (name, cost) for name, cost in self.phases_ms.items()
+        )
+        return "%s %d: %s" % (self.op, self.num, phases)
+
+
+class GammaProfiler:
+    """collect the profile of every engine call, set it to Engine.profiler
+    callback: called with the GammaProfile of every call
+    memory: trace the engine memory delta of every call, which costs two
+    memory info requests per call
+    """
+
+    def __init__(self, callback=None, memory: bool = False):
+        self.callback = callback
+        self.memory = memory
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.ops = {}
+
+    def record(self, profile: GammaProfile):
+        with self.lock:
+            if profile.op not in self.ops:
+                self.ops[profile.op] = {
+                    "calls": 0,
+                    "num": 0,
+                    "phases_ms": {},
+                    "native_phases_ms": {},
+                    "counters": {},
+                    "memory_delta": {},
+                }
+            stats = self.ops[profile.op]
+            stats["calls"] += 1
+            stats["num"] += profile.num
+            for key in ["phases_ms", "native_phases_ms", "counters", "memory_delta"]:
+                for name, value in getattr(profile, key).items():
+                    stats[key][name] = stats[key].get(name, 0) + value
+        if self.callback is not None:
+            self.callback(profile)
+
+    def stats(self):
+        """aggregated stats of each op, the sum of phases, counters and memory
+        deltas of all calls and the mean of phases per call
+        """
+        with self.lock:
+            result = copy.deepcopy(self.ops)
+        for stats in result.values():
+            stats["mean_phases_ms"] = {
+                name: cost / stats["calls"] for name, cost in stats["phases_ms"].items()
+            }
+        return result
+
+
 class Engine:
     """vearch core
     It is used to store, update and delete feature vectors,
@@ -1185,6 +1538,8 @@ class Engine:
         self.total_added_num = 0
         self.doc_ids = []
         self.verbose = False
+        # GammaProfiler collecting profiles of add and search
+        self.profiler = None
 
     def init(self):
         config = GammaConfig(self.path, self.log_dir)
@@ -1227,13 +1582,12 @@ class Engine:
         docs_info: docs' detail info
         return: unique docs' id for docs
         """
-        if self.verbose:
-            start = time.time()
         if not isinstance(docs_info, list):
             ex = Exception(
                 "The add function takes an incorrect argument; it must be of a list type."
             )
             raise ex
+        profile = self.start_profile("add", len(docs_info))
         doc_ids = []
         docs = Docs()
         for doc_info in docs_info:
@@ -1242,22 +1596,56 @@ class Engine:
             doc_id = doc.create_item(self.gamma_table, id_str, doc_info)
             docs.AddDoc(doc.doc)
             doc_ids.append(doc_id)
-        results = swigCreateBatchResult(len(doc_info))
-        if self.verbose:
-            print("prepare add cost %.4f s" % (time.time() - start))
-            start = time.time()
-        if swigAddOrUpdateDocsCPP(self.c_engine, docs, results) == 0:
-            if self.verbose:
-                print("gamma add cost %.4f s" % (time.time() - start))
-                start = time.time()
+        results = swigCreateBatchResult(len(docs_info))
+        if profile:
+            profile.phase("build_docs")
+        ret = swigAddOrUpdateDocsCPP(self.c_engine, docs, results)
+        if profile:
+            profile.phase("native_add")
+        if ret == 0:
             for i in range(len(docs_info)):
                 if results.Code(i) == 0:
                     self.total_added_num += 1
         swigDeleteBatchResult(results)
-        if self.verbose:
-            print("finish add cost %.4f s" % (time.time() - start))
+        if profile:
+            profile.phase("collect_results")
+            self.finish_profile(profile)
         return doc_ids
 
+    def add_batch(self, vectors: np.ndarray, fields: dict = None, doc_ids: List = None):
+        """add docs given column-wise
+        vectors: (num, dimension) numpy array of the vector field
+        fields: scalar field name -> num values of the field
+        doc_ids: num docs' id, created when it is None
+        return: unique docs' id for docs
+        """
+        if not isinstance(vectors, np.ndarray) or vectors.ndim != 2:
+            ex = Exception("The vectors of add_batch should be a 2-D numpy array.")
+            raise ex
+        num = vectors.shape[0]
+        vector_name = list(self.gamma_table.vec_infos.keys())[0]
+        columns = {}
+        for name, values in (fields or {}).items():
+            # numpy scalars don't pass the field type check, use python values
+            columns[name] = (
+                values.tolist() if isinstance(values, np.ndarray) else list(values)
+            )
+            if len(columns[name]) != num:
+                ex = Exception(
+                    'The field "{}" has {} values, but there are {} vectors.'.format(
+                        name, len(columns[name]), num
+                    )
+                )
+                raise ex
+        docs_info = []
+        for i in range(num):
+            doc_info = {name: values[i] for name, values in columns.items()}
+            doc_info[vector_name] = vectors[i]
+            if doc_ids is not None:
+                doc_info["_id"] = doc_ids[i]
+            docs_info.append(doc_info)
+        return self.add(docs_info)
+
     def update_doc(self, doc_info, doc_id):
         """update doc's info. The docs_info must contain "_id" information.
         doc_info: doc's new info.
@@ -1292,6 +1680,21 @@ class Engine:
         response_code = swigDeleteDoc(self.c_engine, doc_id, id_len)
         return response_code
 
+    def del_docs(self, doc_ids: List[str]):
+        """delete a batch of docs in one call
+        doc_ids: list of docs' id
+        return: numpy int32 array of each doc's result, 0 successed
+        """
+        ids_buf, id_lens = pack_doc_ids(doc_ids)
+        num = id_lens.shape[0]
+        codes = np.zeros(num, dtype=np.int32)
+        if num == 0:
+            return codes
+        swigDeleteDocs(
+            self.c_engine, swig_ptr(ids_buf), swig_ptr(id_lens), num, swig_ptr(codes)
+        )
+        return codes
+
     def get_status(self):
         """get engine status information
         return: a dict containing status information
@@ -1335,6 +1738,53 @@ class Engine:
         doc.deserialize(buf, self.gamma_table, doc_id)
         return doc.get_fields_dict()
 
+    def get_docs(self, doc_ids: List[str], fields: List[str] = None, as_arrays=True):
+        """get a batch of docs' detail info by their ids in one call
+        doc_ids: list of docs' id
+        fields: fields to return, default all fields
+        as_arrays: if True, docs are returned as a dict of columns, one numpy
+        array per field aligned with doc_ids; else as a list of dicts, an
+        empty dict for a doc not found
+        return: (codes, docs), codes is a numpy int32 array of each doc's
+        result, 0 found
+        """
+        ids_buf, id_lens = pack_doc_ids(doc_ids)
+        num = id_lens.shape[0]
+        codes = np.zeros(num, dtype=np.int32)
+        doc_lens = np.zeros(num, dtype=np.int32)
+        buf = b""
+        if num > 0:
+            swig_buf = swigGetDocsByIDs(
+                self.c_engine,
+                swig_ptr(ids_buf),
+                swig_ptr(id_lens),
+                num,
+                swig_ptr(doc_lens),
+                swig_ptr(codes),
+            )
+            buf = vector_to_array(swig_buf).tobytes()
+        if as_arrays:
+            docs = GammaDocs()
+            docs.deserialize(buf, doc_lens, codes, self.gamma_table, doc_ids, fields)
+            return codes, docs.columns
+
+        docs = []
+        offset = 0
+        for i in range(num):
+            if codes[i] != 0:
+                docs.append({})
+                continue
+            doc = GammaDoc()
+            doc.deserialize(
+                buf[offset : offset + doc_lens[i]], self.gamma_table, doc_ids[i]
+            )
+            offset += doc_lens[i]
+            fields_dict = doc.get_fields_dict()
+            if fields is not None:
+                fields_dict = {name: fields_dict.get(name) for name in fields}
+            docs.append(fields_dict)
+        return codes, docs
+
     def dump(self):
         """dump all info to disk"""
         save_table_path = self.path + "/table.pickle"
@@ -1374,24 +1824,69 @@ class Engine:
         """search in table
         query_info: search info
         """
-        start = time.time()
+        profile = self.start_profile("search")
         req = GammaRequest()
         req.create_request(query_info, self.gamma_table)
         response = swigCreateResponse()
-        if self.verbose:
-            print("prepare search cost %f ms" % ((time.time() - start) * 1000))
-            start = time.time()
+        if profile:
+            profile.num = req.request.ReqNum()
+            profile.phase("build_request")
         swigSearchCPP(self.c_engine, req.request, response)
         swigDeleteRequest(req.request)
-        if self.verbose:
-            print("gamma search cost %f ms" % ((time.time() - start) * 1000))
-            start = time.time()
+        if profile:
+            profile.phase("native_search")
+            profile.set_native_stats(swigGetSearchStats(response))
         results = self.get_results(response)
         swigDeleteResponse(response)
-        if self.verbose:
-            print("get results cost %f ms" % ((time.time() - start) * 1000))
+        if profile:
+            profile.phase("convert_results")
+            self.finish_profile(profile)
         return results
 
+    def start_profile(self, op: str, num: int = 0):
+        """return a GammaProfile for the call if profiler is set or verbose,
+        otherwise None
+        """
+        if self.profiler is None and not self.verbose:
+            return None
+        profile = GammaProfile(op, num)
+        if self.profiler is not None and self.profiler.memory:
+            profile.memory_delta = self.get_mempory_info()
+            profile.last_time = time.perf_counter()
+        return profile
+
+    def finish_profile(self, profile: GammaProfile):
+        if self.profiler is not None and self.profiler.memory:
+            before = profile.memory_delta
+            after = self.get_mempory_info()
+            profile.memory_delta = {
+                name: after[name] - before[name] for name in after
+            }
+        if self.verbose:
+            print(profile)
+        if self.profiler is not None:
+            self.profiler.record(profile)
+
+    def prepare(
+        self,
+        fields: List[str] = None,
+        filters_template: List[dict] = None,
+        retrieval_param: dict = None,
+        topn: int = 100,
+        vector_fields: List[str] = None,
+    ):
+        """prepare a reusable search for repeated queries of the same shape
+        fields: return fields, default all fields
+        filters_template: filters in the same format as "filter" of search
+        retrieval_param: search params, such as {"metric_type": "L2", "nprobe": 80}
+        topn: the maximum number of results to return
+        vector_fields: vector fields to search, default all vector fields
+        return: GammaPreparedQuery, call its search(vectors, filter_values)
+        """
+        return GammaPreparedQuery(
+            self, fields, filters_template, retrieval_param, topn, vector_fields
+        )
+
     # def del_doc_by_query(self, query_info):
     #     ''' delete docs by query
     #         query_info: what kind docs want to delete
@@ -0,0 +1,138 @@
+"""
+Streaming loaders for the vector file formats of the ANN benchmarks.
+
+  .fvecs / .ivecs / .bvecs : every row is an int32 dimension followed by
+                             the float32 / int32 / uint8 components
+  .fbin / .ibin / .u8bin   : an int32 header (num, dimension) followed by
+                             num * dimension float32 / int32 / uint8 values
+
+Files are memory-mapped, only the chunk being converted is read, so files
+larger than memory (e.g. BIGANN) can be loaded into an engine.
+"""
+
+import os
+import queue
+import threading
+
+import numpy as np
+
+VECS_DTYPES = {".fvecs": np.float32, ".ivecs": np.int32, ".bvecs": np.uint8}
+BIN_DTYPES = {".fbin": np.float32, ".ibin": np.int32, ".u8bin": np.uint8}
+
+
+def mmap_vectors(fname: str):
+    """memory-map a vector file as a read-only (num, dimension) array"""
+    ext = os.path.splitext(fname)[1]
+    if ext in VECS_DTYPES:
+        dtype = np.dtype(VECS_DTYPES[ext])
+        raw = np.memmap(fname, dtype=np.uint8, mode="r")
+        d = int(raw[:4].view(np.int32)[0])
+        row_bytes = 4 + d * dtype.itemsize
+        if raw.shape[0] % row_bytes != 0:
+            ex = Exception(
+                "%s size %d is not a multiple of row size %d"
+                % (fname, raw.shape[0], row_bytes)
+            )
+            raise ex
+        return np.ndarray(
+            (raw.shape[0] // row_bytes, d),
+            dtype=dtype,
+            buffer=raw,
+            offset=4,
+            strides=(row_bytes, dtype.itemsize),
+        )
+    if ext in BIN_DTYPES:
+        n, d = np.fromfile(fname, dtype=np.int32, count=2)
+        return np.memmap(
+            fname, dtype=BIN_DTYPES[ext], mode="r", offset=8, shape=(int(n), int(d))
+        )
+    ex = Exception(
+        "Unsupported vector file %s, suffix should be one of %s"
+        % (fname, sorted(list(VECS_DTYPES) + list(BIN_DTYPES)))
+    )
+    raise ex
+
+
+def iter_chunks(
+    data, chunk_size: int = 100000, start: int = 0, count: int = None, dtype=np.float32
+):
+    """yield (offset, chunk) pairs of contiguous rows converted to dtype
+    data: file name or (num, dimension) array, e.g. from mmap_vectors
+    """
+    if isinstance(data, str):
+        data = mmap_vectors(data)
+    end = data.shape[0] if count is None else min(data.shape[0], start + count)
+    for offset in range(start, end, chunk_size):
+        chunk = data[offset : min(offset + chunk_size, end)]
+        yield offset, np.ascontiguousarray(chunk, dtype=dtype)
+
+
+def prefetch(iterator, depth: int = 2, timeout: float = 0.1):
+    """run iterator in a background thread, keeping up to depth items ready,
+    the thread stops within timeout seconds when the consumer stops early
+    """
+    items = queue.Queue(maxsize=depth)
+    end = object()
+    errors = []
+    stop = threading.Event()
+
+    def put(item):
+        # a blocking put would wait forever for a consumer that is gone
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=timeout)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterator:
+                if not put(item):
+                    break
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            put(end)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is end:
+                break
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def load_vectors(
+    engine,
+    data,
+    chunk_size: int = 100000,
+    fields_fn=None,
+    ids_fn=None,
+    start: int = 0,
+    count: int = None,
+    depth: int = 2,
+):
+    """add vectors of a file or array into engine chunk by chunk, the next
+    chunks are read and converted while the current one is being added.
+    fields_fn: fields_fn(offset, num) returns the scalar field columns of a chunk
+    ids_fn: ids_fn(offset, num) returns the docs' id of a chunk
+    return: number of added docs
+    """
+    dtype = np.uint8 if engine.gamma_table.is_binaryivf_type() else np.float32
+    chunks = iter_chunks(data, chunk_size, start, count, dtype)
+    total = 0
+    for offset, vectors in prefetch(chunks, depth):
+        num = vectors.shape[0]
+        fields = fields_fn(offset, num) if fields_fn else None
+        doc_ids = ids_fn(offset, num) if ids_fn else None
+        total += len(engine.add_batch(vectors, fields, doc_ids))
+    return total
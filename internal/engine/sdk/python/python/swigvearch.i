@@ -59,6 +59,12 @@ typedef int64_t size_t;
     return DeleteDoc(engine, doc_id, len);
   }
 
+  int swigDeleteDocs(void *engine, unsigned char *pDocids, int *docid_lens,
+                     int num, int *codes) {
+    char *doc_ids = (char *)pDocids;
+    return DeleteDocs(engine, doc_ids, docid_lens, num, codes);
+  }
+
   std::vector<unsigned char> swigGetEngineStatus(void *engine) {
     char *status_str = NULL;
     int len = 0;
@@ -99,6 +105,24 @@ typedef int64_t size_t;
     }
   }
 
+  std::vector<unsigned char> swigGetDocsByIDs(void *engine,
+                                              unsigned char *pDocids,
+                                              int *docid_lens, int num,
+                                              int *doc_lens, int *codes) {
+    char *doc_ids = (char *)pDocids;
+    char *docs_str = NULL;
+    int len = 0;
+    GetDocsByIDs(engine, doc_ids, docid_lens, num, &docs_str, &len, doc_lens,
+                 codes);
+    std::vector<unsigned char> vec_docs(len);
+    if (len > 0) {
+      memcpy(vec_docs.data(), docs_str, len);
+    }
+    free(docs_str);
+    docs_str = NULL;
+    return vec_docs;
+  }
+
   std::vector<unsigned char> swigGetDocByDocID(void *engine, int docid) {
     char *doc_str = NULL;
     int len = 0;
@@ -248,11 +272,50 @@ typedef int64_t size_t;
     return vector_query;
   }
 
+  int swigSetVectorQueryValue(vearch::Request *request, int index,
+                              float *data, int len) {
+    std::vector<struct vearch::VectorQuery> &vec_fields =
+        request->VecFields();
+    if (index < 0 || index >= (int)vec_fields.size()) return -1;
+    vec_fields[index].value = std::string((char *)data, len * sizeof(float));
+    return 0;
+  }
+
+  int swigSetRangeFilterValue(vearch::Request *request, int index,
+                              uint8_t *lower_value, int lower_value_len,
+                              uint8_t *upper_value, int upper_value_len,
+                              int include_lower, int include_upper) {
+    std::vector<struct vearch::RangeFilter> &range_filters =
+        request->RangeFilters();
+    if (index < 0 || index >= (int)range_filters.size()) return -1;
+    range_filters[index].lower_value =
+        std::string((char *)lower_value, lower_value_len);
+    range_filters[index].upper_value =
+        std::string((char *)upper_value, upper_value_len);
+    range_filters[index].include_lower = include_lower;
+    range_filters[index].include_upper = include_upper;
+    return 0;
+  }
+
+  int swigSetTermFilterValue(vearch::Request *request, int index,
+                             const std::string &value, int is_union) {
+    std::vector<struct vearch::TermFilter> &term_filters =
+        request->TermFilters();
+    if (index < 0 || index >= (int)term_filters.size()) return -1;
+    term_filters[index].value = value;
+    term_filters[index].is_union = is_union;
+    return 0;
+  }
+
   int swigSearchCPP(void *engine, vearch::Request *request,
                     vearch::Response *response) {
     return CPPSearch(engine, request, response);
   }
 
+  std::string swigGetSearchStats(vearch::Response *response) {
+    return CPPGetSearchStats(response);
+  }
+
   int swigAddOrUpdateDocCPP(void *engine, vearch::Doc *doc) {
     return CPPAddOrUpdateDoc(engine, doc);
   }
@@ -62,9 +62,12 @@ class CustomBuildExt(build_ext):
 
 
 abspath = os.getcwd()
+# the python sdk is also the package vearch, build the engine as
+# PACKAGE_NAME=vearch_engine to install them side by side
+package_name = os.getenv('PACKAGE_NAME', 'vearch')
 
 _swigvearch = Extension(
-    'vearch._swigvearch',
+    package_name + '._swigvearch',
     sources=['python/swigvearch.i'],
     define_macros=[('FINTEGER', 'int')],
     language='c++',
@@ -103,7 +106,7 @@ setup(
         'build_ext': CustomBuildExt,
     },
     install_requires=['numpy>=1.16.0', 'flatbuffers==1.12.0'],
-    package_dir={'vearch': 'python','vearch/gamma_api': 'python/gamma_api'},
-    packages=['vearch','vearch.gamma_api'],
+    package_dir={package_name: 'python', package_name + '/gamma_api': 'python/gamma_api'},
+    packages=[package_name, package_name + '.gamma_api'],
     ext_modules=[_swigvearch]
 )
@@ -0,0 +1,80 @@
+import shutil
+import tempfile
+
+import numpy as np
+import pytest
+
+vearch = pytest.importorskip("vearch")
+if not hasattr(vearch, "Engine"):
+    # the sdk of the same package name is installed instead of the engine
+    pytest.skip("vearch engine is not installed", allow_module_level=True)
+
+dimension = 16
+total = 20
+
+
+@pytest.fixture
+def engine():
+    path = tempfile.mkdtemp(prefix="vearch_engine_")
+    engine = vearch.Engine(path + "/data", path + "/logs")
+    engine_info = {
+        "index_size": 10000,
+        "retrieval_type": "FLAT",
+        "retrieval_param": {"metric_type": "L2"},
+    }
+    fields = [
+        vearch.GammaFieldInfo("field_int", vearch.dataType.INT, True),
+        vearch.GammaFieldInfo("field_string", vearch.dataType.STRING, True),
+    ]
+    vector_field = vearch.GammaVectorInfo(name="field_vector", dimension=dimension)
+    assert (
+        engine.create_table(
+            engine_info, name="docs", fields=fields, vector_field=vector_field
+        )
+        == 0
+    )
+    yield engine
+    engine.close()
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def add_docs(engine):
+    features = np.random.rand(total, dimension).astype(np.float32)
+    docs = [
+        {"field_int": i, "field_string": str(i), "field_vector": features[i]}
+        for i in range(total)
+    ]
+    return engine.add(docs), features
+
+
+def test_get_docs_found_and_missing(engine):
+    doc_ids, features = add_docs(engine)
+    ids = [doc_ids[3], "missing", doc_ids[7]]
+    codes, columns = engine.get_docs(ids)
+    assert codes[0] == 0 and codes[1] != 0 and codes[2] == 0
+    assert columns["field_int"][0] == 3 and columns["field_int"][2] == 7
+    assert columns["field_string"][2] == "7"
+    assert np.allclose(columns["field_vector"][0], features[3])
+
+    codes, docs = engine.get_docs(ids, as_arrays=False)
+    assert docs[1] == {}
+    assert docs[2]["field_int"] == 7
+
+
+def test_get_docs_vector_only(engine):
+    doc_ids, _ = add_docs(engine)
+    # stored normalized with their norms kept by the table
+    engine.gamma_table.norms["field_vector"][doc_ids[5]] = 2.0
+    codes, columns = engine.get_docs([doc_ids[5]], fields=["field_vector"])
+    assert codes[0] == 0
+    assert list(columns.keys()) == ["field_vector"]
+    expected = engine.get_doc_by_id(doc_ids[5])["field_vector"]
+    assert np.allclose(columns["field_vector"][0], expected)
+
+
+def test_del_docs(engine):
+    doc_ids, _ = add_docs(engine)
+    codes = engine.del_docs([doc_ids[0], doc_ids[1]])
+    assert (codes == 0).all()
+    codes, _ = engine.get_docs([doc_ids[0], doc_ids[1], doc_ids[2]])
+    assert codes[0] != 0 and codes[1] != 0 and codes[2] == 0
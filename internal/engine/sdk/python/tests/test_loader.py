@@ -0,0 +1,35 @@
+import threading
+
+import pytest
+
+loader = pytest.importorskip("vearch.loader")
+
+
+def test_prefetch():
+    assert list(loader.prefetch(iter(range(10)), depth=2)) == list(range(10))
+
+
+def test_prefetch_error():
+    def items():
+        yield 0
+        raise ValueError("broken")
+
+    with pytest.raises(ValueError):
+        list(loader.prefetch(items()))
+
+
+def test_prefetch_stopped_early():
+    produced = []
+
+    def items():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    before = threading.active_count()
+    chunks = loader.prefetch(items(), depth=2, timeout=0.01)
+    assert next(chunks) == 0
+    # the producer is blocked on a full queue, closing stops and joins it
+    chunks.close()
+    assert threading.active_count() == before
+    assert len(produced) < 100
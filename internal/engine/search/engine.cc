@@ -325,8 +325,9 @@ Status Engine::Search(Request &request, Response &response_results) {
     int num = MultiRangeQuery(request, query.condition, response_results,
                               &range_query_result);
     if (query.condition->GetPerfTool()) {
-      query.condition->GetPerfTool()->Perf("filter result num " +
-                                           std::to_string(num));
+      query.condition->GetPerfTool()->Perf(
+          "filter", "filter result num " + std::to_string(num));
+      query.condition->GetPerfTool()->Count("filter_result_num", num);
     }
     if (num == 0) {
       RequestConcurrentController::GetInstance().Release(req_num);
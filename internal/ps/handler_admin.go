@@ -266,15 +266,16 @@ func (sh *StatsHandler) Execute(ctx context.Context, req *vearchpb.PartitionData
 			return
 		}
 
-		// size, err := store.GetEngine().Reader().Capacity(ctx)
-		// if err != nil {
-		// 	err = fmt.Errorf("got capacity from engine err:[%s]", err.Error())
-		// 	pi.Error = err.Error()
-		// 	return
-		// }
+		// engine memory of the partition: vector, table, field range and bitmap
+		size, err := store.GetEngine().Reader().Capacity(ctx)
+		if err != nil {
+			err = fmt.Errorf("got capacity from engine err:[%s]", err.Error())
+			pi.Error = err.Error()
+			return
+		}
 
 		pi.DocNum = docNum
-		pi.Size = 0
+		pi.Size = size
 		pi.Path = store.GetPartition().Path
 		pi.Unreachable = store.GetUnreachable(uint64(pid))
 		pi.Status = store.GetPartition().GetStatus()
@@ -583,11 +583,13 @@ func (handler *DocumentHandler) handleDocumentSearch(c *gin.Context) {
 	searchDoc.SpaceName = searchReq.Head.SpaceName
 	getSpaceCost := time.Since(getSpaceStart)
 
+	requestToPbStart := time.Now()
 	err = requestToPb(searchDoc, space, searchReq)
 	if err != nil {
 		response.New(c).JsonError(errors.NewErrBadRequest(err))
 		return
 	}
+	parseCost := getSpaceStart.Sub(startTime) + time.Since(requestToPbStart)
 
 	if searchReq.VecFields == nil {
 		err := vearchpb.NewError(vearchpb.ErrorEnum_SEARCH_INVALID_PARAMS_SHOULD_HAVE_VECTOR_FIELD, nil)
@@ -599,12 +601,22 @@ func (handler *DocumentHandler) handleDocumentSearch(c *gin.Context) {
 	searchResp := handler.docService.search(ctx, searchReq)
 	serviceCost := time.Since(serviceStart)
 
+	serializeStart := time.Now()
 	result, err := documentSearchResponse(searchResp.Results, searchResp.Head, space)
 
 	if err != nil {
 		response.New(c).JsonError(errors.NewErrInternal(err))
 		return
 	}
+	if trace {
+		result["trace"] = traceResponse(searchResp.Head, map[string]time.Duration{
+			"parse":     parseCost,
+			"getSpace":  getSpaceCost,
+			"service":   serviceCost,
+			"serialize": time.Since(serializeStart),
+			"total":     time.Since(startTime),
+		})
+	}
 	response.New(c).JsonSuccess(result)
 	if trace {
 		log.Trace("handleDocumentSearch %s total: [%.4f] getSpace: [%.4f] service: [%.4f] detail: [%v]",
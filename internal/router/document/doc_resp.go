@@ -217,6 +217,23 @@ func documentSearchResponse(srs []*vearchpb.SearchResult, head *vearchpb.Respons
 	return response, nil
 }
 
+// traceResponse returns the milliseconds of router phases in costs and of the
+// phases client and ps report in head params, such as rpcExecute_<pid>
+func traceResponse(head *vearchpb.ResponseHead, costs map[string]time.Duration) map[string]float64 {
+	trace := make(map[string]float64)
+	if head != nil {
+		for key, value := range head.Params {
+			if cost, err := strconv.ParseFloat(value, 64); err == nil {
+				trace[key] = cost
+			}
+		}
+	}
+	for key, cost := range costs {
+		trace[key] = cost.Seconds() * 1000
+	}
+	return trace
+}
+
 func DocFieldSerialize(doc *vearchpb.Document, space *entity.Space, returnFieldsMap map[string]string, vectorValue bool, docOut map[string]any) (nextDocid int32, err error) {
 	spaceProperties := space.SpaceProperties
 	if spaceProperties == nil {
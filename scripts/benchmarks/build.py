@@ -0,0 +1,443 @@
+#
+# Copyright 2019 The Vearch Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+# -*- coding: UTF-8 -*-
+
+import requests
+import multiprocessing
+import threading
+import csv
+import json
+import os
+import shutil
+import time
+import argparse
+import numpy as np
+
+import restful
+from memory import remote_memory, ENGINE_MEMORY
+from sweep import grid_points
+from metrics import evaluate_all
+from utils import (
+    parse_arguments,
+    get_dataset_by_name,
+    import_engine,
+    setup_logger,
+    start_record,
+)
+
+
+__description__ = """ index build benchmark, for every point of a grid of index
+params such as training_threshold, ncentroids, nsubvector, nlinks and
+efConstruction, and of build threads in local mode, the space is loaded from
+empty, training time, indexing throughput over time, recall and memory of the
+built index are recorded"""
+
+# the limits of index params checked by master
+MIN_NLINKS, MAX_NLINKS = 8, 96
+MIN_EF_CONSTRUCTION, MAX_EF_CONSTRUCTION = 16, 1024
+
+
+def default_param(args: argparse.Namespace, key: str):
+    value = args.index_params.get(key)
+    if value is None:
+        ex = Exception("--build-sweep is needed when --index-params has no %s" % (key))
+        raise ex
+    return value
+
+
+def default_grid(args: argparse.Namespace):
+    if args.index_type in ["IVFPQ", "IVFFLAT", "BINARYIVF"]:
+        ncentroids = default_param(args, "ncentroids")
+        # null keeps the default threshold, training starts as soon as there
+        # are enough vectors, the other trains once on all of a partition
+        grid = {
+            "ncentroids": sorted(
+                set([max(1, ncentroids // 2), ncentroids, ncentroids * 2])
+            ),
+            "training_threshold": [None, args.nb // args.partition_num],
+        }
+        if args.index_type == "IVFPQ":
+            nsubvector = default_param(args, "nsubvector")
+            grid["nsubvector"] = [
+                n
+                for n in [nsubvector // 2, nsubvector]
+                if n > 0 and args.dimension % n == 0
+            ]
+        return grid
+    if args.index_type == "HNSW":
+        nlinks = default_param(args, "nlinks")
+        ef_construction = default_param(args, "efConstruction")
+        return {
+            "nlinks": sorted(
+                set(
+                    min(max(n, MIN_NLINKS), MAX_NLINKS)
+                    for n in [nlinks // 2, nlinks, nlinks * 2]
+                )
+            ),
+            "efConstruction": sorted(
+                set(
+                    min(max(e, MIN_EF_CONSTRUCTION), MAX_EF_CONSTRUCTION)
+                    for e in [ef_construction, ef_construction * 2, ef_construction * 4]
+                )
+            ),
+        }
+    return {}
+
+
+def index_params_of(args: argparse.Namespace, point: dict):
+    """index params of the base updated by a grid point, null removes a key"""
+    params = dict(args.index_params)
+    for key, value in point.items():
+        if value is None:
+            params.pop(key, None)
+        else:
+            params[key] = value
+    return params
+
+
+def indexing_series(samples: list):
+    """indexed vectors per second between samples, [(seconds, rate)]"""
+    series = []
+    for prev, cur in zip(samples, samples[1:]):
+        if cur["time"] > prev["time"]:
+            series.append(
+                (
+                    round(cur["time"], 3),
+                    (cur["index_num"] - prev["index_num"])
+                    / (cur["time"] - prev["time"]),
+                )
+            )
+    return series
+
+
+def first_time(samples: list, condition):
+    for sample in samples:
+        if condition(sample):
+            return sample["time"]
+    return None
+
+
+def sample_space(args: argparse.Namespace, start: float, samples: list, stop):
+    url = args.url + "/dbs/" + args.db + "/spaces/" + args.space
+    while True:
+        try:
+            response = requests.get(url, auth=(args.user, args.password))
+            partitions = response.json()["data"]["partitions"]
+            samples.append(
+                {
+                    "time": time.time() - start,
+                    "doc_num": sum(p.get("doc_num", 0) for p in partitions),
+                    "index_num": sum(p["index_num"] for p in partitions),
+                    "trained": sum(p["index_status"] for p in partitions),
+                }
+            )
+        except (requests.RequestException, ValueError, KeyError) as e:
+            logger.debug("sample space failed: %s" % (e))
+        if stop.wait(args.sample_interval):
+            break
+
+
+def build_remote(args: argparse.Namespace, xb: np.ndarray, xq: np.ndarray, gt):
+    base = remote_memory(args)["used_mem"]
+    restful.create_db_and_space(args)
+
+    samples = []
+    stop = threading.Event()
+    start = time.time()
+    sampler = threading.Thread(target=sample_space, args=(args, start, samples, stop))
+    sampler.start()
+    restful.upsert(args, xb)
+    loaded = time.time() - start
+    if args.waiting_index:
+        restful.train_and_build_index(args)
+    built = time.time() - start
+    stop.set()
+    sampler.join()
+
+    used_mem = remote_memory(args)["used_mem"] - base
+
+    batch_size = args.batch_size
+    args.batch_size = 1
+    qps, recalls, _ = restful.search(args, xq, gt)
+    args.batch_size = batch_size
+
+    if not args.keep_space:
+        restful.destroy(args)
+
+    trained = None
+    if args.index_type not in ["FLAT", "HNSW"]:
+        trained = first_time(samples, lambda s: s["trained"] >= args.partition_num)
+    return {
+        "load_time": loaded,
+        "train_time": trained,
+        "build_time": built,
+        "series": indexing_series(samples),
+        "recall": recalls,
+        "qps": qps,
+        "memory": used_mem,
+    }
+
+
+def build_local(items: tuple):
+    """run in a process of its own, OMP_NUM_THREADS is set before it starts"""
+    args, xb, xq, gt = items
+    vearch = import_engine()
+
+    path = os.path.join(args.local_path, "build")
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    engine = vearch.Engine(path, os.path.join(path, "logs"))
+    params = dict(args.index_params)
+    training_threshold = params.pop("training_threshold", 0)
+    if training_threshold == 0 and args.index_type in ["IVFPQ", "IVFFLAT"]:
+        # as ps does, 39 points per centroid at least
+        training_threshold = params["ncentroids"] * 39
+    engine_info = {
+        # the engine trains once index_size vectors are added
+        "index_size": training_threshold,
+        "retrieval_type": args.index_type,
+        "retrieval_param": params,
+    }
+    fields = [vearch.GammaFieldInfo("field_int", vearch.dataType.LONG, False)]
+    vector_field = vearch.GammaVectorInfo(
+        name="field_vector", dimension=args.dimension, store_type=args.store_type
+    )
+    response_code = engine.create_table(
+        engine_info, name=args.space, fields=fields, vector_field=vector_field
+    )
+    if response_code != 0:
+        ex = Exception("create table failed, index type: %s" % (args.index_type))
+        raise ex
+
+    samples = []
+    start = time.time()
+
+    def sample():
+        status = engine.get_status()
+        samples.append(
+            {
+                "time": time.time() - start,
+                "doc_num": status["doc_num"],
+                "index_num": status["min_indexed_num"],
+                "trained": status["index_status"],
+            }
+        )
+        return status
+
+    last = start
+    for begin in range(0, args.nb, args.batch_size):
+        end = min(args.nb, begin + args.batch_size)
+        engine.add_batch(
+            np.ascontiguousarray(xb[begin:end], dtype=np.float32),
+            {"field_int": np.arange(begin, end)},
+        )
+        if time.time() - last >= args.sample_interval:
+            sample()
+            last = time.time()
+    loaded = time.time() - start
+    if args.waiting_index and args.index_type != "FLAT":
+        while sample()["min_indexed_num"] < args.nb:
+            time.sleep(args.sample_interval)
+    built = time.time() - start
+
+    memory = engine.get_mempory_info()
+    retrieval_param = {"metric_type": args.index_params["metric_type"]}
+    retrieval_param.update(args.search_params)
+    prepared = engine.prepare(
+        fields=["field_int"], retrieval_param=retrieval_param, topn=args.limit
+    )
+    search_results = np.full((args.nq, args.limit), -1)
+    search_start = time.time()
+    for begin in range(0, args.nq, args.batch_size):
+        results = prepared.search(xq[begin : begin + args.batch_size])
+        for i, result in enumerate(results):
+            ids = [item["field_int"] for item in result["result_items"]]
+            search_results[begin + i][: len(ids)] = ids
+    qps = args.nq / (time.time() - search_start)
+    prepared.close()
+    engine.close()
+    shutil.rmtree(path)
+
+    trained = None
+    if args.index_type not in ["FLAT", "HNSW"]:
+        trained = first_time(samples, lambda s: s["trained"] > 0)
+    return {
+        "load_time": loaded,
+        "train_time": trained,
+        "build_time": built,
+        "series": indexing_series(samples),
+        "recall": (
+            evaluate_all(search_results, gt, args.limit)["recall"]
+            if gt is not None
+            else {}
+        ),
+        "qps": qps,
+        "memory": sum(memory[key] for key in ENGINE_MEMORY),
+    }
+
+
+def run_local(args: argparse.Namespace, xb, xq, gt, threads: int):
+    # openmp reads the thread count once at start, so every build has a
+    # fresh process, spawned rather than forked from this one
+    env = os.environ.get("OMP_NUM_THREADS")
+    if threads > 0:
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+    try:
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            return pool.apply(build_local, ((args, xb, xq, gt),))
+    finally:
+        if env is None:
+            os.environ.pop("OMP_NUM_THREADS", None)
+        else:
+            os.environ["OMP_NUM_THREADS"] = env
+
+
+def write_results(args: argparse.Namespace, points: list):
+    keys = []
+    for point in points:
+        for key in point["params"]:
+            if key not in keys:
+                keys.append(key)
+    columns = keys + [
+        "threads",
+        "load_time",
+        "train_time",
+        "build_time",
+        "index_rate",
+        "recall",
+        "qps",
+        "memory",
+    ]
+    with open(args.sweep_output + ".csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for point in points:
+            row = [point["params"].get(key, "") for key in keys]
+            row += [point[key] for key in columns[len(keys) :]]
+            writer.writerow(row)
+
+    with open(args.sweep_output + ".json", "w") as f:
+        json.dump(
+            {
+                "dataset": args.dataset,
+                "index_type": args.index_type,
+                "index_params": args.index_params,
+                "nb": args.nb,
+                "nq": args.nq,
+                "limit": args.limit,
+                "mode": args.mode,
+                "points": points,
+            },
+            f,
+            indent=2,
+        )
+
+
+def run_build(args: argparse.Namespace):
+    xb, xq, gt = get_dataset_by_name(logger, args)
+    if not args.recall:
+        logger.warning("no ground truth of dataset %s, recall is 0" % (args.dataset))
+        gt = None
+
+    args_str = ", ".join(f"{key}={value}" for key, value in vars(args).items())
+    logger.info(f"args: {args_str}")
+
+    if args.mode == "local" and args.index_type == "BINARYIVF":
+        logger.error("embedded engine python sdk doesn't support BINARYIVF")
+        return
+
+    grid = (
+        json.loads(args.build_sweep) if args.build_sweep != "" else default_grid(args)
+    )
+    threads_list = [0]
+    if args.build_threads != "":
+        threads_list = [int(t) for t in args.build_threads.split(",")]
+        if args.mode == "remote":
+            logger.warning(
+                "build threads of ps are set by its OMP_NUM_THREADS, "
+                "--build-threads only works in local mode"
+            )
+            threads_list = [0]
+
+    base_params = args.index_params
+    points = []
+    for params in grid_points(grid):
+        for threads in threads_list:
+            args.index_params = index_params_of(args, params)
+            if args.mode == "local":
+                result = run_local(args, xb, xq, gt, threads)
+            else:
+                result = build_remote(args, xb, xq, gt)
+            args.index_params = base_params
+
+            rates = [rate for _, rate in result["series"]]
+            point = {
+                "params": params,
+                "threads": threads,
+                "load_time": result["load_time"],
+                "train_time": result["train_time"],
+                "build_time": result["build_time"],
+                "index_rate": args.nb / result["build_time"],
+                # k-NN recall of the largest k evaluated, as in sweep, 1-recall
+                # saturates once the nearest neighbor is found
+                "recall": (
+                    result["recall"][max(result["recall"])] if result["recall"] else 0.0
+                ),
+                "qps": result["qps"],
+                "memory": result["memory"],
+                "series": result["series"],
+            }
+            logger.info(
+                "index params: %s, threads: %d, load cost: %.4f seconds, train cost: %s, build cost: %.4f seconds, index rate: %.4f, peak index rate: %.4f, recall: %.4f, QPS: %.4f, memory: %.2f MB"
+                % (
+                    params,
+                    threads,
+                    point["load_time"],
+                    "%.4f seconds" % point["train_time"]
+                    if point["train_time"] is not None
+                    else "-",
+                    point["build_time"],
+                    point["index_rate"],
+                    max(rates) if rates else 0.0,
+                    point["recall"],
+                    point["qps"],
+                    point["memory"] / 2**20,
+                )
+            )
+            metrics = dict(point)
+            del metrics["params"], metrics["threads"]
+            restful.add_record("build", params=params, threads=threads, **metrics)
+            points.append(point)
+
+    write_results(args, points)
+    logger.info(
+        "build results written to %s.csv and %s.json"
+        % (args.sweep_output, args.sweep_output)
+    )
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    logger = setup_logger(args)
+    restful.logger = logger
+    record = start_record(args, "build")
+
+    run_build(args)
+
+    fname = record.save()
+    if fname is not None:
+        logger.info("result saved to %s" % (fname))
@@ -0,0 +1,226 @@
+#
+# Copyright 2019 The Vearch Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+# -*- coding: UTF-8 -*-
+
+import argparse
+import json
+import logging
+import math
+import sys
+from collections import Counter
+
+from utils import LatencyHistogram, log_levels
+
+
+__description__ = """ compare json results of benchmark runs, the first one is
+the baseline, a phase of the others regresses when it is worse than the
+threshold and the difference is significant by Mann-Whitney U test"""
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("results", nargs="+", help="json results, baseline first")
+    parser.add_argument(
+        "--qps-threshold",
+        default=0.05,
+        type=float,
+        help="the relative QPS drop regarded as regression",
+    )
+    parser.add_argument(
+        "--latency-threshold",
+        default=0.1,
+        type=float,
+        help="the relative p99 latency increase regarded as regression",
+    )
+    parser.add_argument(
+        "--recall-threshold",
+        default=0.01,
+        type=float,
+        help="the absolute recall drop regarded as regression",
+    )
+    parser.add_argument(
+        "--error-threshold",
+        default=0.001,
+        type=float,
+        help="the absolute error ratio increase regarded as regression",
+    )
+    parser.add_argument(
+        "--alpha",
+        default=0.01,
+        type=float,
+        help="the significance level of latency and throughput difference",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        type=str,
+        help="the log level",
+        choices=log_levels.keys(),
+    )
+    return parser.parse_args()
+
+
+def mann_whitney(a: dict, b: dict):
+    """
+    two sided Mann-Whitney U test of samples given as {value: count}, return
+    (z, p), z > 0 means values of b tend to be larger
+    """
+    n_a, n_b = sum(a.values()), sum(b.values())
+    n = n_a + n_b
+    if n_a == 0 or n_b == 0:
+        return 0.0, 1.0
+    rank, rank_b, ties = 0, 0.0, 0
+    for value in sorted(set(a) | set(b)):
+        count = a.get(value, 0) + b.get(value, 0)
+        rank_b += b.get(value, 0) * (rank + (count + 1) / 2.0)
+        ties += count**3 - count
+        rank += count
+    u = rank_b - n_b * (n_b + 1) / 2.0
+    variance = n_a * n_b / 12.0 * ((n + 1) - ties / float(n * (n - 1)))
+    if variance <= 0:
+        return 0.0, 1.0
+    z = (u - n_a * n_b / 2.0) / math.sqrt(variance)
+    return z, math.erfc(abs(z) / math.sqrt(2))
+
+
+def phase_keys(record: dict):
+    """key phases by index type, name and occurrence, phases repeat in a run"""
+    phases = {}
+    seen = Counter()
+    for phase in record["phases"]:
+        name = "%s %s" % (phase["config"]["index_type"], phase["phase"])
+        seen[name] += 1
+        phases["%s #%d" % (name, seen[name])] = phase
+    return phases
+
+
+def throughput_samples(histogram: LatencyHistogram):
+    """requests per second without the partial first and last seconds"""
+    series = histogram.throughput_series()
+    return Counter(series[1:-1] if len(series) > 2 else series)
+
+
+def compare_phase(args: argparse.Namespace, base: dict, cand: dict):
+    """return (description, regressions)"""
+    items, regressions = [], []
+
+    if "qps" in base and "qps" in cand and base["qps"] > 0:
+        change = cand["qps"] / base["qps"] - 1
+        # too short to test, the threshold decides alone
+        p = 0.0
+        if "histogram" in base and "histogram" in cand:
+            base_samples = throughput_samples(
+                LatencyHistogram.from_dict(base["histogram"])
+            )
+            cand_samples = throughput_samples(
+                LatencyHistogram.from_dict(cand["histogram"])
+            )
+            if sum(base_samples.values()) >= 3 and sum(cand_samples.values()) >= 3:
+                _, p = mann_whitney(base_samples, cand_samples)
+        items.append(
+            "QPS: %.2f -> %.2f (%+.1f%%, p=%.4f)"
+            % (base["qps"], cand["qps"], change * 100, p)
+        )
+        if change < -args.qps_threshold and p < args.alpha:
+            regressions.append("QPS")
+
+    if "histogram" in base and "histogram" in cand:
+        base_histogram = LatencyHistogram.from_dict(base["histogram"])
+        cand_histogram = LatencyHistogram.from_dict(cand["histogram"])
+        z, p = mann_whitney(base_histogram.counts, cand_histogram.counts)
+        base_p99, cand_p99 = base["latency"]["p99"], cand["latency"]["p99"]
+        change = cand_p99 / base_p99 - 1 if base_p99 > 0 else 0.0
+        items.append(
+            "p50: %.3f -> %.3f ms, p99: %.3f -> %.3f ms (%+.1f%%, p=%.4f)"
+            % (
+                base["latency"]["p50"],
+                cand["latency"]["p50"],
+                base_p99,
+                cand_p99,
+                change * 100,
+                p,
+            )
+        )
+        if change > args.latency_threshold and z > 0 and p < args.alpha:
+            regressions.append("latency")
+
+        base_total = base_histogram.count + base_histogram.errors
+        cand_total = cand_histogram.count + cand_histogram.errors
+        if base_total > 0 and cand_total > 0:
+            base_ratio = base_histogram.errors / float(base_total)
+            cand_ratio = cand_histogram.errors / float(cand_total)
+            if cand_ratio - base_ratio > args.error_threshold:
+                items.append("errors: %.4f -> %.4f" % (base_ratio, cand_ratio))
+                regressions.append("errors")
+
+    for k, base_recall in base.get("recall", {}).items():
+        if k not in cand.get("recall", {}):
+            continue
+        cand_recall = cand["recall"][k]
+        items.append("Recall@%s: %.4f -> %.4f" % (k, base_recall, cand_recall))
+        if base_recall - cand_recall > args.recall_threshold:
+            regressions.append("Recall@%s" % (k))
+
+    return ", ".join(items), regressions
+
+
+def compare(args: argparse.Namespace):
+    records = []
+    for fname in args.results:
+        with open(fname, "r") as f:
+            records.append(json.load(f))
+
+    baseline = phase_keys(records[0])
+    total = 0
+    for fname, record in zip(args.results[1:], records[1:]):
+        logger.info("compare %s with baseline %s" % (fname, args.results[0]))
+        phases = phase_keys(record)
+        for key, base in baseline.items():
+            if key not in phases:
+                logger.warning("%s missing in %s" % (key, fname))
+                continue
+            if base["config"] != phases[key]["config"]:
+                logger.warning("%s config differs, %s" % (key, phases[key]["config"]))
+            description, regressions = compare_phase(args, base, phases[key])
+            if len(regressions) > 0:
+                total += len(regressions)
+                logger.error(
+                    "%s, %s, REGRESSION: %s"
+                    % (key, description, ", ".join(regressions))
+                )
+            else:
+                logger.info("%s, %s" % (key, description))
+
+    logger.info("regressions: %d" % (total))
+    return total
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    logger = logging.getLogger(__name__)
+    logger.setLevel(args.log_level)
+    formatter = logging.Formatter(
+        "%(asctime)s %(name)s:%(lineno)s %(levelname)s %(message)s"
+    )
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+    # non zero exit code fails a release gate
+    sys.exit(1 if compare(args) > 0 else 0)
@@ -0,0 +1,279 @@
+#
+# Copyright 2019 The Vearch Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+# -*- coding: UTF-8 -*-
+
+import time
+import argparse
+import numpy as np
+
+import restful
+import groundtruth
+from groundtruth import cached_groundtruth, filter_mask
+from utils import (
+    parse_arguments,
+    get_dataset_by_name,
+    evaluate_search,
+    LatencyHistogram,
+    setup_logger,
+    start_record,
+)
+
+
+__description__ = """ filtered search benchmark, documents have a range
+field_int equal to the id and a term field_tag of id % cardinality, searches
+filter on them with a selectivity sweep, recall is evaluated against exact
+ground truth of the filtered documents"""
+
+
+def create_db_and_space(args: argparse.Namespace):
+    index = {"name": "gamma", "type": args.index_type, "params": args.index_params}
+    space_config = {
+        "name": args.space,
+        "partition_num": args.partition_num,
+        "replica_num": args.replica_num,
+        "fields": [
+            {
+                "name": "field_int",
+                "type": "integer",
+                "index": {"name": "field_int", "type": "SCALAR"},
+            },
+            {
+                "name": "field_tag",
+                "type": "string",
+                "index": {"name": "field_tag", "type": "SCALAR"},
+            },
+            {
+                "name": "field_vector",
+                "type": "vector",
+                "index": index,
+                "dimension": args.dimension,
+            },
+        ],
+    }
+    response = restful.create_db(args)
+    if response.json()["code"] != 0:
+        logger.error(response.text)
+    assert response.json()["code"] == 0
+
+    response = restful.create_space(args, space_config)
+    if response.json()["code"] != 0:
+        logger.error(response.text)
+    assert response.json()["code"] == 0
+
+
+def process_upsert_data(items: tuple):
+    args, index, features = items
+    data = {}
+    data["db_name"] = args.db
+    data["space_name"] = args.space
+    data["documents"] = []
+    for j in range(len(features)):
+        key = index * args.batch_size + j
+        data["documents"].append(
+            {
+                "_id": str(key),
+                "field_int": key,
+                "field_tag": str(key % args.cardinality),
+                "field_vector": features[j],
+            }
+        )
+
+    histogram = LatencyHistogram()
+    rs, latency, end = restful.post(args, args.url + "/document/upsert", data)
+    ok = rs is not None and rs["data"]["total"] == len(features)
+    histogram.record(latency, end, error=not ok)
+    return histogram
+
+
+def upsert(args: argparse.Namespace, xb: np.ndarray):
+    pool = restful.worker_pool(args)
+    total_data = []
+    for i in range(0, args.nb, args.batch_size):
+        total_data.append(
+            (args, i // args.batch_size, xb[i : i + args.batch_size].tolist())
+        )
+
+    start = time.time()
+    results = restful.pool_map(args, pool, process_upsert_data, total_data)
+    pool.close()
+    pool.join()
+    end = time.time()
+
+    logger.info(
+        "nb: %d, batch size:%d, upsert cost: %.4f seconds, QPS: %.4f, pool size: %d"
+        % (
+            args.nb,
+            args.batch_size,
+            end - start,
+            args.nb / (end - start),
+            args.pool_size,
+        )
+    )
+    restful.log_latency(
+        "upsert", LatencyHistogram.merge_all(results), qps=args.nb / (end - start)
+    )
+
+
+def make_filters(args: argparse.Namespace, filter_type: str, selectivity: float):
+    """return (filters, mask of matched documents)"""
+    ids = np.arange(args.nb)
+    columns = {"field_int": ids, "field_tag": (ids % args.cardinality).astype(str)}
+    if filter_type == "range":
+        num = max(1, int(round(args.nb * selectivity)))
+        filters = {
+            "operator": "AND",
+            "conditions": [{"field": "field_int", "operator": "<", "value": num}],
+        }
+    else:
+        num = max(1, int(round(args.cardinality * selectivity)))
+        filters = {
+            "operator": "AND",
+            "conditions": [
+                {
+                    "field": "field_tag",
+                    "operator": "IN",
+                    "value": [str(i) for i in range(num)],
+                }
+            ],
+        }
+    return filters, filter_mask(filters, columns, args.nb)
+
+
+def process_search_data(items: tuple):
+    args, index, features, filters = items
+    data = {}
+    data["db_name"] = args.db
+    data["space_name"] = args.space
+    data["vectors"] = [{"field": "field_vector", "feature": features}]
+    data["filters"] = filters
+    data["limit"] = args.limit
+    if args.search_params:
+        data["index_params"] = args.search_params
+
+    histogram = LatencyHistogram()
+    rs, latency, end = restful.post(
+        args, args.url + "/document/search?timeout=1000000", data
+    )
+    histogram.record(latency, end, error=rs is None)
+    if rs is None:
+        return index, None, histogram
+    return index, [int(d["_id"]) for d in rs["data"]["documents"][0]], histogram
+
+
+def search(
+    args: argparse.Namespace,
+    xq: np.ndarray,
+    gt: np.ndarray,
+    filter_type: str,
+    selectivity: float,
+    filters: dict,
+):
+    pool = restful.worker_pool(args)
+    total_data = [(args, i, xq[i].tolist(), filters) for i in range(args.nq)]
+
+    start = time.time()
+    results = restful.pool_map(args, pool, process_search_data, total_data)
+    pool.close()
+    pool.join()
+    end = time.time()
+
+    recalls = {}
+    metrics = {}
+    recall_str = ""
+    if gt is not None:
+        # ground truth is padded with -1 when fewer documents match, k-NN
+        # recall counts only the valid ids
+        search_results = np.full((args.nq, args.limit), -1, dtype=np.int64)
+        for index, ids, _ in results:
+            if ids is not None:
+                search_results[index][: len(ids)] = ids[: args.limit]
+        recalls, metrics, recall_str = evaluate_search(search_results, gt, args.limit)
+
+    logger.info(
+        "index type: %s, filter: %s, selectivity: %.4f%%, nq: %d, search cost: %.4f seconds, QPS: %.4f, %spool size: %d"
+        % (
+            args.index_type,
+            filter_type,
+            selectivity * 100,
+            args.nq,
+            end - start,
+            args.nq / (end - start),
+            recall_str,
+            args.pool_size,
+        )
+    )
+    restful.log_latency(
+        "%s %s search" % (args.index_type, filter_type),
+        LatencyHistogram.merge_all(result[2] for result in results),
+        qps=args.nq / (end - start),
+        recall=recalls,
+        knn_recall=metrics.get("recall", {}),
+        ndcg=metrics.get("ndcg", {}),
+        mrr=metrics.get("mrr"),
+        selectivity=selectivity,
+    )
+
+
+def run_filtered(args: argparse.Namespace):
+    xb, xq, _ = get_dataset_by_name(logger, args)
+
+    args_str = ", ".join(f"{key}={value}" for key, value in vars(args).items())
+    logger.info(f"args: {args_str}")
+
+    # the filtered ground truth doesn't come with any dataset, it is computed
+    # and cached by content
+    cases = []
+    for filter_type in ["range", "term"]:
+        for selectivity in [float(s) for s in args.selectivity.split(",")]:
+            filters, mask = make_filters(args, filter_type, selectivity)
+            gt = None
+            if args.recall:
+                gt, _ = cached_groundtruth(
+                    xb, xq, args.limit, args.index_params["metric_type"], mask
+                )
+            # the real selectivity after rounding to whole documents or tags
+            cases.append((filter_type, mask.mean(), filters, gt))
+
+    for index_type in args.index_types.split(","):
+        args.index_type = index_type
+        create_db_and_space(args)
+        upsert(args, xb)
+        if args.waiting_index:
+            restful.train_and_build_index(args)
+
+        batch_size = args.batch_size
+        args.batch_size = 1
+        for filter_type, selectivity, filters, gt in cases:
+            search(args, xq, gt, filter_type, selectivity, filters)
+        args.batch_size = batch_size
+
+        if not args.keep_space:
+            restful.destroy(args)
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    logger = setup_logger(args)
+    restful.logger = logger
+    groundtruth.logger = logger
+    record = start_record(args, "filtered")
+
+    run_filtered(args)
+
+    fname = record.save()
+    if fname is not None:
+        logger.info("result saved to %s" % (fname))
@@ -0,0 +1,320 @@
+#
+# Copyright 2019 The Vearch Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+# -*- coding: UTF-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+import numpy as np
+
+from utils import ivecs_read, fvecs_read, get_cpu_count, log_levels
+
+
+__description__ = """ ground truth generator, exact top k neighbours of queries
+in a base by L2 or inner product, with blocked numpy matrix multiplication in
+threads, optionally among the documents matched by vearch filters, results
+are cached by content hash and written as .ivecs or .npy"""
+
+# the distance blocks of all threads, in bytes
+MEMORY_BUDGET = 2**30
+BASE_BLOCK = 2**16
+
+# configured in main, or by the importer
+logger = logging.getLogger("groundtruth")
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--base", required=True, type=str, help="base vectors, .fvecs/.bvecs/.npy"
+    )
+    parser.add_argument(
+        "--queries", required=True, type=str, help="query vectors, .fvecs/.bvecs/.npy"
+    )
+    parser.add_argument(
+        "--output",
+        required=True,
+        type=str,
+        help="ground truth ids, .ivecs or .npy, distances are written beside "
+        "as .fvecs or _distances.npy",
+    )
+    parser.add_argument("--k", default=100, type=int, help="the number of neighbours")
+    parser.add_argument(
+        "--metric",
+        default="L2",
+        type=str,
+        choices=["L2", "InnerProduct"],
+        help="the metric type",
+    )
+    parser.add_argument(
+        "--filters",
+        default="",
+        type=str,
+        help="vearch filters in json, such as "
+        '\'{"operator": "AND", "conditions": [{"field": "_id", "operator": "<", "value": 1000}]}\'',
+    )
+    parser.add_argument(
+        "--fields",
+        default="",
+        type=str,
+        help="scalar fields of base for filters, a .npz of one array per field, "
+        "_id is the row number",
+    )
+    parser.add_argument(
+        "--threads", default=get_cpu_count(), type=int, help="the number of threads"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default="datasets/groundtruth",
+        type=str,
+        help="the directory of cached ground truth, empty to disable",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        type=str,
+        help="the log level",
+        choices=log_levels.keys(),
+    )
+    return parser.parse_args()
+
+
+def bvecs_read(fname: str):
+    a = np.fromfile(fname, dtype="uint8")
+    d = a[:4].view("int32")[0]
+    return a.reshape(-1, d + 4)[:, 4:].copy()
+
+
+def read_vectors(fname: str):
+    if fname.endswith(".npy"):
+        return np.load(fname)
+    if fname.endswith(".bvecs"):
+        return bvecs_read(fname)
+    if fname.endswith(".ivecs"):
+        return ivecs_read(fname)
+    return fvecs_read(fname)
+
+
+def ivecs_write(fname: str, a: np.ndarray):
+    a = np.asarray(a, dtype="int32")
+    np.hstack([np.full((a.shape[0], 1), a.shape[1], dtype="int32"), a]).tofile(fname)
+
+
+def fvecs_write(fname: str, a: np.ndarray):
+    ivecs_write(fname, np.asarray(a, dtype="float32").view("int32"))
+
+
+def write_groundtruth(fname: str, ids: np.ndarray, distances: np.ndarray):
+    if fname.endswith(".npy"):
+        np.save(fname, ids)
+        np.save(fname[: -len(".npy")] + "_distances.npy", distances)
+    else:
+        ivecs_write(fname, ids)
+        fvecs_write(os.path.splitext(fname)[0] + ".fvecs", distances)
+
+
+def filter_mask(filters: dict, columns: dict, nb: int):
+    """bools of the nb documents matched by vearch filters on columns"""
+    ids = np.arange(nb)
+    masks = []
+    for condition in filters["conditions"]:
+        name = condition["field"]
+        values = columns[name] if name in columns else ids
+        value = condition["value"]
+        operator = condition["operator"]
+        if operator == "<":
+            masks.append(values < value)
+        elif operator == "<=":
+            masks.append(values <= value)
+        elif operator == ">":
+            masks.append(values > value)
+        elif operator == ">=":
+            masks.append(values >= value)
+        elif operator == "=":
+            masks.append(values == value)
+        elif operator in ["<>", "!="]:
+            masks.append(values != value)
+        elif operator == "IN":
+            masks.append(np.isin(values.astype(str), [str(v) for v in value]))
+        elif operator == "NOT IN":
+            masks.append(~np.isin(values.astype(str), [str(v) for v in value]))
+        else:
+            ex = Exception("unsupported filter operator: %s" % (operator))
+            raise ex
+    if len(masks) == 0:
+        return np.ones(nb, dtype=bool)
+    if filters.get("operator", "AND") == "OR":
+        return np.logical_or.reduce(masks)
+    return np.logical_and.reduce(masks)
+
+
+def search_block(
+    base: np.ndarray, norms: np.ndarray, queries: np.ndarray, k: int, metric: str
+):
+    """
+    top k of queries in base by blocks of base, return (positions, distances)
+    sorted, inf distances and -1 positions pad when base is short
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    best_distances = np.full((queries.shape[0], k), np.inf, dtype=np.float32)
+    best_positions = np.full((queries.shape[0], k), -1, dtype=np.int64)
+    for start in range(0, base.shape[0], BASE_BLOCK):
+        block = base[start : start + BASE_BLOCK]
+        if metric == "L2":
+            # |q|^2 is the same for a query, added at the end
+            distances = norms[start : start + BASE_BLOCK] - 2 * queries @ block.T
+        else:
+            distances = -(queries @ block.T)
+        kk = min(k, block.shape[0])
+        top = np.argpartition(distances, kk - 1, axis=1)[:, :kk]
+        distances = np.hstack(
+            [best_distances, np.take_along_axis(distances, top, axis=1)]
+        )
+        positions = np.hstack([best_positions, top + start])
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        best_distances = np.take_along_axis(distances, top, axis=1)
+        best_positions = np.take_along_axis(positions, top, axis=1)
+
+    order = np.argsort(best_distances, axis=1)
+    best_distances = np.take_along_axis(best_distances, order, axis=1)
+    best_positions = np.take_along_axis(best_positions, order, axis=1)
+    if metric == "L2":
+        best_distances = np.maximum(
+            best_distances + (queries**2).sum(axis=1)[:, np.newaxis], 0
+        )
+    else:
+        # inner products, larger is nearer
+        best_distances = -best_distances
+    best_positions[~np.isfinite(best_distances)] = -1
+    return best_positions, best_distances
+
+
+def compute_groundtruth(
+    xb: np.ndarray,
+    xq: np.ndarray,
+    k: int,
+    metric: str = "L2",
+    mask: np.ndarray = None,
+    threads: int = None,
+):
+    """
+    exact top k ids and distances of xq in xb, among the documents in mask
+    if given, -1 ids pad when fewer documents match, blocks of queries run in
+    threads as numpy releases the GIL in matrix multiplication
+    """
+    ids = np.arange(xb.shape[0]) if mask is None else np.nonzero(mask)[0]
+    base = np.asarray(xb if mask is None else xb[ids], dtype=np.float32)
+    norms = (base**2).sum(axis=1) if metric == "L2" else None
+    threads = threads or get_cpu_count()
+    query_block = max(
+        1, MEMORY_BUDGET // (4 * min(BASE_BLOCK, max(len(ids), 1)) * threads)
+    )
+
+    if len(ids) == 0:
+        return (
+            np.full((xq.shape[0], k), -1, dtype=np.int64),
+            np.full((xq.shape[0], k), np.inf, dtype=np.float32),
+        )
+
+    def run(start: int):
+        return search_block(base, norms, xq[start : start + query_block], k, metric)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(run, range(0, xq.shape[0], query_block)))
+    positions = np.vstack([result[0] for result in results])
+    distances = np.vstack([result[1] for result in results])
+    gt = np.where(positions >= 0, ids[np.maximum(positions, 0)], -1)
+    return gt, distances
+
+
+def content_hash(*arrays, **params):
+    h = hashlib.sha1()
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(("%s %s" % (a.shape, a.dtype)).encode())
+        h.update(a.data)
+    h.update(json.dumps(params, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def cached_groundtruth(
+    xb: np.ndarray,
+    xq: np.ndarray,
+    k: int,
+    metric: str = "L2",
+    mask: np.ndarray = None,
+    threads: int = None,
+    cache_dir: str = "datasets/groundtruth",
+):
+    """compute_groundtruth, cached in cache_dir by hash of the inputs"""
+    arrays = [xb, xq] if mask is None else [xb, xq, np.packbits(mask)]
+    fname = None
+    if cache_dir:
+        key = content_hash(*arrays, k=k, metric=metric)
+        fname = os.path.join(cache_dir, "gt_%s.npy" % (key))
+        if os.path.exists(fname):
+            logger.debug("ground truth cache hit: %s" % (fname))
+            distances = np.load(fname[: -len(".npy")] + "_distances.npy")
+            return np.load(fname), distances
+
+    start = time.time()
+    gt, distances = compute_groundtruth(xb, xq, k, metric, mask, threads)
+    logger.info(
+        "nb: %d, nq: %d, k: %d, ground truth cost: %.4f seconds"
+        % (
+            xb.shape[0] if mask is None else mask.sum(),
+            xq.shape[0],
+            k,
+            time.time() - start,
+        )
+    )
+    if fname is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        write_groundtruth(fname, gt, distances)
+    return gt, distances
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    logger.setLevel(args.log_level)
+    formatter = logging.Formatter(
+        "%(asctime)s %(name)s:%(lineno)s %(levelname)s %(message)s"
+    )
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+    xb = read_vectors(args.base)
+    xq = read_vectors(args.queries)
+    mask = None
+    if args.filters != "":
+        columns = dict(np.load(args.fields)) if args.fields != "" else {}
+        mask = filter_mask(json.loads(args.filters), columns, xb.shape[0])
+        logger.info("filters match %d of %d documents" % (mask.sum(), xb.shape[0]))
+
+    gt, distances = cached_groundtruth(
+        xb, xq, args.k, args.metric, mask, args.threads, args.cache_dir
+    )
+    write_groundtruth(args.output, gt, distances)
+    logger.info("ground truth written to %s" % (args.output))
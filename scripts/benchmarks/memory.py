@@ -0,0 +1,264 @@
+#
+# Copyright 2019 The Vearch Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+# -*- coding: UTF-8 -*-
+
+import requests
+import os
+import shutil
+import time
+import argparse
+import multiprocessing
+import numpy as np
+import psutil
+
+import restful
+from utils import (
+    parse_arguments,
+    get_dataset_by_name,
+    import_engine,
+    setup_logger,
+    start_record,
+)
+
+
+__description__ = """ memory benchmark, nb grows by steps for every index type
+and store type, memory is sampled at every step and fitted to a linear model
+of bytes per vector, by the partition memory in cluster stats through router
+or by the memory info of an embedded engine"""
+
+ENGINE_MEMORY = ["table_mem", "index_mem", "vector_mem", "field_range_mem", "bitmap_mem"]
+
+
+def step_features(args: argparse.Namespace, xb: np.ndarray, start: int, end: int):
+    if args.index_type == "BINARYIVF":
+        # binary vectors are dimension bits packed in bytes
+        return np.random.randint(0, 256, (end - start, args.dimension // 8))
+    return xb[start:end]
+
+
+def fit(counts: list, values: list):
+    """least squares of value = fixed + per_vector * count"""
+    if len(counts) < 2:
+        return values[-1] / float(counts[-1]), 0.0
+    per_vector, fixed = np.polyfit(counts, values, 1)
+    return per_vector, fixed
+
+
+def remote_memory(args: argparse.Namespace):
+    """engine memory of all partitions in cluster stats, the host memory of ps
+    counts every process on the machine"""
+    url = args.url + "/cluster/stats"
+    response = requests.get(url, auth=(args.user, args.password))
+    total = 0
+    for server in response.json()["data"]:
+        for partition in server.get("partition_infos") or []:
+            if partition.get("error"):
+                ex = Exception(
+                    "partition %s memory failed: %s"
+                    % (partition.get("pid"), partition["error"])
+                )
+                raise ex
+            total += partition.get("size", 0)
+    return {"used_mem": total}
+
+
+def remote_upsert(args: argparse.Namespace, xb: np.ndarray, start: int, end: int):
+    total_data = []
+    for i in range(start // args.batch_size, (end - 1) // args.batch_size + 1):
+        begin = max(start, i * args.batch_size)
+        stop = min(end, (i + 1) * args.batch_size)
+        total_data.append(
+            (args, i, stop - begin, step_features(args, xb, begin, stop))
+        )
+    pool = restful.worker_pool(args)
+    for payloads in restful.encode_windows(
+        args, restful.encode_upsert_data, total_data
+    ):
+        restful.pool_map(args, pool, restful.process_upsert_data, payloads)
+    pool.close()
+    pool.join()
+
+
+def run_remote(args: argparse.Namespace, xb: np.ndarray, counts: list):
+    restful.create_db_and_space(args)
+    samples = []
+    base = remote_memory(args)["used_mem"]
+    nb = args.nb
+    start = 0
+    for count in counts:
+        remote_upsert(args, xb, start, count)
+        args.nb = count
+        if args.waiting_index:
+            restful.train_and_build_index(args)
+        sample = {"used_mem": remote_memory(args)["used_mem"] - base}
+        logger.info(
+            "index type: %s, store type: %s, nb: %d, used memory: %.2f MB"
+            % (args.index_type, args.store_type, count, sample["used_mem"] / 2**20)
+        )
+        samples.append(sample)
+        start = count
+    args.nb = nb
+
+    if not args.keep_space:
+        restful.destroy(args)
+    return samples
+
+
+def measure_local(items: tuple):
+    """run in a process of its own, so rss freed by an earlier combination
+    doesn't hide the growth of this one"""
+    args, xb, counts = items
+    vearch = import_engine()
+
+    path = os.path.join(args.local_path, "%s_%s" % (args.index_type, args.store_type))
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    engine = vearch.Engine(path, os.path.join(path, "logs"))
+    engine_info = {
+        "index_size": counts[0],
+        "retrieval_type": args.index_type,
+        "retrieval_param": args.index_params,
+    }
+    fields = [vearch.GammaFieldInfo("field_int", vearch.dataType.LONG, False)]
+    vector_field = vearch.GammaVectorInfo(
+        name="field_vector", dimension=args.dimension, store_type=args.store_type
+    )
+    response_code = engine.create_table(
+        engine_info, name=args.space, fields=fields, vector_field=vector_field
+    )
+    if response_code != 0:
+        return None
+
+    process = psutil.Process()
+    samples = []
+    base = process.memory_info().rss
+    start = 0
+    for count in counts:
+        for begin in range(start, count, args.batch_size):
+            stop = min(count, begin + args.batch_size)
+            vectors = np.ascontiguousarray(
+                step_features(args, xb, begin, stop), dtype=np.float32
+            )
+            engine.add_batch(vectors, {"field_int": np.arange(begin, stop)})
+        if args.waiting_index and args.index_type != "FLAT":
+            while engine.get_status()["min_indexed_num"] < count:
+                time.sleep(0.5)
+        sample = engine.get_mempory_info()
+        sample["rss"] = process.memory_info().rss - base
+        samples.append(sample)
+        start = count
+
+    engine.close()
+    shutil.rmtree(path)
+    return samples
+
+
+def run_local(args: argparse.Namespace, xb: np.ndarray, counts: list):
+    # every combination has a fresh process, spawned rather than forked
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        samples = pool.apply(measure_local, ((args, xb, counts),))
+    if samples is None:
+        logger.error("create table failed, index type: %s" % (args.index_type))
+        return []
+
+    for count, sample in zip(counts, samples):
+        logger.info(
+            "index type: %s, store type: %s, nb: %d, engine memory: %.2f MB, rss: %.2f MB, %s"
+            % (
+                args.index_type,
+                args.store_type,
+                count,
+                sum(sample[key] for key in ENGINE_MEMORY) / 2**20,
+                sample["rss"] / 2**20,
+                ", ".join("%s: %d" % (key, sample[key]) for key in ENGINE_MEMORY),
+            )
+        )
+    return samples
+
+
+def run_memory(args: argparse.Namespace):
+    xb, _, _ = get_dataset_by_name(logger, args)
+
+    args_str = ", ".join(f"{key}={value}" for key, value in vars(args).items())
+    logger.info(f"args: {args_str}")
+
+    # steps end on batch boundaries, ids of a batch are derived from its index
+    counts = []
+    for i in range(1, args.steps):
+        count = args.nb * i // args.steps // args.batch_size * args.batch_size
+        if count > 0 and (len(counts) == 0 or count > counts[-1]):
+            counts.append(count)
+    counts.append(args.nb)
+    models = []
+    for index_type in args.index_types.split(","):
+        for store_type in args.store_types.split(","):
+            args.index_type = index_type
+            args.store_type = store_type
+            if args.mode == "local" and index_type == "BINARYIVF":
+                logger.warning("embedded engine python sdk doesn't support BINARYIVF")
+                continue
+            if index_type == "IVFFLAT" and store_type != "RocksDB":
+                # ivfflat has raw vectors in its index, the engine requires RocksDB
+                logger.warning("IVFFLAT only supports RocksDB, %s skipped" % (store_type))
+                continue
+
+            if args.mode == "local":
+                samples = run_local(args, xb, counts)
+            else:
+                samples = run_remote(args, xb, counts)
+            if len(samples) == 0:
+                continue
+
+            model = {}
+            for key in samples[0]:
+                per_vector, fixed = fit(counts, [sample[key] for sample in samples])
+                model[key] = {"per_vector": per_vector, "fixed": fixed}
+            if args.mode == "local":
+                totals = [sum(s[key] for key in ENGINE_MEMORY) for s in samples]
+                per_vector, fixed = fit(counts, totals)
+                model["engine_mem"] = {"per_vector": per_vector, "fixed": fixed}
+            restful.add_record(
+                "memory", counts=counts, samples=samples, model=model
+            )
+            models.append((index_type, store_type, model))
+
+    for index_type, store_type, model in models:
+        logger.info(
+            "index type: %s, store type: %s, bytes per vector: %s"
+            % (
+                index_type,
+                store_type,
+                ", ".join(
+                    "%s: %.1f (fixed %.2f MB)"
+                    % (key, value["per_vector"], value["fixed"] / 2**20)
+                    for key, value in model.items()
+                ),
+            )
+        )
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    logger = setup_logger(args)
+    restful.logger = logger
+    record = start_record(args, "memory")
+
+    run_memory(args)
+
+    fname = record.save()
+    if fname is not None:
+        logger.info("result saved to %s" % (fname))
@@ -0,0 +1,52 @@
+#
+# Copyright 2019 The Vearch Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+# -*- coding: UTF-8 -*-
+
+import importlib.util
+import os
+import sys
+
+
+__description__ = """ search quality metrics of test/utils/metrics.py, loaded by
+path under a name of its own, the benchmarks have a utils module too so the
+utils package of the tests can't be put on sys.path"""
+
+MODULE_NAME = "vearch_test_metrics"
+MODULE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "..",
+    "test",
+    "utils",
+    "metrics.py",
+)
+
+if MODULE_NAME not in sys.modules:
+    spec = importlib.util.spec_from_file_location(MODULE_NAME, MODULE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[MODULE_NAME] = module
+    spec.loader.exec_module(module)
+_metrics = sys.modules[MODULE_NAME]
+
+to_ids = _metrics.to_ids
+one_recall_at = _metrics.one_recall_at
+knn_hits = _metrics.knn_hits
+recall_at = _metrics.recall_at
+mrr = _metrics.mrr
+ndcg_at = _metrics.ndcg_at
+distance_ratio = _metrics.distance_ratio
+power_of_ten = _metrics.power_of_ten
+evaluate_all = _metrics.evaluate_all
@@ -0,0 +1,247 @@
+#
+# Copyright 2019 The Vearch Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+# -*- coding: UTF-8 -*-
+
+import random
+import threading
+import time
+import argparse
+import numpy as np
+
+import restful
+from utils import (
+    parse_arguments,
+    get_dataset_by_name,
+    evaluate_search,
+    LatencyHistogram,
+    setup_logger,
+    start_record,
+)
+
+
+__description__ = """ mixed benchmark, searches run while upsert, delete,
+flush and forcemerge are in flight, compared with a search only phase"""
+
+OPERATIONS = ["search", "upsert", "delete"]
+# new ids are written to field_int, an integer field of int32
+MAX_ID = 2**31 - 1
+
+
+def process_mixed(items: tuple):
+    """
+    run search or write by read ratio until duration passed, new documents
+    of every worker have their own id range above nb so deletes never
+    collide, the ranges split the int32 ids of field_int
+    """
+    args, worker, read_ratio, xq, low, high = items
+    # forked workers inherit the same random state
+    random.seed(time.time() + worker)
+    np.random.seed((int(time.time()) + worker) % 2**32)
+
+    histograms = {operate: LatencyHistogram() for operate in OPERATIONS}
+    searched = {}
+    inserted = []
+    stride = (MAX_ID - args.nb) // args.pool_size
+    next_id = args.nb + worker * stride
+    last_id = next_id + stride
+    deadline = time.time() + args.duration
+    while time.time() < deadline:
+        if random.random() < read_ratio:
+            index = random.randrange(xq.shape[0])
+            data = {}
+            data["db_name"] = args.db
+            data["space_name"] = args.space
+            data["vectors"] = [{"field": "field_vector", "feature": xq[index].tolist()}]
+            data["limit"] = args.limit
+            if args.search_params:
+                data["index_params"] = args.search_params
+            rs, latency, end = restful.post(
+                args, args.url + "/document/search?timeout=1000000", data
+            )
+            ok = rs is not None and len(rs["data"]["documents"]) == 1
+            histograms["search"].record(latency, end, error=not ok)
+            if ok:
+                searched[index] = [
+                    int(document["_id"]) for document in rs["data"]["documents"][0]
+                ]
+        elif len(inserted) >= args.batch_size and random.random() < args.delete_ratio:
+            data = {}
+            data["db_name"] = args.db
+            data["space_name"] = args.space
+            data["document_ids"] = inserted[: args.batch_size]
+            del inserted[: args.batch_size]
+            rs, latency, end = restful.post(args, args.url + "/document/delete", data)
+            histograms["delete"].record(latency, end, error=rs is None)
+        else:
+            if next_id + args.batch_size > last_id:
+                ex = Exception("worker %d ran out of int32 ids" % (worker))
+                raise ex
+            features = np.random.uniform(low, high, (args.batch_size, args.dimension))
+            data = {}
+            data["db_name"] = args.db
+            data["space_name"] = args.space
+            data["documents"] = []
+            for j in range(args.batch_size):
+                param_dict = {}
+                param_dict["_id"] = str(next_id + j)
+                param_dict["field_int"] = next_id + j
+                param_dict["field_vector"] = features[j].tolist()
+                param_dict["field_long"] = param_dict["field_int"]
+                param_dict["field_float"] = float(param_dict["field_int"])
+                param_dict["field_double"] = float(param_dict["field_int"])
+                param_dict["field_string"] = param_dict["_id"]
+                data["documents"].append(param_dict)
+            rs, latency, end = restful.post(args, args.url + "/document/upsert", data)
+            ok = rs is not None and rs["data"]["total"] == args.batch_size
+            histograms["upsert"].record(latency, end, error=not ok)
+            if ok:
+                inserted.extend(str(next_id + j) for j in range(args.batch_size))
+            next_id += args.batch_size
+
+    return histograms, searched
+
+
+def maintain(args: argparse.Namespace, operate: str, interval: float, stop):
+    url = args.url + "/index/" + operate
+    data = {"db_name": args.db, "space_name": args.space}
+    while not stop.wait(interval):
+        _, latency, _ = restful.post(args, url, data)
+        logger.info("%s cost: %.4f seconds" % (operate, latency))
+
+
+def run_phase(
+    args: argparse.Namespace,
+    name: str,
+    read_ratio: float,
+    xq: np.ndarray,
+    gt: np.ndarray,
+    low: float,
+    high: float,
+):
+    stop = threading.Event()
+    threads = []
+    if read_ratio < 1:
+        if args.flush_interval > 0:
+            threads.append(
+                threading.Thread(
+                    target=maintain, args=(args, "flush", args.flush_interval, stop)
+                )
+            )
+        if args.forcemerge_interval > 0:
+            threads.append(
+                threading.Thread(
+                    target=maintain,
+                    args=(args, "forcemerge", args.forcemerge_interval, stop),
+                )
+            )
+
+    pool = restful.worker_pool(args)
+    total_data = [
+        (args, worker, read_ratio, xq, low, high) for worker in range(args.pool_size)
+    ]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    results = pool.map(process_mixed, total_data)
+    pool.close()
+    pool.join()
+    end = time.time()
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    histograms = {
+        operate: LatencyHistogram.merge_all(result[0][operate] for result in results)
+        for operate in OPERATIONS
+    }
+    searched = {}
+    for _, result in results:
+        searched.update(result)
+
+    recalls = {}
+    metrics = {}
+    recall_str = ""
+    if args.recall and len(searched) > 0:
+        # ground truth is of the dataset only, documents upserted meanwhile
+        # are left out, they may still push true neighbours out of the
+        # results, so recall of the mixed phase is approximate
+        indexes = sorted(searched)
+        search_results = np.full((len(indexes), args.limit), -1)
+        for i, index in enumerate(indexes):
+            ids = [id for id in searched[index] if id < args.nb][: args.limit]
+            search_results[i][: len(ids)] = ids
+        recalls, metrics, recall_str = evaluate_search(
+            search_results, np.asarray(gt)[indexes], args.limit
+        )
+
+    logger.info(
+        "%s read ratio: %.2f, delete ratio: %.2f, cost: %.4f seconds, search QPS: %.4f, upsert docs per second: %.4f, %spool size: %d"
+        % (
+            name,
+            read_ratio,
+            args.delete_ratio,
+            end - start,
+            histograms["search"].count / (end - start),
+            histograms["upsert"].count * args.batch_size / (end - start),
+            recall_str,
+            args.pool_size,
+        )
+    )
+    for operate in OPERATIONS:
+        if histograms[operate].count + histograms[operate].errors > 0:
+            restful.log_latency(
+                "%s %s" % (name, operate),
+                histograms[operate],
+                qps=histograms[operate].count / (end - start),
+                recall=recalls if operate == "search" else {},
+                knn_recall=metrics.get("recall", {}) if operate == "search" else {},
+                ndcg=metrics.get("ndcg", {}) if operate == "search" else {},
+                mrr=metrics.get("mrr") if operate == "search" else None,
+            )
+
+
+def run_mixed(args: argparse.Namespace):
+    xb, xq, gt = get_dataset_by_name(logger, args)
+
+    args_str = ", ".join(f"{key}={value}" for key, value in vars(args).items())
+    logger.info(f"args: {args_str}")
+
+    restful.create_db_and_space(args)
+    restful.upsert(args, xb)
+    if args.waiting_index:
+        restful.train_and_build_index(args)
+
+    # new documents are drawn from the value range of the dataset
+    low, high = float(xb.min()), float(xb.max())
+    run_phase(args, "search only", 1.0, xq, gt, low, high)
+    run_phase(args, "mixed", args.read_ratio, xq, gt, low, high)
+
+    if not args.keep_space:
+        restful.destroy(args)
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    logger = setup_logger(args)
+    restful.logger = logger
+    record = start_record(args, "mixed")
+
+    run_mixed(args)
+
+    fname = record.save()
+    if fname is not None:
+        logger.info("result saved to %s" % (fname))
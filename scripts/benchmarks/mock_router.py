@@ -0,0 +1,388 @@
+#
+# Copyright 2019 The Vearch Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+# -*- coding: UTF-8 -*-
+
+import argparse
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+__description__ = """ mock router, a local stand-in of vearch router for
+/dbs and /document apis with schema shaped responses, configurable latency
+and result sizes, documents are not stored but their ids are counted, so
+client side cost of sdk and benchmarks can be measured without a cluster"""
+
+CODE_SUCCESS = 0
+CODE_PARAM_ERROR = 6
+CODE_DATABASE_NOT_EXIST = 200
+CODE_DB_EXIST = 201
+CODE_SPACE_NOT_EXIST = 221
+
+# configured in main, or by the importer when started by start
+logger = logging.getLogger("mock_router")
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1", type=str, help="listen host")
+    parser.add_argument("--port", default=9001, type=int, help="listen port")
+    parser.add_argument(
+        "--latency",
+        default=0.0,
+        type=float,
+        help="the milliseconds every request is delayed",
+    )
+    parser.add_argument(
+        "--jitter",
+        default=0.0,
+        type=float,
+        help="the max random milliseconds added to latency",
+    )
+    parser.add_argument(
+        "--max-results",
+        default=0,
+        type=int,
+        help="the max documents of a search or query result, 0 means limit",
+    )
+    parser.add_argument(
+        "--string-size",
+        default=16,
+        type=int,
+        help="the length of string field values in results",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        type=str,
+        help="the log level",
+        choices=["CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG", "NOTSET"],
+    )
+    return parser.parse_args()
+
+
+class MockSpace:
+    def __init__(self, db_name: str, config: dict, string_size: int):
+        self.db_name = db_name
+        self.name = config.get("name", config.get("space_name"))
+        self.partition_num = config.get("partition_num", 1)
+        self.replica_num = config.get("replica_num", 1)
+        self.fields = config.get("fields", [])
+        self.desc = config.get("desc", "")
+        self.ids = set()
+        self.next_id = 0
+        # values of every field shared by all result documents
+        self.values = {}
+        for field in self.fields:
+            if field["type"] in ["integer", "long"]:
+                self.values[field["name"]] = random.randint(0, 2**31)
+            elif field["type"] in ["float", "double"]:
+                self.values[field["name"]] = random.random()
+            elif field["type"] == "string":
+                self.values[field["name"]] = "s" * string_size
+            elif field["type"] == "stringArray":
+                self.values[field["name"]] = ["s" * string_size]
+            elif field["type"] == "vector":
+                self.values[field["name"]] = [
+                    random.random() for _ in range(field.get("dimension", 0))
+                ]
+
+    def dimension(self, name: str):
+        for field in self.fields:
+            if field["name"] == name:
+                return field.get("dimension", 0)
+        return 0
+
+    def detail(self):
+        doc_num = len(self.ids)
+        partitions = []
+        for i in range(self.partition_num):
+            num = doc_num // self.partition_num
+            if i < doc_num % self.partition_num:
+                num += 1
+            partitions.append(
+                {
+                    "pid": i + 1,
+                    "replica_num": self.replica_num,
+                    "doc_num": num,
+                    "index_num": num,
+                    "index_status": 1,
+                    "status": 4,
+                }
+            )
+        return {
+            "space_name": self.name,
+            "db_name": self.db_name,
+            "desc": self.desc,
+            "doc_num": doc_num,
+            "partition_num": self.partition_num,
+            "replica_num": self.replica_num,
+            "schema": {"fields": self.fields},
+            "partitions": partitions,
+        }
+
+    def document(self, key: str, fields: list, vector_value: bool):
+        document = {"_id": key}
+        for field in self.fields:
+            if fields and field["name"] not in fields:
+                continue
+            if field["type"] == "vector" and not vector_value:
+                continue
+            document[field["name"]] = self.values[field["name"]]
+        return document
+
+
+class MockRouter(ThreadingHTTPServer):
+    """the router state, requests are handled by MockRouterHandler"""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple, args: argparse.Namespace):
+        ThreadingHTTPServer.__init__(self, address, MockRouterHandler)
+        self.args = args
+        self.lock = threading.Lock()
+        self.dbs = {}
+
+    def space(self, db_name: str, space_name: str):
+        """return (space, error response)"""
+        if db_name not in self.dbs:
+            return None, error(CODE_DATABASE_NOT_EXIST, "db %s not_exist" % db_name)
+        if space_name not in self.dbs[db_name]:
+            return None, error(
+                CODE_SPACE_NOT_EXIST, "space %s not_exist" % space_name
+            )
+        return self.dbs[db_name][space_name], None
+
+
+def success(data=None):
+    return {"code": CODE_SUCCESS, "msg": "success", "data": data}
+
+
+def error(code: int, msg: str):
+    return {"code": code, "msg": msg}
+
+
+class MockRouterHandler(BaseHTTPRequestHandler):
+    # keep alive, so clients reuse connections as with the real router
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def do_DELETE(self):
+        self.handle_request("DELETE")
+
+    def handle_request(self, method: str):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length > 0 else b""
+        args = self.server.args
+        # drawn before routing, so the trace of a search has it
+        self.delay = args.latency + random.uniform(0, args.jitter)
+        try:
+            request = json.loads(body) if body else {}
+            path = [p for p in urlparse(self.path).path.split("/") if p]
+            response = self.route(method, path, request)
+        except (ValueError, KeyError, TypeError) as e:
+            response = error(CODE_PARAM_ERROR, "bad request: %s" % e)
+
+        if self.delay > 0:
+            time.sleep(self.delay / 1000.0)
+
+        content = json.dumps(response).encode()
+        self.send_response(200 if response["code"] == CODE_SUCCESS else 400)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def route(self, method: str, path: list, request: dict):
+        server = self.server
+        if len(path) >= 1 and path[0] == "dbs":
+            with server.lock:
+                return self.route_dbs(method, path[1:], request)
+        if len(path) == 2 and path[0] == "document" and method == "POST":
+            space, response = server.space(request["db_name"], request["space_name"])
+            if space is None:
+                return response
+            handler = {
+                "upsert": self.upsert,
+                "delete": self.delete,
+                "query": self.query,
+                "search": self.search,
+            }.get(path[1])
+            if handler is not None:
+                return handler(space, request)
+        if len(path) == 2 and path[0] == "index" and method == "POST":
+            return success([])
+        return error(
+            CODE_PARAM_ERROR, "%s /%s not supported" % (method, "/".join(path))
+        )
+
+    def route_dbs(self, method: str, path: list, request: dict):
+        server = self.server
+        if len(path) == 0:
+            return success([{"name": name} for name in server.dbs])
+        db_name = path[0]
+        if len(path) == 1:
+            if method == "POST":
+                if db_name in server.dbs:
+                    return error(CODE_DB_EXIST, "db %s exist" % db_name)
+                server.dbs[db_name] = {}
+                return success({"name": db_name})
+            if db_name not in server.dbs:
+                return error(CODE_DATABASE_NOT_EXIST, "db %s not_exist" % db_name)
+            if method == "DELETE":
+                if len(server.dbs[db_name]) > 0:
+                    return error(CODE_PARAM_ERROR, "db %s has spaces" % db_name)
+                del server.dbs[db_name]
+                return success()
+            return success({"name": db_name})
+
+        if db_name not in server.dbs:
+            return error(CODE_DATABASE_NOT_EXIST, "db %s not_exist" % db_name)
+        spaces = server.dbs[db_name]
+        if len(path) == 2:
+            if method == "POST":
+                space = MockSpace(db_name, request, server.args.string_size)
+                if space.name in spaces:
+                    return error(CODE_PARAM_ERROR, "space %s exist" % space.name)
+                spaces[space.name] = space
+                return success(space.detail())
+            return success([space.detail() for space in spaces.values()])
+
+        space, response = server.space(db_name, path[2])
+        if space is None:
+            return response
+        if method == "DELETE":
+            del spaces[space.name]
+            return success()
+        return success(space.detail())
+
+    def upsert(self, space: MockSpace, request: dict):
+        document_ids = []
+        with self.server.lock:
+            for document in request["documents"]:
+                key = document.get("_id")
+                if key is None:
+                    key = str(space.next_id)
+                    space.next_id += 1
+                space.ids.add(key)
+                document_ids.append({"_id": key, "status": 200, "error": "success"})
+        return success({"total": len(document_ids), "document_ids": document_ids})
+
+    def delete(self, space: MockSpace, request: dict):
+        with self.server.lock:
+            document_ids = [
+                key for key in request.get("document_ids", []) if key in space.ids
+            ]
+            space.ids.difference_update(document_ids)
+        return success({"total": len(document_ids), "document_ids": document_ids})
+
+    def result_size(self, space: MockSpace, limit: int):
+        size = min(limit, len(space.ids))
+        if self.server.args.max_results > 0:
+            size = min(size, self.server.args.max_results)
+        return size
+
+    def query(self, space: MockSpace, request: dict):
+        fields = request.get("fields")
+        vector_value = request.get("vector_value", False)
+        if "document_ids" in request:
+            keys = [key for key in request["document_ids"] if key in space.ids]
+        else:
+            size = self.result_size(space, request.get("limit", 50))
+            keys = [str(i) for i in range(size)]
+        documents = [space.document(key, fields, vector_value) for key in keys]
+        return success({"total": len(documents), "documents": documents})
+
+    def search(self, space: MockSpace, request: dict):
+        start = time.time()
+        fields = request.get("fields")
+        vector_value = request.get("vector_value", False)
+        vector = request["vectors"][0]
+        dimension = space.dimension(vector["field"])
+        nq = len(vector["feature"]) // dimension if dimension > 0 else 1
+        size = self.result_size(space, request.get("limit", 50))
+        documents = []
+        for _ in range(nq):
+            result = []
+            for i in range(size):
+                document = space.document(
+                    str(random.randrange(max(len(space.ids), 1))), fields, vector_value
+                )
+                document["_score"] = float(i)
+                result.append(document)
+            documents.append(result)
+        data = {"documents": documents}
+        query = parse_qs(urlparse(self.path).query)
+        if query.get("trace", [""])[0] == "true":
+            # the keys of traceResponse of router, the service and every
+            # partition cost the delay of this request and the time spent
+            # generating results, the other phases are free
+            service = (time.time() - start) * 1000 + self.delay
+            data["trace"] = {
+                "parse": 0.0,
+                "getSpace": 0.0,
+                "service": service,
+                "serialize": 0.0,
+                "total": service,
+                "searchPartitions": service,
+                "searchExecute": service,
+                "mergeAndSort": 0.0,
+            }
+            for i in range(space.partition_num):
+                data["trace"]["rpcExecute_%d" % (i + 1)] = service
+                data["trace"]["storeSearch_%d" % (i + 1)] = service
+        return success(data)
+
+
+def start(args: argparse.Namespace):
+    """start a mock router in a thread, call shutdown of the returned server"""
+    server = MockRouter((args.host, args.port), args)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    logger.setLevel(args.log_level)
+    formatter = logging.Formatter(
+        "%(asctime)s %(name)s:%(lineno)s %(levelname)s %(message)s"
+    )
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+    server = MockRouter((args.host, args.port), args)
+    logger.info("mock router listening on %s:%d" % (args.host, args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
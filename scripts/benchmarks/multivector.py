@@ -0,0 +1,310 @@
+#
+# Copyright 2019 The Vearch Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+# -*- coding: UTF-8 -*-
+
+import json
+import time
+import argparse
+import numpy as np
+
+import restful
+import groundtruth
+from groundtruth import cached_groundtruth
+from utils import (
+    parse_arguments,
+    get_dataset_by_name,
+    evaluate_search,
+    LatencyHistogram,
+    setup_logger,
+    start_record,
+)
+
+
+__description__ = """ multi vector benchmark, spaces have several vector
+fields searched together and fused by WeightedRanker, the number of fields
+and the weights are swept, recall is evaluated against exact ground truth of
+the weighted sum of field distances computed on the client"""
+
+# the other fields are the dataset vectors with noise of this ratio of their
+# standard deviation, correlated as embeddings of one item by several models
+FIELD_NOISE = 0.1
+
+
+def field_name(j: int):
+    # the names of test_module_vector
+    return "field_vector" if j == 0 else "field_vector%d" % (j)
+
+
+def field_vectors(x: np.ndarray, num: int, seed: int):
+    """num fields of x, the first is x itself"""
+    fields = [np.asarray(x, dtype=np.float32)]
+    scale = FIELD_NOISE * float(x.std())
+    for j in range(1, num):
+        noise = np.random.RandomState(seed + j).normal(0, scale, x.shape)
+        fields.append((x + noise).astype(np.float32))
+    return fields
+
+
+def weight_cases(args: argparse.Namespace, num: int):
+    """weight lists for spaces with num vector fields"""
+    if args.ranker_weights != "":
+        return [w for w in json.loads(args.ranker_weights) if len(w) == num]
+    if num == 1:
+        return [[1.0]]
+    # equal as the engine does without ranker, and the first field dominant
+    skewed = [0.8] + [0.2 / (num - 1)] * (num - 1)
+    return [[1.0 / num] * num, skewed]
+
+
+def fused_groundtruth(
+    args: argparse.Namespace, xb_fields: list, xq_fields: list, weights: list
+):
+    """
+    exact top k of sum of weight * field distance, as one search of the
+    concatenated fields: for L2 fields are scaled by sqrt of weights, for
+    inner product only queries are scaled by weights
+    """
+    metric = args.index_params["metric_type"]
+    if metric == "L2":
+        if min(weights) < 0:
+            ex = Exception("L2 ranker weights should be non negative: %s" % (weights))
+            raise ex
+        scales = np.sqrt(weights)
+        xb = np.hstack([x * s for x, s in zip(xb_fields, scales)])
+    else:
+        scales = np.asarray(weights, dtype=np.float32)
+        xb = np.hstack(xb_fields)
+    xq = np.hstack([x * s for x, s in zip(xq_fields, scales)])
+    gt, _ = cached_groundtruth(xb, xq, args.limit, metric)
+    return gt
+
+
+def create_db_and_space(args: argparse.Namespace, num: int):
+    fields = [{"name": "field_int", "type": "integer"}]
+    for j in range(num):
+        field = {
+            "name": field_name(j),
+            "type": "vector",
+            "index": {
+                "name": "gamma_%d" % (j),
+                "type": args.index_type,
+                "params": args.index_params,
+            },
+            "dimension": args.dimension,
+        }
+        # the engine picks the store type of the index type when it isn't sent
+        if args.store_type != "":
+            field["store_type"] = args.store_type
+        fields.append(field)
+    space_config = {
+        "name": args.space,
+        "partition_num": args.partition_num,
+        "replica_num": args.replica_num,
+        "fields": fields,
+    }
+    response = restful.create_db(args)
+    if response.json()["code"] != 0:
+        logger.error(response.text)
+    assert response.json()["code"] == 0
+
+    response = restful.create_space(args, space_config)
+    if response.json()["code"] != 0:
+        logger.error(response.text)
+    assert response.json()["code"] == 0
+
+
+def process_upsert_data(items: tuple):
+    args, index, fields = items
+    data = {}
+    data["db_name"] = args.db
+    data["space_name"] = args.space
+    data["documents"] = []
+    for j in range(len(fields[0])):
+        key = index * args.batch_size + j
+        document = {"_id": str(key), "field_int": key}
+        for i, features in enumerate(fields):
+            document[field_name(i)] = features[j]
+        data["documents"].append(document)
+
+    histogram = LatencyHistogram()
+    rs, latency, end = restful.post(args, args.url + "/document/upsert", data)
+    ok = rs is not None and rs["data"]["total"] == len(fields[0])
+    histogram.record(latency, end, error=not ok)
+    return histogram
+
+
+def upsert(args: argparse.Namespace, xb_fields: list):
+    pool = restful.worker_pool(args)
+    total_data = []
+    for i in range(0, args.nb, args.batch_size):
+        total_data.append(
+            (
+                args,
+                i // args.batch_size,
+                [x[i : i + args.batch_size].tolist() for x in xb_fields],
+            )
+        )
+
+    start = time.time()
+    results = restful.pool_map(args, pool, process_upsert_data, total_data)
+    pool.close()
+    pool.join()
+    end = time.time()
+
+    logger.info(
+        "nb: %d, vector fields: %d, batch size:%d, upsert cost: %.4f seconds, QPS: %.4f, pool size: %d"
+        % (
+            args.nb,
+            len(xb_fields),
+            args.batch_size,
+            end - start,
+            args.nb / (end - start),
+            args.pool_size,
+        )
+    )
+    restful.log_latency(
+        "%d fields upsert" % (len(xb_fields)),
+        LatencyHistogram.merge_all(results),
+        qps=args.nb / (end - start),
+    )
+
+
+def process_search_data(items: tuple):
+    args, index, features, weights = items
+    data = {}
+    data["db_name"] = args.db
+    data["space_name"] = args.space
+    data["vectors"] = [
+        {"field": field_name(j), "feature": feature}
+        for j, feature in enumerate(features)
+    ]
+    if len(features) > 1:
+        data["ranker"] = {"type": "WeightedRanker", "params": weights}
+    data["limit"] = args.limit
+    if args.search_params:
+        data["index_params"] = args.search_params
+
+    histogram = LatencyHistogram()
+    rs, latency, end = restful.post(
+        args, args.url + "/document/search?timeout=1000000", data
+    )
+    histogram.record(latency, end, error=rs is None)
+    if rs is None:
+        return index, None, histogram
+    return index, [int(d["_id"]) for d in rs["data"]["documents"][0]], histogram
+
+
+def search(
+    args: argparse.Namespace, xq_fields: list, gt: np.ndarray, weights: list
+):
+    pool = restful.worker_pool(args)
+    total_data = [
+        (args, i, [x[i].tolist() for x in xq_fields], weights)
+        for i in range(args.nq)
+    ]
+
+    start = time.time()
+    results = restful.pool_map(args, pool, process_search_data, total_data)
+    pool.close()
+    pool.join()
+    end = time.time()
+
+    recalls = {}
+    metrics = {}
+    recall_str = ""
+    if gt is not None:
+        # failed queries stay -1, fused results may be short as only
+        # documents in top limit of every field are fused
+        search_results = np.full((args.nq, args.limit), -1, dtype=np.int64)
+        for index, ids, _ in results:
+            if ids is not None:
+                search_results[index][: len(ids)] = ids[: args.limit]
+        recalls, metrics, recall_str = evaluate_search(search_results, gt, args.limit)
+        returned = (search_results >= 0).sum(axis=1).mean()
+        recall_str += "mean results: %.2f, " % (returned)
+
+    logger.info(
+        "index type: %s, vector fields: %d, weights: %s, nq: %d, search cost: %.4f seconds, QPS: %.4f, %spool size: %d"
+        % (
+            args.index_type,
+            len(xq_fields),
+            weights,
+            args.nq,
+            end - start,
+            args.nq / (end - start),
+            recall_str,
+            args.pool_size,
+        )
+    )
+    restful.log_latency(
+        "%d fields search" % (len(xq_fields)),
+        LatencyHistogram.merge_all(result[2] for result in results),
+        qps=args.nq / (end - start),
+        weights=weights,
+        recall=recalls,
+        knn_recall=metrics.get("recall", {}),
+        ndcg=metrics.get("ndcg", {}),
+        mrr=metrics.get("mrr"),
+    )
+
+
+def run_multivector(args: argparse.Namespace):
+    xb, xq, _ = get_dataset_by_name(logger, args)
+    xb = xb[: args.nb]
+    xq = xq[: args.nq]
+
+    args_str = ", ".join(f"{key}={value}" for key, value in vars(args).items())
+    logger.info(f"args: {args_str}")
+
+    for num in [int(n) for n in args.vector_fields.split(",")]:
+        cases = weight_cases(args, num)
+        if len(cases) == 0:
+            logger.warning("no ranker weights for %d vector fields" % (num))
+            continue
+
+        xb_fields = field_vectors(xb, num, 0)
+        xq_fields = field_vectors(xq, num, 1000)
+        create_db_and_space(args, num)
+        upsert(args, xb_fields)
+        if args.waiting_index:
+            restful.train_and_build_index(args)
+
+        batch_size = args.batch_size
+        args.batch_size = 1
+        for weights in cases:
+            gt = None
+            if args.recall:
+                gt = fused_groundtruth(args, xb_fields, xq_fields, weights)
+            search(args, xq_fields, gt, weights)
+        args.batch_size = batch_size
+
+        if not args.keep_space:
+            restful.destroy(args)
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    logger = setup_logger(args)
+    restful.logger = logger
+    groundtruth.logger = logger
+    record = start_record(args, "multivector")
+
+    run_multivector(args)
+
+    fname = record.save()
+    if fname is not None:
+        logger.info("result saved to %s" % (fname))
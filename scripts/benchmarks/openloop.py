@@ -0,0 +1,270 @@
+#
+# Copyright 2019 The Vearch Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+# -*- coding: UTF-8 -*-
+
+import asyncio
+import itertools
+import json
+import time
+import argparse
+import numpy as np
+
+import restful
+from utils import (
+    parse_arguments,
+    get_dataset_by_name,
+    LatencyHistogram,
+    setup_logger,
+    start_record,
+)
+
+
+__description__ = """ open loop benchmark, requests are sent at a target rate
+whether or not the previous ones returned, latency is measured from the time
+a request should be sent, so a slow server can't hide its queueing delay, the
+lag of sending behind the schedule is measured too, so a saturated client is
+not taken for a slow server"""
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def search_payloads(args: argparse.Namespace, xq: np.ndarray):
+    """the payload of the i-th request, queries are cycled"""
+    payloads = []
+    for i in range(xq.shape[0]):
+        data = {}
+        data["db_name"] = args.db
+        data["space_name"] = args.space
+        data["vectors"] = [{"field": "field_vector", "feature": xq[i].tolist()}]
+        data["limit"] = args.limit
+        payloads.append(json.dumps(data).encode())
+    return lambda i: payloads[i % len(payloads)]
+
+
+def upsert_payloads(args: argparse.Namespace, num: int = 100):
+    """
+    the payload of the next request, a batch of new documents, ids grow from
+    nb so every request inserts and the dataset is kept, vectors of num
+    batches are encoded once and reused so the loop only formats ids
+    """
+    vectors = [
+        [json.dumps(v) for v in np.random.rand(args.batch_size, args.dimension).tolist()]
+        for _ in range(num)
+    ]
+    prefix = '{"db_name": %s, "space_name": %s, "documents": [' % (
+        json.dumps(args.db),
+        json.dumps(args.space),
+    )
+    document = (
+        '{"_id": "%d", "field_int": %d, "field_long": %d, "field_float": %d.0, '
+        '"field_double": %d.0, "field_string": "%d", "field_vector": %s}'
+    )
+    batches = itertools.count()
+
+    def payload(i: int):
+        batch = next(batches)
+        documents = []
+        for j, vector in enumerate(vectors[batch % num]):
+            key = args.nb + batch * args.batch_size + j
+            documents.append(document % ((key,) * 6 + (vector,)))
+        return (prefix + ", ".join(documents) + "]}").encode()
+
+    return payload
+
+
+async def send(
+    session,
+    url: str,
+    payload: bytes,
+    intended: float,
+    histogram: LatencyHistogram,
+    lag: LatencyHistogram,
+):
+    import aiohttp
+
+    ok = False
+    lag.record(max(time.time() - intended, 0))
+    try:
+        async with session.post(url, data=payload, headers=JSON_HEADERS) as resp:
+            body = await resp.read()
+        ok = resp.status == 200 and json.loads(body)["code"] == 0
+        if not ok:
+            logger.debug(body)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        logger.debug(e)
+    end = time.time()
+    histogram.record(end - intended, end, error=not ok)
+
+
+async def run_rate(
+    args: argparse.Namespace,
+    session,
+    url: str,
+    payload,
+    rate: float,
+):
+    """
+    send requests at rate for args.duration seconds, return the latency
+    histogram and whether the client fell behind the schedule by more than
+    --max-send-lag at p99, then latencies include the lag of the client
+    """
+    histogram = LatencyHistogram()
+    lag = LatencyHistogram()
+    total = int(rate * args.duration)
+    start = time.time()
+    tasks = []
+    for i in range(total):
+        intended = start + i / rate
+        delay = intended - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(
+            asyncio.ensure_future(
+                send(session, url, payload(i), intended, histogram, lag)
+            )
+        )
+    await asyncio.gather(*tasks)
+    elapsed = time.time() - start
+    send_lag = lag.summary()
+    saturated = send_lag["p99"] > args.max_send_lag
+
+    logger.info(
+        "%s rate: %.1f, sent: %d, cost: %.4f seconds, QPS: %.4f, %s"
+        % (
+            args.operation,
+            rate,
+            total,
+            elapsed,
+            histogram.count / elapsed,
+            histogram.report(),
+        )
+    )
+    logger.info("send lag: %s" % (lag.report()))
+    if saturated:
+        logger.warning(
+            "client saturated at rate %.1f, p99 send lag %.2f ms > %.2f ms, "
+            "latencies include the lag of the client"
+            % (rate, send_lag["p99"], args.max_send_lag)
+        )
+    logger.debug("throughput per second: %s" % (histogram.throughput_series()))
+    restful.add_record(
+        "%s rate %.1f" % (args.operation, rate),
+        histogram,
+        qps=histogram.count / elapsed,
+        rate=rate,
+        send_lag=send_lag,
+        client_saturated=saturated,
+    )
+    return histogram, saturated
+
+
+def meet_slo(args: argparse.Namespace, histogram: LatencyHistogram):
+    summary = histogram.summary()
+    total = summary["count"] + summary["errors"]
+    return summary["p99"] <= args.slo_p99 and summary["errors"] <= 0.01 * total
+
+
+async def run_open_loop(args: argparse.Namespace, payload):
+    if args.operation == "search":
+        url = args.url + "/document/search?timeout=1000000"
+    else:
+        url = args.url + "/document/upsert"
+    rates = [args.rate]
+    while args.ramp_to > rates[-1]:
+        rates.append(min(rates[-1] + args.ramp_step, args.ramp_to))
+
+    # imported here, so --help works without it
+    import aiohttp
+
+    good, bad, saturated_rate = 0, 0, 0
+    # no connection limit, otherwise requests queue in the client
+    connector = aiohttp.TCPConnector(limit=0)
+    auth = aiohttp.BasicAuth(args.user, args.password)
+    async with aiohttp.ClientSession(connector=connector, auth=auth) as session:
+        for rate in rates:
+            histogram, saturated = await run_rate(args, session, url, payload, rate)
+            if saturated:
+                # higher rates measure the client, not the server
+                saturated_rate = rate
+                break
+            if not meet_slo(args, histogram):
+                bad = rate
+                break
+            good = rate
+
+        if len(rates) > 1 and good > 0 and bad > 0:
+            for _ in range(args.bisect):
+                rate = (good + bad) / 2
+                histogram, saturated = await run_rate(
+                    args, session, url, payload, rate
+                )
+                if saturated:
+                    saturated_rate = rate
+                    break
+                if meet_slo(args, histogram):
+                    good = rate
+                else:
+                    bad = rate
+
+    if len(rates) > 1:
+        restful.add_record(
+            "max sustainable rate",
+            rate=good,
+            slo_p99=args.slo_p99,
+            client_saturated_rate=saturated_rate,
+        )
+        if saturated_rate > 0:
+            note = ", the client saturated at rate %.1f" % (saturated_rate)
+        elif bad == 0:
+            note = ", SLO is met at all rates"
+        else:
+            note = ""
+        logger.info(
+            "max sustainable rate: %.1f, p99 SLO: %.1f ms%s"
+            % (good, args.slo_p99, note)
+        )
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    logger = setup_logger(args)
+    restful.logger = logger
+    record = start_record(args, "openloop")
+
+    xb, xq, gt = get_dataset_by_name(logger, args)
+
+    args_str = ", ".join(f"{key}={value}" for key, value in vars(args).items())
+    logger.info(f"args: {args_str}")
+
+    if args.prepare:
+        restful.create_db_and_space(args)
+        restful.upsert(args, xb)
+        if args.waiting_index:
+            restful.train_and_build_index(args)
+
+    if args.operation == "search":
+        payload = search_payloads(args, xq)
+    else:
+        payload = upsert_payloads(args)
+    asyncio.run(run_open_loop(args, payload))
+
+    if args.prepare and not args.keep_space:
+        restful.destroy(args)
+
+    fname = record.save()
+    if fname is not None:
+        logger.info("result saved to %s" % (fname))
@@ -17,11 +17,9 @@
 
 
 from concurrent.futures import ThreadPoolExecutor
-import logging
 import time
 import random
 import json
-import sys
 import numpy as np
 import argparse
 import math
@@ -38,7 +36,19 @@ from vearch.schema.index import (
     IvfPQIndex,
 )
 
-from utils import parse_arguments, get_dataset_by_name, evaluate
+from metrics import to_ids
+from utils import (
+    parse_arguments,
+    get_dataset_by_name,
+    evaluate_search,
+    LatencyHistogram,
+    setup_logger,
+    start_record,
+    add_record,
+    log_latency,
+    log_trace,
+    TraceBreakdown,
+)
 
 
 __description__ = """ benchmark for pysdk"""
@@ -177,6 +187,19 @@ def waiting_index_finish(args: argparse.Namespace, timewait: int = 5):
         time.sleep(timewait)
 
 
+def timed_call(func, *args, **kwargs):
+    """call func, return (result or None if raised, latency, end time)"""
+    start = time.time()
+    try:
+        rs = func(*args, **kwargs)
+    except Exception as e:
+        end = time.time()
+        logger.error(e)
+        return None, end - start, end
+    end = time.time()
+    return rs, end - start, end
+
+
 def process_upsert_data(items: tuple):
     args, index, size, features = items
     data = []
@@ -196,13 +219,16 @@ def process_upsert_data(items: tuple):
         param_dict["field_string"] = str(param_dict["field_int"])
         data.append(param_dict)
 
-    rs = vc.upsert(args.db, args.space, data)
-    if rs.code != 0:
+    histogram = LatencyHistogram()
+    rs, latency, end = timed_call(vc.upsert, args.db, args.space, data)
+    if rs is not None and rs.code != 0:
         logger.error(rs.code)
         logger.error(rs.msg)
-    if len(rs.get_document_ids()) != size:
+    ok = rs is not None and len(rs.get_document_ids()) == size
+    if rs is not None and not ok:
         logger.debug(rs.get_document_ids())
-    assert len(rs.get_document_ids()) == size
+    histogram.record(latency, end, error=not ok)
+    return histogram
 
 
 def upsert(args: argparse.Namespace, xb: np.ndarray = None):
@@ -240,7 +266,7 @@ def upsert(args: argparse.Namespace, xb: np.ndarray = None):
 
     start = time.time()
     with ThreadPoolExecutor(max_workers=args.pool_size) as pool:
-        pool.map(process_upsert_data, total_data)
+        results = list(pool.map(process_upsert_data, total_data))
     end = time.time()
 
     _, space, _ = vc.is_space_exist(args.db, args.space)
@@ -255,6 +281,9 @@ def upsert(args: argparse.Namespace, xb: np.ndarray = None):
             args.pool_size,
         )
     )
+    log_latency(
+        "upsert", LatencyHistogram.merge_all(results), qps=total / (end - start)
+    )
 
 
 def get_timewait(args: argparse.Namespace):
@@ -281,6 +310,7 @@ def train_and_build_index(args: argparse.Namespace):
             args.nb / (end - start) if (end - start) >= 0.001 else 0,
         )
     )
+    add_record("train index", cost=end - start)
 
     start = time.time()
     waiting_index_finish(args, timewait)
@@ -295,17 +325,21 @@ def train_and_build_index(args: argparse.Namespace):
             args.nb / (end - start) if (end - start) >= 0.001 else 0,
         )
     )
+    add_record("build index", cost=end - start)
 
 
 def process_query_data(items: tuple):
     args, unique_keys = items
-    rs = vc.query(
-        args.db, args.space, document_ids=unique_keys, vector=args.vector_value
+    histogram = LatencyHistogram()
+    rs, latency, end = timed_call(
+        vc.query, args.db, args.space, document_ids=unique_keys, vector=args.vector_value
     )
 
-    if len(rs.documents) != args.batch_size:
+    ok = rs is not None and len(rs.documents) == args.batch_size
+    if rs is not None and not ok:
         logger.debug(rs.documents)
-    assert len(rs.documents) == args.batch_size
+    histogram.record(latency, end, error=not ok)
+    return histogram
 
 
 def query(args: argparse.Namespace):
@@ -321,7 +355,7 @@ def query(args: argparse.Namespace):
 
     start = time.time()
     with ThreadPoolExecutor(max_workers=args.pool_size) as pool:
-        pool.map(process_query_data, total_data)
+        results = list(pool.map(process_query_data, total_data))
     end = time.time()
 
     logger.info(
@@ -335,15 +369,21 @@ def query(args: argparse.Namespace):
             args.vector_value,
         )
     )
+    log_latency(
+        "query", LatencyHistogram.merge_all(results), qps=args.nq / (end - start)
+    )
 
 
 def process_delete_data(items: tuple):
     args, unique_keys = items
-    rs = vc.delete(args.db, args.space, unique_keys)
+    histogram = LatencyHistogram()
+    rs, latency, end = timed_call(vc.delete, args.db, args.space, unique_keys)
 
-    if len(rs.document_ids) != args.batch_size:
+    ok = rs is not None and len(rs.document_ids) == args.batch_size
+    if rs is not None and not ok:
         logger.debug(rs.document_ids)
-    assert len(rs.document_ids) == args.batch_size
+    histogram.record(latency, end, error=not ok)
+    return histogram
 
 
 def delete(args: argparse.Namespace):
@@ -359,7 +399,7 @@ def delete(args: argparse.Namespace):
 
     start = time.time()
     with ThreadPoolExecutor(max_workers=args.pool_size) as pool:
-        pool.map(process_delete_data, total_data)
+        results = list(pool.map(process_delete_data, total_data))
     end = time.time()
 
     logger.info(
@@ -372,28 +412,40 @@ def delete(args: argparse.Namespace):
             args.pool_size,
         )
     )
+    log_latency(
+        "delete", LatencyHistogram.merge_all(results), qps=args.nq / (end - start)
+    )
 
 
 def process_search_data(items: tuple):
     args, index, features = items
     vector_info = VectorInfo("field_vector", features)
-    rs = vc.search(
+    histogram = LatencyHistogram()
+    rs, latency, end = timed_call(
+        vc.search,
         args.db,
         args.space,
         vector_infos=[vector_info],
         vector=args.vector_value,
         limit=args.limit,
+        trace=args.trace,
     )
-    if rs.code != 0:
+    if rs is not None and rs.code != 0:
         logger.error(rs.msg)
-    if len(rs.documents) != args.batch_size:
+    ok = rs is not None and len(rs.documents) == args.batch_size
+    if rs is not None and not ok:
         logger.error(
             "search result length should be %d, but is %d"
             % (args.batch_size, len(rs.documents))
         )
-    assert len(rs.documents) == args.batch_size
+    histogram.record(latency, end, error=not ok)
 
-    return index, rs.documents
+    ids = to_ids(rs.documents, args.limit) if ok else None
+    trace = None
+    if args.trace and ok and rs.trace:
+        trace = TraceBreakdown()
+        trace.add(rs.trace, latency)
+    return index, ids, histogram, trace
 
 
 def search(args: argparse.Namespace, xq: np.ndarray, gt: np.ndarray):
@@ -411,23 +463,23 @@ def search(args: argparse.Namespace, xq: np.ndarray, gt: np.ndarray):
 
     start = time.time()
     with ThreadPoolExecutor(max_workers=args.pool_size) as pool:
-        results = pool.map(process_search_data, total_data)
+        results = list(pool.map(process_search_data, total_data))
     end = time.time()
 
+    recalls = {}
+    metrics = {}
     recall_str = ""
     if args.recall:
-        search_results = np.empty(gt.shape)
-        for result in results:
-            batch_index, documents = result
-            for i in range(len(documents)):
-                for j in range(len(documents[i])):
-                    search_results[i + batch_index * args.batch_size][j] = documents[i][
-                        j
-                    ]["_id"]
-
-        recalls = evaluate(search_results, gt, args.limit)
-        for recall in recalls:
-            recall_str += "Recall@" + str(recall) + "=" + str(recalls[recall]) + ", "
+        # failed batches stay -1
+        search_results = np.full((gt.shape[0], args.limit), -1, dtype=np.int64)
+        for batch_index, ids, _, _ in results:
+            if ids is not None:
+                start_row = batch_index * args.batch_size
+                search_results[start_row : start_row + len(ids)] = ids
+
+        recalls, metrics, recall_str = evaluate_search(
+            search_results, gt, args.limit
+        )
 
     logger.info(
         "nq: %d, batch size:%d, search cost: %.4f seconds, QPS: %.4f, %spool size: %d"
@@ -440,6 +492,18 @@ def search(args: argparse.Namespace, xq: np.ndarray, gt: np.ndarray):
             args.pool_size,
         )
     )
+    log_latency(
+        "search",
+        LatencyHistogram.merge_all(result[2] for result in results),
+        qps=args.nq / (end - start),
+        recall=recalls,
+        knn_recall=metrics.get("recall", {}),
+        ndcg=metrics.get("ndcg", {}),
+        mrr=metrics.get("mrr"),
+    )
+    if args.trace:
+        breakdown = TraceBreakdown.merge_all(result[3] for result in results)
+        log_trace("search", breakdown)
 
 
 def run_normal(args: argparse.Namespace):
@@ -566,19 +630,12 @@ def run_task(args: argparse.Namespace):
 if __name__ == "__main__":
     args = parse_arguments()
 
-    logger = logging.getLogger(__name__)
-    logger.setLevel(args.log_level)
-    formatter = logging.Formatter(
-        "%(asctime)s %(name)s:%(lineno)s %(levelname)s %(message)s"
-    )
-    if args.output != "":
-        handler = logging.FileHandler(args.output, "a")
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-    else:
-        handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    logger = setup_logger(args)
 
     vc = create_vearch_client(args)
+    record = start_record(args, "pysdk")
     run_task(args)
+
+    fname = record.save()
+    if fname is not None:
+        logger.info("result saved to %s" % (fname))
@@ -17,19 +17,46 @@
 
 import requests
 import random
+import json
+from concurrent.futures import ThreadPoolExecutor
 from multiprocessing import Pool
-import logging
+import asyncio
+import threading
 import time
-import sys
 import argparse
 import numpy as np
 import math
 
-from utils import parse_arguments, get_dataset_by_name, evaluate, load_config
+from utils import (
+    parse_arguments,
+    get_dataset_by_name,
+    evaluate_search,
+    load_config,
+    LatencyHistogram,
+    setup_logger,
+    start_record,
+    add_record,
+    log_latency,
+    log_trace,
+    ClientCpu,
+    TraceBreakdown,
+)
+from metrics import to_ids
 
 
 __description__ = """ benchmark for restful api"""
 
+JSON_HEADERS = {"Content-Type": "application/json"}
+# bytes of json payloads encoded ahead of the requests sending them
+ENCODE_BUDGET = 2**28
+
+# connections of the process, reset by init_worker in every worker process
+# so a forked worker doesn't share sockets of its parent
+sessions = threading.local()
+executor = None
+event_loop = None
+aio_session = None
+
 
 def create_db(args: argparse.Namespace):
     url = f"{args.url}/dbs/" + args.db
@@ -111,6 +138,9 @@ def create_db_and_space(args: argparse.Namespace):
                 "dimension": args.dimension,
             },
         ]
+    # the engine picks the store type of the index type when it isn't sent
+    if args.store_type != "":
+        properties["fields"][-1]["store_type"] = args.store_type
 
     space_config = {
         "name": args.space,
@@ -160,9 +190,203 @@ def waiting_index_finish(args: argparse.Namespace, timewait: int = 5):
         time.sleep(timewait)
 
 
-def process_upsert_data(items: tuple):
+def max_connections(args: argparse.Namespace):
+    return args.connections if args.connections > 0 else max(args.concurrency, 1)
+
+
+def new_session(args: argparse.Namespace):
+    session = requests.Session()
+    session.auth = (args.user, args.password)
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=1, pool_maxsize=max_connections(args)
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not args.keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def get_session(args: argparse.Namespace):
+    """the session of the calling thread, sessions aren't thread safe"""
+    session = getattr(sessions, "session", None)
+    if session is None:
+        session = new_session(args)
+        sessions.session = session
+    return session
+
+
+async def new_aio_session(args: argparse.Namespace):
+    # aiohttp is only needed by the aiohttp transport
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(
+        limit=max_connections(args), force_close=not args.keep_alive
+    )
+    return aiohttp.ClientSession(
+        connector=connector, auth=aiohttp.BasicAuth(args.user, args.password)
+    )
+
+
+def start_event_loop(args: argparse.Namespace):
+    global event_loop, aio_session
+    event_loop = asyncio.new_event_loop()
+    threading.Thread(target=event_loop.run_forever, daemon=True).start()
+    aio_session = asyncio.run_coroutine_threadsafe(
+        new_aio_session(args), event_loop
+    ).result()
+
+
+def init_worker(args: argparse.Namespace):
+    """initializer of pool processes, connections are kept for all tasks"""
+    global sessions, executor, event_loop, aio_session
+    sessions = threading.local()
+    event_loop = None
+    aio_session = None
+    executor = None
+    if args.concurrency > 1:
+        executor = ThreadPoolExecutor(max_workers=args.concurrency)
+    if args.transport == "aiohttp":
+        start_event_loop(args)
+    else:
+        get_session(args)
+
+
+def worker_pool(args: argparse.Namespace):
+    return Pool(args.pool_size, initializer=init_worker, initargs=(args,))
+
+
+def run_concurrent(items: tuple):
+    func, chunk = items
+    return list(executor.map(func, chunk))
+
+
+def pool_map(args: argparse.Namespace, pool: Pool, func, total_data: list):
+    """
+    pool.map of func, with --concurrency tasks in flight in every process,
+    results are in the order of total_data
+    """
+    if args.concurrency <= 1:
+        return pool.map(func, total_data)
+    # a few chunks of every process, so processes share the tasks evenly
+    size = math.ceil(len(total_data) / args.pool_size)
+    size = max(1, min(args.concurrency * 4, size))
+    chunks = [
+        (func, total_data[i : i + size]) for i in range(0, len(total_data), size)
+    ]
+    results = pool.map(run_concurrent, chunks)
+    return [result for chunk in results for result in chunk]
+
+
+async def aio_post(url: str, data):
+    import aiohttp
+
+    start = time.time()
+    try:
+        if isinstance(data, bytes):
+            response = aio_session.post(url, data=data, headers=JSON_HEADERS)
+        else:
+            response = aio_session.post(url, json=data)
+        async with response as rs:
+            text = await rs.text()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        end = time.time()
+        logger.error(e)
+        return None, end - start, end
+    end = time.time()
+    try:
+        result = json.loads(text)
+    except ValueError:
+        result = None
+    if result is None or result["code"] != 0:
+        logger.error(text)
+        return None, end - start, end
+    return result, end - start, end
+
+
+def post(args: argparse.Namespace, url: str, data):
+    """
+    post data, a dict or encoded json bytes, by the session of the process,
+    return (response json or None if failed, latency, end time)
+    """
+    if args.transport == "aiohttp":
+        if event_loop is None:
+            start_event_loop(args)
+        future = asyncio.run_coroutine_threadsafe(aio_post(url, data), event_loop)
+        return future.result()
+
+    session = get_session(args)
+    start = time.time()
+    try:
+        if isinstance(data, bytes):
+            rs = session.post(url, data=data, headers=JSON_HEADERS)
+        else:
+            rs = session.post(url, json=data)
+    except requests.RequestException as e:
+        end = time.time()
+        logger.error(e)
+        return None, end - start, end
+    end = time.time()
+    try:
+        result = rs.json()
+    except ValueError:
+        result = None
+    if result is None or result["code"] != 0:
+        logger.error(rs.text)
+        return None, end - start, end
+    return result, end - start, end
+
+
+def encode_windows(args: argparse.Namespace, func, total_data: list):
+    """
+    yield request bodies of total_data encoded to json bytes by windows, by a
+    pool of its own, so workers sending requests only do I/O, the next window
+    is encoded while the current one is sent, at most two windows of about
+    ENCODE_BUDGET bytes each are held in memory
+    """
+    # a float is about 20 bytes of json
+    batch_bytes = max(args.batch_size * args.dimension * 20, 1)
+    window = max(args.pool_size * max(args.concurrency, 1), ENCODE_BUDGET // batch_bytes)
+    pool = Pool(args.pool_size)
+    try:
+        pending = pool.map_async(func, total_data[:window])
+        for begin in range(window, len(total_data) + window, window):
+            payloads = pending.get()
+            if begin < len(total_data):
+                pending = pool.map_async(func, total_data[begin : begin + window])
+            yield payloads
+    finally:
+        pool.close()
+        pool.join()
+
+
+def log_client_cpu(
+    args: argparse.Namespace, operate: str, cpu: ClientCpu, encoders: int = 0
+):
+    usage = cpu.stop(args.pool_size, encoders)
+    logger.info(
+        "%s client cpu: main %.2f cores, workers %.2f cores, %.1f%% of %d cores"
+        % (
+            operate,
+            usage["main"],
+            usage["workers"],
+            usage["saturation"] * 100,
+            usage["cores"],
+        )
+    )
+    if usage["saturation"] >= 0.9 or usage["main"] >= 0.9:
+        logger.warning(
+            "%s client cpu is saturated, the result may measure the client, "
+            "try a smaller pool size or more client machines" % (operate)
+        )
+    return usage
+
+
+def encode_upsert_data(items: tuple):
     args, index, size, features = items
-    url = args.url + "/document/upsert"
+    if features is None:
+        # seeded by batch, forked workers share the same random state
+        features = np.random.RandomState(index).rand(size, args.dimension)
     data = {}
     data["db_name"] = args.db
     data["space_name"] = args.space
@@ -171,28 +395,29 @@ def process_upsert_data(items: tuple):
         param_dict = {}
         param_dict["_id"] = str(index * args.batch_size + j)
         param_dict["field_int"] = index * args.batch_size + j
-        if features is not None:
-            param_dict["field_vector"] = features[j]
-        else:
-            param_dict["field_vector"] = [
-                random.uniform(0, 1) for _ in range(args.dimension)
-            ]
+        param_dict["field_vector"] = features[j].tolist()
         param_dict["field_long"] = param_dict["field_int"]
         param_dict["field_float"] = float(param_dict["field_int"])
         param_dict["field_double"] = float(param_dict["field_int"])
         param_dict["field_string"] = str(param_dict["field_int"])
         data["documents"].append(param_dict)
+    return args, size, json.dumps(data).encode()
+
 
-    rs = requests.post(url, auth=(args.user, args.password), json=data)
-    if rs.json()["code"] != 0:
-        logger.error(rs.json())
-    if rs.json()["data"]["total"] != size:
-        logger.debug(rs.json())
-    assert rs.json()["data"]["total"] == size
+def process_upsert_data(items: tuple):
+    args, size, payload = items
+    url = args.url + "/document/upsert"
+
+    histogram = LatencyHistogram()
+    rs, latency, end = post(args, url, payload)
+    ok = rs is not None and rs["data"]["total"] == size
+    if rs is not None and not ok:
+        logger.error(rs)
+    histogram.record(latency, end, error=not ok)
+    return histogram
 
 
 def upsert(args: argparse.Namespace, xb: np.ndarray = None):
-    pool = Pool(args.pool_size)
     total_data = []
     total_batch = int(args.nb / args.batch_size)
 
@@ -203,7 +428,7 @@ def upsert(args: argparse.Namespace, xb: np.ndarray = None):
                     args,
                     i,
                     args.batch_size,
-                    xb[i * args.batch_size : (i + 1) * args.batch_size].tolist(),
+                    xb[i * args.batch_size : (i + 1) * args.batch_size],
                 )
             )
 
@@ -214,7 +439,7 @@ def upsert(args: argparse.Namespace, xb: np.ndarray = None):
                     args,
                     total_batch,
                     remain,
-                    xb[total_batch * args.batch_size :].tolist(),
+                    xb[total_batch * args.batch_size :],
                 )
             )
     else:
@@ -224,12 +449,21 @@ def upsert(args: argparse.Namespace, xb: np.ndarray = None):
         remain = args.nb % args.batch_size
         if remain != 0:
             total_data.append((args, total_batch, remain, None))
+    # cpu of the encode pool is counted, it is joined when windows run out
+    cpu = ClientCpu()
+    windows = encode_windows(args, encode_upsert_data, total_data)
+    # the first window is encoded before the timed region
+    first = next(windows)
 
+    pool = worker_pool(args)
     start = time.time()
-    results = pool.map(process_upsert_data, total_data)
+    results = pool_map(args, pool, process_upsert_data, first)
+    for payloads in windows:
+        results.extend(pool_map(args, pool, process_upsert_data, payloads))
     pool.close()
     pool.join()
     end = time.time()
+    usage = log_client_cpu(args, "upsert", cpu, encoders=args.pool_size)
 
     total = get_space(args).json()["data"]["doc_num"]
     logger.info(
@@ -242,6 +476,12 @@ def upsert(args: argparse.Namespace, xb: np.ndarray = None):
             args.pool_size,
         )
     )
+    log_latency(
+        "upsert",
+        LatencyHistogram.merge_all(results),
+        qps=total / (end - start),
+        client_cpu=usage,
+    )
 
 
 def get_timewait(args: argparse.Namespace):
@@ -268,6 +508,7 @@ def train_and_build_index(args: argparse.Namespace):
             args.nb / (end - start) if (end - start) >= 0.001 else 0,
         )
     )
+    add_record("train index", cost=end - start)
 
     start = time.time()
     waiting_index_finish(args, timewait)
@@ -282,42 +523,49 @@ def train_and_build_index(args: argparse.Namespace):
             args.nb / (end - start) if (end - start) >= 0.001 else 0,
         )
     )
+    add_record("build index", cost=end - start)
 
 
-def process_query_data(items: tuple):
-    args, unique_keys = items
-    url = args.url + "/document/query"
+def encode_query_data(args: argparse.Namespace, unique_keys: list):
     data = {}
     data["db_name"] = args.db
     data["space_name"] = args.space
     data["document_ids"] = unique_keys
     data["vector_value"] = args.vector_value
+    return json.dumps(data).encode()
+
+
+def process_query_data(items: tuple):
+    args, payload = items
+    url = args.url + "/document/query"
 
-    rs = requests.post(url, auth=(args.user, args.password), json=data)
-    if rs.json()["code"] != 0:
-        logger.error(rs.json())
-    if len(rs.json()["data"]["documents"]) != args.batch_size:
-        logger.debug(rs.json())
-    assert len(rs.json()["data"]["documents"]) == args.batch_size
+    histogram = LatencyHistogram()
+    rs, latency, end = post(args, url, payload)
+    ok = rs is not None and len(rs["data"]["documents"]) == args.batch_size
+    if rs is not None and not ok:
+        logger.error(rs)
+    histogram.record(latency, end, error=not ok)
+    return histogram
 
 
 def query(args: argparse.Namespace):
-    pool = Pool(args.pool_size)
     total_data = []
     # There may be some left, but won't deal with it
     total_batch = int(args.nq / args.batch_size)
     unique_ids = random.sample(range(0, args.nb), args.nq)
     unique_keys = [str(i) for i in unique_ids]
     for i in range(total_batch):
-        total_data.append(
-            (args, unique_keys[i * args.batch_size : (i + 1) * args.batch_size])
-        )
+        keys = unique_keys[i * args.batch_size : (i + 1) * args.batch_size]
+        total_data.append((args, encode_query_data(args, keys)))
 
+    pool = worker_pool(args)
+    cpu = ClientCpu()
     start = time.time()
-    results = pool.map(process_query_data, total_data)
+    results = pool_map(args, pool, process_query_data, total_data)
     pool.close()
     pool.join()
     end = time.time()
+    usage = log_client_cpu(args, "query", cpu)
 
     logger.info(
         "nq: %d, batch size:%d, query cost: %.4f seconds, QPS: %.4f, pool size: %d, vector value: %d"
@@ -330,41 +578,53 @@ def query(args: argparse.Namespace):
             args.vector_value,
         )
     )
+    log_latency(
+        "query",
+        LatencyHistogram.merge_all(results),
+        qps=args.nq / (end - start),
+        client_cpu=usage,
+    )
 
 
-def process_delete_data(items: tuple):
-    args, unique_keys = items
-    url = args.url + "/document/delete"
+def encode_delete_data(args: argparse.Namespace, unique_keys: list):
     data = {}
     data["db_name"] = args.db
     data["space_name"] = args.space
     data["document_ids"] = unique_keys
+    return json.dumps(data).encode()
 
-    rs = requests.post(url, auth=(args.user, args.password), json=data)
-    if rs.json()["code"] != 0:
-        logger.error(rs.json())
-    if rs.json()["data"]["total"] != args.batch_size:
-        logger.error(rs.json())
-    assert rs.json()["data"]["total"] == args.batch_size
+
+def process_delete_data(items: tuple):
+    args, payload = items
+    url = args.url + "/document/delete"
+
+    histogram = LatencyHistogram()
+    rs, latency, end = post(args, url, payload)
+    ok = rs is not None and rs["data"]["total"] == args.batch_size
+    if rs is not None and not ok:
+        logger.error(rs)
+    histogram.record(latency, end, error=not ok)
+    return histogram
 
 
 def delete(args: argparse.Namespace):
-    pool = Pool(args.pool_size)
     total_data = []
     # There may be some left, but won't deal with it
     total_batch = int(args.nq / args.batch_size)
     unique_ids = random.sample(range(0, args.nb), args.nq)
     unique_keys = [str(i) for i in unique_ids]
     for i in range(total_batch):
-        total_data.append(
-            (args, unique_keys[i * args.batch_size : (i + 1) * args.batch_size])
-        )
+        keys = unique_keys[i * args.batch_size : (i + 1) * args.batch_size]
+        total_data.append((args, encode_delete_data(args, keys)))
 
+    pool = worker_pool(args)
+    cpu = ClientCpu()
     start = time.time()
-    results = pool.map(process_delete_data, total_data)
+    results = pool_map(args, pool, process_delete_data, total_data)
     pool.close()
     pool.join()
     end = time.time()
+    usage = log_client_cpu(args, "delete", cpu)
 
     logger.info(
         "nq: %d, batch size:%d, delete cost: %.4f seconds, QPS: %.4f, pool size: %d"
@@ -376,65 +636,86 @@ def delete(args: argparse.Namespace):
             args.pool_size,
         )
     )
+    log_latency(
+        "delete",
+        LatencyHistogram.merge_all(results),
+        qps=args.nq / (end - start),
+        client_cpu=usage,
+    )
 
 
-def process_search_data(items: tuple):
-    args, index, features = items
-    url = args.url + "/document/search?timeout=1000000"
-    if args.trace:
-        url = args.url + "/document/search?timeout=1000000&trace=true"
+def encode_search_data(args: argparse.Namespace, features: list):
     data = {}
     data["db_name"] = args.db
     data["space_name"] = args.space
     data["vectors"] = [{"field": "field_vector", "feature": features}]
     data["limit"] = args.limit
+    if args.search_params:
+        data["index_params"] = args.search_params
+    return json.dumps(data).encode()
+
 
-    rs = requests.post(url, auth=(args.user, args.password), json=data)
-    if rs.json()["code"] != 0:
-        logger.error(rs.json())
-    if len(rs.json()["data"]["documents"]) != args.batch_size:
+def process_search_data(items: tuple):
+    args, index, payload = items
+    url = args.url + "/document/search?timeout=1000000"
+    if args.trace:
+        url = args.url + "/document/search?timeout=1000000&trace=true"
+
+    histogram = LatencyHistogram()
+    rs, latency, end = post(args, url, payload)
+    ok = rs is not None and len(rs["data"]["documents"]) == args.batch_size
+    if rs is not None and not ok:
         logger.error(
             "search result length should be %d, but is %d"
-            % (args.batch_size, len(rs.json()["data"]["documents"]))
+            % (args.batch_size, len(rs["data"]["documents"]))
         )
-    assert len(rs.json()["data"]["documents"]) == args.batch_size
+    histogram.record(latency, end, error=not ok)
 
-    return index, rs.json()["data"]["documents"]
+    # ids only, so documents aren't pickled back to the main process
+    ids = to_ids(rs["data"]["documents"], args.limit) if ok else None
+    trace = None
+    if args.trace and ok and rs["data"].get("trace"):
+        trace = TraceBreakdown()
+        trace.add(rs["data"]["trace"], latency)
+    return index, ids, histogram, trace
 
 
 def search(args: argparse.Namespace, xq: np.ndarray, gt: np.ndarray):
-    pool = Pool(args.pool_size)
+    """
+    return (QPS, k-NN recall at 1, 10, 100 ... up to limit, latency
+    histogram), recall is empty without ground truth
+    """
     total_data = []
     total_batch = int(args.nq / args.batch_size)
     for i in range(total_batch):
+        features = xq[i * args.batch_size : (i + 1) * args.batch_size]
         total_data.append(
-            (
-                args,
-                i,
-                xq[i * args.batch_size : (i + 1) * args.batch_size].flatten().tolist(),
-            )
+            (args, i, encode_search_data(args, features.flatten().tolist()))
         )
 
+    pool = worker_pool(args)
+    cpu = ClientCpu()
     start = time.time()
-    results = pool.map(process_search_data, total_data)
+    results = pool_map(args, pool, process_search_data, total_data)
     pool.close()
     pool.join()
     end = time.time()
+    usage = log_client_cpu(args, "search", cpu)
 
+    recalls = {}
+    metrics = {}
     recall_str = ""
     if args.recall:
-        search_results = np.empty(gt.shape)
-        for result in results:
-            batch_index, documents = result
-            for i in range(len(documents)):
-                for j in range(len(documents[i])):
-                    search_results[i + batch_index * args.batch_size][j] = documents[i][
-                        j
-                    ]["_id"]
-
-        recalls = evaluate(search_results, gt, args.limit)
-        for recall in recalls:
-            recall_str += "Recall@" + str(recall) + "=" + str(recalls[recall]) + ", "
+        # failed batches stay -1
+        search_results = np.full((gt.shape[0], args.limit), -1, dtype=np.int64)
+        for batch_index, ids, _, _ in results:
+            if ids is not None:
+                start_row = batch_index * args.batch_size
+                search_results[start_row : start_row + len(ids)] = ids
+
+        recalls, metrics, recall_str = evaluate_search(
+            search_results, gt, args.limit
+        )
 
     logger.info(
         "nq: %d, batch size:%d, search cost: %.4f seconds, QPS: %.4f, %spool size: %d"
@@ -447,6 +728,21 @@ def search(args: argparse.Namespace, xq: np.ndarray, gt: np.ndarray):
             args.pool_size,
         )
     )
+    histogram = LatencyHistogram.merge_all(result[2] for result in results)
+    log_latency(
+        "search",
+        histogram,
+        qps=args.nq / (end - start),
+        recall=recalls,
+        knn_recall=metrics.get("recall", {}),
+        ndcg=metrics.get("ndcg", {}),
+        mrr=metrics.get("mrr"),
+        client_cpu=usage,
+    )
+    if args.trace:
+        breakdown = TraceBreakdown.merge_all(result[3] for result in results)
+        log_trace("search", breakdown)
+    return args.nq / (end - start), metrics.get("recall", {}), histogram
 
 
 def run_normal(args: argparse.Namespace):
@@ -574,18 +870,11 @@ def run_task(args: argparse.Namespace):
 if __name__ == "__main__":
     args = parse_arguments()
 
-    logger = logging.getLogger(__name__)
-    logger.setLevel(args.log_level)
-    formatter = logging.Formatter(
-        "%(asctime)s %(name)s:%(lineno)s %(levelname)s %(message)s"
-    )
-    if args.output != "":
-        handler = logging.FileHandler(args.output, "a")
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-    else:
-        handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    logger = setup_logger(args)
 
+    record = start_record(args, "restful")
     run_task(args)
+
+    fname = record.save()
+    if fname is not None:
+        logger.info("result saved to %s" % (fname))
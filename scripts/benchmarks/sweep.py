@@ -0,0 +1,167 @@
+#
+# Copyright 2019 The Vearch Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+# -*- coding: UTF-8 -*-
+
+import csv
+import itertools
+import json
+import argparse
+
+import restful
+from utils import (
+    parse_arguments,
+    get_dataset_by_name,
+    setup_logger,
+    start_record,
+)
+
+
+__description__ = """ recall and QPS sweep over search index params, the
+index is built once, every point of the grid is searched and the Pareto
+frontier of k-NN recall and QPS is written as csv and json"""
+
+
+def default_grid(args: argparse.Namespace):
+    if args.index_type in ["IVFPQ", "IVFFLAT"]:
+        ncentroids = args.index_params.get("ncentroids")
+        if ncentroids is None:
+            ex = Exception("--sweep is needed when --index-params has no ncentroids")
+            raise ex
+        nprobes = []
+        nprobe = 1
+        while nprobe < ncentroids:
+            nprobes.append(nprobe)
+            nprobe *= 2
+        nprobes.append(ncentroids)
+        if args.index_type == "IVFPQ":
+            return {"nprobe": nprobes, "recall_num": [args.limit, args.limit * 4]}
+        return {"nprobe": nprobes}
+    if args.index_type == "HNSW":
+        return {"efSearch": [args.limit * i for i in [1, 2, 4, 8, 16]]}
+    return {}
+
+
+def grid_points(grid: dict):
+    keys = list(grid.keys())
+    for values in itertools.product(*[grid[key] for key in keys]):
+        yield dict(zip(keys, values))
+
+
+def pareto_frontier(points: list):
+    """points not beaten on both recall and QPS by another point"""
+    frontier = []
+    best_qps = -1.0
+    for point in sorted(points, key=lambda p: (-p["recall"], -p["qps"])):
+        if point["qps"] > best_qps:
+            frontier.append(point)
+            best_qps = point["qps"]
+    return frontier
+
+
+def write_results(args: argparse.Namespace, points: list, frontier: list):
+    keys = []
+    for point in points:
+        for key in point["params"]:
+            if key not in keys:
+                keys.append(key)
+    columns = keys + ["recall", "qps", "mean", "p50", "p99", "errors", "pareto"]
+    with open(args.sweep_output + ".csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for point in points:
+            row = [point["params"].get(key, "") for key in keys]
+            row += [point[key] for key in columns[len(keys) :]]
+            writer.writerow(row)
+
+    with open(args.sweep_output + ".json", "w") as f:
+        json.dump(
+            {
+                "dataset": args.dataset,
+                "index_type": args.index_type,
+                "index_params": args.index_params,
+                "nb": args.nb,
+                "nq": args.nq,
+                "limit": args.limit,
+                "points": points,
+                "pareto": frontier,
+            },
+            f,
+            indent=2,
+        )
+
+
+def run_sweep(args: argparse.Namespace):
+    xb, xq, gt = get_dataset_by_name(logger, args)
+    if not args.recall:
+        logger.warning("no ground truth of dataset %s, recall is 0" % (args.dataset))
+
+    args_str = ", ".join(f"{key}={value}" for key, value in vars(args).items())
+    logger.info(f"args: {args_str}")
+
+    restful.create_db_and_space(args)
+    restful.upsert(args, xb)
+    if args.waiting_index:
+        restful.train_and_build_index(args)
+
+    grid = json.loads(args.sweep) if args.sweep != "" else default_grid(args)
+    args.batch_size = 1
+    points = []
+    for params in grid_points(grid):
+        args.search_params = params
+        qps, recalls, histogram = restful.search(args, xq, gt)
+        summary = histogram.summary()
+        point = {
+            "params": params,
+            # k-NN recall of the largest k evaluated, 1-recall saturates near 1
+            "recall": recalls[max(recalls)] if recalls else 0.0,
+            "qps": qps,
+            "mean": summary["mean"],
+            "p50": summary["p50"],
+            "p99": summary["p99"],
+            "errors": summary["errors"],
+        }
+        logger.info(
+            "search params: %s, recall: %.4f, QPS: %.4f"
+            % (params, point["recall"], qps)
+        )
+        points.append(point)
+
+    frontier = pareto_frontier(points)
+    for point in points:
+        point["pareto"] = point in frontier
+    for point in frontier:
+        logger.info(
+            "pareto: %s, recall: %.4f, QPS: %.4f, p99: %.3f ms"
+            % (point["params"], point["recall"], point["qps"], point["p99"])
+        )
+    write_results(args, points, frontier)
+
+    if not args.keep_space:
+        restful.destroy(args)
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    logger = setup_logger(args)
+    restful.logger = logger
+    record = start_record(args, "sweep")
+
+    run_sweep(args)
+
+    fname = record.save()
+    if fname is not None:
+        logger.info("result saved to %s" % (fname))
@@ -1,16 +1,22 @@
 import argparse
+import json
 import psutil
 import os
+import platform
 import logging
 import tarfile
 from ftplib import FTP
 from urllib.parse import urlparse
 import socket
+import sys
 import numpy as np
 import yaml
 import math
+import time
 from typing import Any, Dict
 
+from metrics import one_recall_at, power_of_ten, evaluate_all
+
 
 def get_cpu_count():
     logical_cpus = psutil.cpu_count(logical=True)
@@ -39,6 +45,25 @@ log_levels = {
 }
 
 
+def import_engine():
+    """
+    the embedded engine python package, built as vearch_engine with
+    PACKAGE_NAME=vearch_engine it doesn't clash with the sdk, else it is
+    vearch when the sdk isn't installed over it
+    """
+    try:
+        import vearch_engine as engine
+    except ImportError:
+        import vearch as engine
+    if not hasattr(engine, "Engine"):
+        ex = Exception(
+            "local mode needs the vearch engine python package, vearch is the "
+            "sdk, build the engine with PACKAGE_NAME=vearch_engine"
+        )
+        raise ex
+    return engine
+
+
 def str2bool(v: str):
     if isinstance(v, bool):
         return v
@@ -50,7 +75,17 @@ def str2bool(v: str):
         raise argparse.ArgumentTypeError("Boolean value expected.")
 
 
-DATASETS = ["sift", "siftsmall", "glove", "nytimes", "gist", "random"]
+def str2json(v: str):
+    """json of an argument, empty stays empty so defaults are filled later"""
+    if not isinstance(v, str) or v == "":
+        return v
+    try:
+        return json.loads(v)
+    except ValueError:
+        raise argparse.ArgumentTypeError("JSON value expected: %s" % (v))
+
+
+DATASETS = ["sift", "siftsmall", "glove", "nytimes", "gist", "random", "custom"]
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -87,6 +122,34 @@ def parse_arguments() -> argparse.Namespace:
         type=int,
         default=get_cpu_count(),
     )
+    parser.add_argument(
+        "--concurrency",
+        help="the requests in flight in every process of the pool",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--keep-alive",
+        default=True,
+        type=str2bool,
+        help="reuse connections of the session of every process or not",
+        choices=[True, False],
+    )
+    parser.add_argument(
+        "--connections",
+        help="the max connections kept by the session of every process, "
+        "0 means concurrency",
+        type=int,
+        default=0,
+    )
+    parser.add_argument(
+        "--transport",
+        default="requests",
+        type=str,
+        help="the http client of the restful benchmarks, aiohttp sends the "
+        "requests of a process on one event loop",
+        choices=["requests", "aiohttp"],
+    )
     parser.add_argument(
         "--db",
         default="ts_db_benchmark",
@@ -145,6 +208,31 @@ def parse_arguments() -> argparse.Namespace:
         choices=DATASETS,
         help="the dataset to load",
     )
+    parser.add_argument(
+        "--base-file",
+        default="",
+        type=str,
+        help="base vectors of custom dataset, .fvecs/.bvecs/.npy",
+    )
+    parser.add_argument(
+        "--query-file",
+        default="",
+        type=str,
+        help="query vectors of custom dataset, .fvecs/.bvecs/.npy",
+    )
+    parser.add_argument(
+        "--groundtruth-file",
+        default="",
+        type=str,
+        help="ground truth of custom dataset, .ivecs/.npy, empty to compute it",
+    )
+    parser.add_argument(
+        "--metric-type",
+        default="L2",
+        type=str,
+        choices=["L2", "InnerProduct"],
+        help="the metric type of custom dataset",
+    )
     parser.add_argument(
         "--limit",
         default=100,
@@ -190,7 +278,13 @@ def parse_arguments() -> argparse.Namespace:
         type=str,
         default="",
     )
-    parser.add_argument("--index-params", help="the index params", type=str, default="")
+    parser.add_argument(
+        "--index-params",
+        help="the index params in json, such as "
+        '\'{"metric_type": "L2", "ncentroids": 256}\', empty means defaults of the dataset',
+        type=str2json,
+        default="",
+    )
     parser.add_argument(
         "--task",
         help="the task type",
@@ -219,6 +313,199 @@ def parse_arguments() -> argparse.Namespace:
         help="keep space and db or not",
         choices=[True, False],
     )
+    parser.add_argument(
+        "--prepare",
+        default=True,
+        type=str2bool,
+        help="create space and upsert dataset before open loop benchmark",
+        choices=[True, False],
+    )
+    parser.add_argument(
+        "--operation",
+        default="search",
+        type=str,
+        choices=["search", "upsert"],
+        help="the request of open loop benchmark",
+    )
+    parser.add_argument(
+        "--rate",
+        default=100,
+        type=float,
+        help="the target requests per second of open loop benchmark",
+    )
+    parser.add_argument(
+        "--ramp-to",
+        default=0,
+        type=float,
+        help="ramp the rate up to it by ramp step, 0 means a fixed rate",
+    )
+    parser.add_argument(
+        "--ramp-step",
+        default=100,
+        type=float,
+        help="the rate increment of every ramp step",
+    )
+    parser.add_argument(
+        "--duration",
+        default=30,
+        type=float,
+        help="the seconds every rate of open loop benchmark or every phase of "
+        "mixed benchmark runs",
+    )
+    parser.add_argument(
+        "--slo-p99",
+        default=100,
+        type=float,
+        help="the p99 latency SLO in milliseconds",
+    )
+    parser.add_argument(
+        "--max-send-lag",
+        default=10,
+        type=float,
+        help="the p99 milliseconds the open loop client may send behind the "
+        "schedule, over it the run is flagged client saturated",
+    )
+    parser.add_argument(
+        "--bisect",
+        default=3,
+        type=int,
+        help="bisect steps between the last rate meeting SLO and the first not",
+    )
+    parser.add_argument(
+        "--search-params",
+        help="the index params of search request, such as nprobe, efSearch",
+        type=json.loads,
+        default="{}",
+    )
+    parser.add_argument(
+        "--sweep",
+        help="json grid of search index params to sweep, such as "
+        '\'{"nprobe": [1, 10, 80]}\', empty means a default grid of the index type',
+        type=str,
+        default="",
+    )
+    parser.add_argument(
+        "--sweep-output",
+        help="the path prefix of sweep result, writes .csv and .json",
+        type=str,
+        default="sweep",
+    )
+    parser.add_argument(
+        "--read-ratio",
+        default=0.9,
+        type=float,
+        help="the ratio of search in the requests of mixed benchmark",
+    )
+    parser.add_argument(
+        "--delete-ratio",
+        default=0.1,
+        type=float,
+        help="the ratio of delete in the writes of mixed benchmark",
+    )
+    parser.add_argument(
+        "--flush-interval",
+        default=0,
+        type=float,
+        help="the seconds between flush during mixed benchmark, 0 means no flush",
+    )
+    parser.add_argument(
+        "--forcemerge-interval",
+        default=0,
+        type=float,
+        help="the seconds between forcemerge during mixed benchmark, 0 means no forcemerge",
+    )
+    parser.add_argument(
+        "--index-types",
+        default="FLAT,IVFPQ,IVFFLAT,HNSW",
+        type=str,
+        help="comma separated vector index types of filtered benchmark",
+    )
+    parser.add_argument(
+        "--selectivity",
+        default="0.0001,0.001,0.01,0.1,0.5,1",
+        type=str,
+        help="comma separated ratios of documents matching the filter",
+    )
+    parser.add_argument(
+        "--cardinality",
+        default=10000,
+        type=int,
+        help="the number of distinct values of the term filter field",
+    )
+    parser.add_argument(
+        "--vector-fields",
+        default="1,2,3",
+        type=str,
+        help="comma separated numbers of vector fields of multi vector benchmark",
+    )
+    parser.add_argument(
+        "--ranker-weights",
+        default="",
+        type=str,
+        help="json list of WeightedRanker weights of multi vector benchmark, "
+        "such as '[[0.8, 0.2], [1, 1]]', a weight list is used for spaces with "
+        "as many vector fields, empty means equal and skewed weights",
+    )
+    parser.add_argument(
+        "--store-type",
+        default="",
+        type=str,
+        choices=["", "MemoryOnly", "RocksDB"],
+        help="the store type of vector field, empty means the default of the "
+        "index type, MemoryOnly for FLAT and HNSW and RocksDB for the others",
+    )
+    parser.add_argument(
+        "--store-types",
+        default="MemoryOnly,RocksDB",
+        type=str,
+        help="comma separated store types of memory benchmark",
+    )
+    parser.add_argument(
+        "--mode",
+        default="remote",
+        type=str,
+        choices=["remote", "local"],
+        help="memory and build benchmark on cluster by router, or on embedded engine",
+    )
+    parser.add_argument(
+        "--steps",
+        default=5,
+        type=int,
+        help="the number of equal steps nb grows by in memory benchmark",
+    )
+    parser.add_argument(
+        "--local-path",
+        default="memory_benchmark",
+        type=str,
+        help="the data path of embedded engine in local mode",
+    )
+    parser.add_argument(
+        "--build-sweep",
+        help="json grid of index params to build with, such as "
+        '\'{"ncentroids": [1024, 4096], "training_threshold": [null, 100000]}\', '
+        "null keeps the default, empty means a default grid of the index type",
+        type=str,
+        default="",
+    )
+    parser.add_argument(
+        "--build-threads",
+        default="",
+        type=str,
+        help="comma separated OMP_NUM_THREADS of build benchmark in local mode, "
+        "empty keeps the default",
+    )
+    parser.add_argument(
+        "--sample-interval",
+        default=1.0,
+        type=float,
+        help="the seconds between samples of indexed number in build benchmark",
+    )
+    parser.add_argument(
+        "--result-dir",
+        default="results",
+        type=str,
+        help="the directory of json result of every run, empty means not to save",
+    )
     args = parser.parse_args()
 
     return args
@@ -243,14 +530,409 @@ def fvecs_read(fname: str):
 
 
 def evaluate(search: np.ndarray, gt: np.ndarray, k: int):
-    nq = gt.shape[0]
-    recalls = {}
-    i = 1
-    while i <= k:
-        recalls[i] = (search[:, :i] == gt[:, :1]).sum() / float(nq)
-        i *= 10
+    """1-recall at 1, 10, 100 ... up to k, see metrics for the others"""
+    return one_recall_at(search, gt, power_of_ten(k))
+
+
+def evaluate_search(search: np.ndarray, gt: np.ndarray, k: int):
+    """return (1-recall, all metrics, their log string)"""
+    recalls = evaluate(search, gt, k)
+    metrics = evaluate_all(search, gt, k)
+    recall_str = ""
+    for recall in recalls:
+        recall_str += "Recall@" + str(recall) + "=" + str(recalls[recall]) + ", "
+    for i in metrics["recall"]:
+        recall_str += "%d-NN Recall@%d=%.4f, nDCG@%d=%.4f, " % (
+            i,
+            i,
+            metrics["recall"][i],
+            i,
+            metrics["ndcg"][i],
+        )
+    recall_str += "MRR=%.4f, " % (metrics["mrr"])
+    return recalls, metrics, recall_str
+
+
+class LatencyHistogram:
+    """
+    Latency histogram with log buckets of 1% relative width, keyed by bucket
+    index so histograms of different workers merge by adding counts.
+    Throughput is counted per wall clock second for the same reason.
+    """
+
+    BUCKET_BASE = 1.01
+    PERCENTILES = [50, 90, 99, 99.9]
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.errors = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.throughput = {}
+
+    def record(self, latency: float, end: float = None, error: bool = False):
+        """record one request of latency seconds finished at time end"""
+        if end is None:
+            end = time.time()
+        second = int(end)
+        self.throughput[second] = self.throughput.get(second, 0) + 1
+        if error:
+            self.errors += 1
+            return
+        bucket = int(math.log(max(latency * 1e6, 1.0), self.BUCKET_BASE))
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.sum += latency
+        self.max = max(self.max, latency)
+
+    def merge(self, other: "LatencyHistogram"):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        for second, count in other.throughput.items():
+            self.throughput[second] = self.throughput.get(second, 0) + count
+        self.count += other.count
+        self.errors += other.errors
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        return self
+
+    @classmethod
+    def merge_all(cls, histograms):
+        result = cls()
+        for histogram in histograms:
+            result.merge(histogram)
+        return result
+
+    def percentile(self, p: float):
+        """latency in seconds at percentile p, the upper bound of its bucket"""
+        if self.count == 0:
+            return 0.0
+        rank = math.ceil(self.count * p / 100.0)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self.BUCKET_BASE ** (bucket + 1) / 1e6, self.max)
+        return self.max
+
+    def throughput_series(self):
+        """completed requests of every second from the first to the last"""
+        if not self.throughput:
+            return []
+        first, last = min(self.throughput), max(self.throughput)
+        return [self.throughput.get(s, 0) for s in range(first, last + 1)]
+
+    def summary(self):
+        """latencies in milliseconds"""
+        result = {
+            "count": self.count,
+            "errors": self.errors,
+            "mean": self.sum / self.count * 1000 if self.count else 0.0,
+        }
+        for p in self.PERCENTILES:
+            result["p%s" % p] = self.percentile(p) * 1000
+        result["max"] = self.max * 1000
+        return result
+
+    def to_dict(self):
+        return {
+            "counts": {str(bucket): count for bucket, count in self.counts.items()},
+            "count": self.count,
+            "errors": self.errors,
+            "sum": self.sum,
+            "max": self.max,
+            "throughput": {str(s): count for s, count in self.throughput.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        histogram = cls()
+        histogram.counts = {int(b): count for b, count in data["counts"].items()}
+        histogram.count = data["count"]
+        histogram.errors = data["errors"]
+        histogram.sum = data["sum"]
+        histogram.max = data["max"]
+        histogram.throughput = {
+            int(s): count for s, count in data["throughput"].items()
+        }
+        return histogram
+
+    def report(self):
+        summary = self.summary()
+        return "latency(ms) mean: %.3f, %s, max: %.3f, errors: %d" % (
+            summary["mean"],
+            ", ".join("p%s: %.3f" % (p, summary["p%s" % p]) for p in self.PERCENTILES),
+            summary["max"],
+            summary["errors"],
+        )
+
+
+TRACE_PHASES = [
+    "parse",
+    "get space",
+    "router fan-out",
+    "rpc and ps queue",
+    "engine search",
+    "deserialize",
+    "merge",
+    "serialize",
+    "client and network",
+]
+
+
+def trace_phases(trace: dict, latency: float):
+    """
+    milliseconds of search phases from the trace of a response and the client
+    latency in seconds, partitions are searched in parallel so a per
+    partition phase is the slowest partition's
+    """
+    partitions = {}
+    for key, value in trace.items():
+        if "_" in key:
+            name, pid = key.rsplit("_", 1)
+            partitions.setdefault(pid, {})[name] = value
+
+    def slowest(func):
+        return max((func(p) for p in partitions.values()), default=0.0)
+
+    return {
+        "parse": trace.get("parse", 0.0),
+        "get space": trace.get("getSpace", 0.0),
+        "router fan-out": slowest(
+            lambda p: p.get("getPartition", 0.0)
+            + p.get("getNodeId", 0.0)
+            + p.get("getRpcClient", 0.0)
+            + p.get("normalField", 0.0)
+        ),
+        # network and waiting in ps, rpc time the engine doesn't account for
+        "rpc and ps queue": slowest(
+            lambda p: max(p.get("rpcExecute", 0.0) - p.get("storeSearch", 0.0), 0.0)
+        ),
+        "engine search": slowest(lambda p: p.get("storeSearch", 0.0)),
+        "deserialize": slowest(lambda p: p.get("deSerialize", 0.0)),
+        "merge": trace.get("mergeAndSort", 0.0),
+        "serialize": trace.get("serialize", 0.0),
+        "client and network": max(latency * 1000 - trace.get("total", 0.0), 0.0),
+    }
+
+
+class TraceBreakdown:
+    """
+    Latency histograms of search phases from the traces of responses, they
+    merge across workers as LatencyHistogram does.
+    """
 
-    return recalls
+    def __init__(self):
+        self.phases = {phase: LatencyHistogram() for phase in TRACE_PHASES}
+
+    def add(self, trace: dict, latency: float):
+        for phase, cost in trace_phases(trace, latency).items():
+            self.phases[phase].record(cost / 1000.0)
+
+    def merge(self, other: "TraceBreakdown"):
+        for phase in TRACE_PHASES:
+            self.phases[phase].merge(other.phases[phase])
+        return self
+
+    @classmethod
+    def merge_all(cls, breakdowns):
+        result = cls()
+        for breakdown in breakdowns:
+            if breakdown is not None:
+                result.merge(breakdown)
+        return result
+
+    @property
+    def count(self):
+        return self.phases[TRACE_PHASES[0]].count
+
+    def summary(self):
+        """latencies in milliseconds and share of the mean of every phase"""
+        summaries = {phase: self.phases[phase].summary() for phase in TRACE_PHASES}
+        total = sum(summary["mean"] for summary in summaries.values())
+        for summary in summaries.values():
+            summary["share"] = summary["mean"] / total if total > 0 else 0.0
+        return summaries
+
+    def report(self):
+        """a latency attribution table"""
+        lines = [
+            "%-20s %10s %10s %10s %10s %8s"
+            % ("phase", "mean(ms)", "p50(ms)", "p99(ms)", "max(ms)", "share")
+        ]
+        for phase, summary in self.summary().items():
+            lines.append(
+                "%-20s %10.3f %10.3f %10.3f %10.3f %7.1f%%"
+                % (
+                    phase,
+                    summary["mean"],
+                    summary["p50"],
+                    summary["p99"],
+                    summary["max"],
+                    summary["share"] * 100,
+                )
+            )
+        return "\n".join(lines)
+
+
+class ClientCpu:
+    """
+    CPU used by the benchmark client from creation to stop, pool workers and
+    encoders are counted when they are joined, so stop after the pools are
+    joined
+    """
+
+    def __init__(self):
+        self.process = psutil.Process()
+        self.start = time.time()
+        self.times = self.process.cpu_times()
+
+    def stop(self, workers: int, encoders: int = 0):
+        """
+        return cores used by main process and child processes, and the
+        saturation of the cores of main, workers and encoders
+        """
+        times = self.process.cpu_times()
+        elapsed = max(time.time() - self.start, 1e-6)
+        main = (
+            times.user + times.system - self.times.user - self.times.system
+        ) / elapsed
+        children = (
+            times.children_user
+            + times.children_system
+            - self.times.children_user
+            - self.times.children_system
+        ) / elapsed
+        cores = min(get_cpu_count(), workers + encoders + 1)
+        return {
+            "main": main,
+            "workers": children,
+            "cores": cores,
+            "saturation": (main + children) / cores,
+        }
+
+
+def to_json(o: Any):
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    return str(o)
+
+
+class BenchmarkRecord:
+    """
+    Machine readable result of a benchmark run, every phase keeps the index
+    config it ran with, its metrics and latency histogram, see compare.py
+    """
+
+    def __init__(self, args: argparse.Namespace, script: str):
+        self.args = args
+        self.script = script
+        self.start = time.time()
+        self.phases = []
+
+    def add(self, phase: str, histogram: LatencyHistogram = None, **metrics):
+        entry = {
+            "phase": phase,
+            "config": {
+                "index_type": self.args.index_type,
+                "index_params": self.args.index_params,
+                "search_params": self.args.search_params,
+                "batch_size": self.args.batch_size,
+                "pool_size": self.args.pool_size,
+            },
+        }
+        entry.update(metrics)
+        if histogram is not None:
+            entry["latency"] = histogram.summary()
+            entry["histogram"] = histogram.to_dict()
+        self.phases.append(entry)
+
+    def save(self):
+        """write to result dir, return the file path or None if disabled"""
+        if self.args.result_dir == "":
+            return None
+        if not os.path.exists(self.args.result_dir):
+            os.makedirs(self.args.result_dir)
+        timestamp = time.strftime("%Y%m%d%H%M%S", time.localtime(self.start))
+        fname = os.path.join(
+            self.args.result_dir,
+            "%s_%s_%s.json" % (self.script, self.args.dataset, timestamp),
+        )
+        record = {
+            "script": self.script,
+            "start": self.start,
+            "end": time.time(),
+            "dataset": self.args.dataset,
+            "args": vars(self.args),
+            "host": {
+                "cpu_count": get_cpu_count(),
+                "logical_cpus": psutil.cpu_count(logical=True),
+                "physical_cpus": psutil.cpu_count(logical=False),
+                "platform": platform.platform(),
+                "processor": platform.processor(),
+                "python": platform.python_version(),
+            },
+            "phases": self.phases,
+        }
+        with open(fname, "w") as f:
+            json.dump(record, f, indent=2, default=to_json)
+        return fname
+
+
+# the logger and the result record of the running benchmark, set in main by
+# setup_logger and start_record, phases are added to the record when not None
+logger = logging.getLogger(__name__)
+record = None
+
+
+def setup_logger(args: argparse.Namespace) -> logging.Logger:
+    """logger of a benchmark script to --output or stdout"""
+    global logger
+    logger = logging.getLogger("__main__")
+    logger.setLevel(args.log_level)
+    formatter = logging.Formatter(
+        "%(asctime)s %(name)s:%(lineno)s %(levelname)s %(message)s"
+    )
+    if args.output != "":
+        handler = logging.FileHandler(args.output, "a")
+    else:
+        handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+    return logger
+
+
+def start_record(args: argparse.Namespace, script: str) -> BenchmarkRecord:
+    global record
+    record = BenchmarkRecord(args, script)
+    return record
+
+
+def add_record(phase: str, histogram: LatencyHistogram = None, **metrics):
+    if record is not None:
+        record.add(phase, histogram, **metrics)
+
+
+def log_latency(operate: str, histogram: LatencyHistogram, **metrics):
+    logger.info("%s %s" % (operate, histogram.report()))
+    logger.info(
+        "%s throughput per second: %s" % (operate, histogram.throughput_series())
+    )
+    add_record(operate, histogram, **metrics)
+
+
+def log_trace(operate: str, breakdown: TraceBreakdown):
+    if breakdown.count == 0:
+        logger.warning("%s trace is empty, the router may be older" % (operate))
+        return
+    logger.info(
+        "%s trace of %d requests:\n%s"
+        % (operate, breakdown.count, breakdown.report())
+    )
+    add_record("%s trace" % (operate), phases=breakdown.summary())
 
 
 def download_from_irisa(
@@ -583,6 +1265,8 @@ class DatasetRandom(Dataset):
         self.url = ""
         self.basedir = "datasets/"
         self.logger = logger
+        self.xb = None
+        self.xq = None
 
         self.download()
 
@@ -590,13 +1274,78 @@ class DatasetRandom(Dataset):
         return
 
     def get_database(self):
-        return np.random.rand(self.nb, self.d)
+        # seeded and kept, so the ground truth matches and can be cached
+        if self.xb is None:
+            self.xb = np.random.RandomState(0).rand(self.nb, self.d).astype("float32")
+        return self.xb
 
     def get_queries(self):
-        return np.random.rand(self.nq, self.d)
+        if self.xq is None:
+            self.xq = np.random.RandomState(1).rand(self.nq, self.d).astype("float32")
+        return self.xq
 
     def get_groundtruth(self):
-        return np.random.rand(self.nq, self.k)
+        from groundtruth import cached_groundtruth
+
+        gt, _ = cached_groundtruth(
+            self.get_database(),
+            self.get_queries(),
+            self.k,
+            self.metric,
+            cache_dir=self.basedir + "groundtruth",
+        )
+        return gt
+
+
+class DatasetCustom(Dataset):
+    """
+    Data from --base-file and --query-file, .fvecs/.bvecs/.npy, ground truth
+    from --groundtruth-file or computed and cached when it is empty
+    """
+
+    def __init__(self, logger: logging = None, args: argparse.Namespace = None):
+        self.metric = args.metric_type
+        self.k = args.limit
+        self.base_file = args.base_file
+        self.query_file = args.query_file
+        self.groundtruth_file = args.groundtruth_file
+        self.basedir = "datasets/"
+        self.logger = logger
+        self.xb = None
+        self.xq = None
+
+        self.download()
+
+    def download(self):
+        return
+
+    def get_database(self):
+        from groundtruth import read_vectors
+
+        if self.xb is None:
+            self.xb = read_vectors(self.base_file)
+        return self.xb
+
+    def get_queries(self):
+        from groundtruth import read_vectors
+
+        if self.xq is None:
+            self.xq = read_vectors(self.query_file)
+        return self.xq
+
+    def get_groundtruth(self):
+        from groundtruth import read_vectors, cached_groundtruth
+
+        if self.groundtruth_file != "":
+            return read_vectors(self.groundtruth_file)
+        gt, _ = cached_groundtruth(
+            self.get_database(),
+            self.get_queries(),
+            self.k,
+            self.metric,
+            cache_dir=self.basedir + "groundtruth",
+        )
+        return gt
 
 
 def get_dataset_by_name(logger: logging, args: argparse.Namespace):
@@ -613,7 +1362,8 @@ def get_dataset_by_name(logger: logging, args: argparse.Namespace):
         dataset = DatasetGist1M(logger)
     elif args.dataset == "random":
         dataset = DatasetRandom(logger, args)
-        args.recall = False
+    elif args.dataset == "custom":
+        dataset = DatasetCustom(logger, args)
     else:
         raise Exception("Not supported dataset")
 
@@ -640,7 +1390,10 @@ def get_dataset_by_name(logger: logging, args: argparse.Namespace):
 
     if len(args.index_params) == 0:
         args.index_params = params
-    return dataset.get_database(), dataset.get_queries(), dataset.get_groundtruth()
+    # exact ground truth of random and custom datasets is computed, skip it
+    # when recall is not needed
+    gt = dataset.get_groundtruth() if args.recall else None
+    return dataset.get_database(), dataset.get_queries(), gt
 
 
 def load_config(config_file: str) -> Dict[str, Any]:
@@ -1,25 +1,51 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import logging
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import (TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple,
-                    Type)
+                    Type, Union)
 
 import numpy as np
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_core.vectorstores import VectorStore
 from vearch.config import Config
-from vearch.core.vearch import Vearch
+from vearch.core.vearch import AsyncVearch, Vearch
 from vearch.schema.field import Field
 from vearch.schema.index import HNSWIndex, ScalarIndex
 from vearch.schema.space import SpaceSchema
-from vearch.utils import DataType, MetricType, VectorInfo
+from vearch.filter import (BooleanOperator, Filter, filter_fields,
+                           metadata_condition)
+from vearch.utils import (DataType, MetricType, VectorInfo,
+                          maximal_marginal_relevance)
 
 if TYPE_CHECKING:
     import vearch
 
+logger = logging.getLogger(__name__)
+
 DEFAULT_TOPN = 4
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_CONCURRENCY = 2
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_FETCH_K = 20
+DEFAULT_LAMBDA_MULT = 0.5
+MAX_BACKOFF = 2.0
+# operators of filter dicts, as the mongo style filters of other vectorstores
+FILTER_OPERATORS = {"$eq": "==", "$ne": "!=", "$gt": ">", "$gte": ">=",
+                    "$lt": "<", "$lte": "<=", "$in": "in", "$nin": "nin"}
+
+
+def _retry_delays(max_retries: int) -> Iterable[float]:
+    """seconds to wait before every attempt of an upsert, the first doesn't
+    wait and retries back off exponentially"""
+    yield 0.0
+    for attempt in range(1, max_retries + 1):
+        yield min(0.1 * 2 ** (attempt - 1), MAX_BACKOFF)
+
 
 class VearchDb(VectorStore):
     _DEFAULT_TABLE_NAME = "langchain_vearch"
@@ -57,6 +83,11 @@ class VearchDb(VectorStore):
             table_name += str(uuid.uuid4()).split("-")[-1]
         self.using_table_name = table_name
         self.embedding_func = embedding_function
+        # the non-blocking client of async methods, opened on first use
+        self._async_vearch = None
+        self._meta_fields = None
+        # unindexed filter fields, warned once
+        self._unindexed_warned = set()
 
     @property
     def embeddings(self) -> Optional[Embeddings]:
@@ -106,7 +137,7 @@ class VearchDb(VectorStore):
             db_name=db_name,
             table_name=table_name,
         )
-        vearch_db.add_texts(texts=texts, metadatas=metadatas)
+        vearch_db.add_texts(texts=texts, metadatas=metadatas, **kwargs)
         return vearch_db
 
     def _get_matadata_field(self, metadatas: Optional[List[dict]] = None):
@@ -143,60 +174,470 @@ class VearchDb(VectorStore):
         return space_schema
 
 
+    def _create_db_and_space(self, dim: int) -> None:
+        dbs= self.vearch.list_databases()
+        dbs_list = [item.name["name"] for item in dbs]
+        if self.using_db_name not in dbs_list:
+            create_db_code = self.vearch.create_database(self.using_db_name)
+            if create_db_code.code != 0:
+                raise ValueError("create db failed!!!")
+        spaces = self.vearch.list_spaces(self.using_db_name)
+        space_list = [item.name["space_name"] for item in spaces]
+        if self.using_table_name not in space_list:
+            create_code = self.vearch.create_space(self.using_db_name, 
+                self._create_space_schema(dim))
+            if create_code.code !=0 :
+                raise ValueError("create space failed!!!")
+
+    def _upsert_batch(self, space, profiles: List[dict], max_retries: int) -> List[str]:
+        """upsert embedded documents, retried with backoff without re-embedding"""
+        msg = ""
+        for delay in _retry_delays(max_retries):
+            time.sleep(delay)
+            try:
+                insert_res = space.upsert(profiles)
+            except Exception as e:
+                msg = str(e)
+                continue
+            if insert_res.code == 0:
+                return [item["_id"] for item in insert_res.document_ids]
+            msg = insert_res.msg
+        raise ValueError("upsert failed after %d retries: %s" % (max_retries, msg))
+
+    def _batch_profiles(
+        self,
+        batch: List[str],
+        metadatas: Optional[List[dict]],
+        start: int,
+        embeddings: List[List[float]],
+    ) -> List[dict]:
+        meta_field_list = [i["field"] for i in self.field_list]
+        em_np = np.array(embeddings, dtype=np.float32)
+        em_np /= np.linalg.norm(em_np, axis=1, keepdims=True)
+        profiles = []
+        for i, text in enumerate(batch):
+            profile: dict[str, Any] = {"text": text}
+            if metadatas is not None:
+                for f in meta_field_list:
+                    profile[f] = metadatas[start + i][f]
+            profile["text_embedding"] = em_np[i].tolist()
+            profiles.append(profile)
+        return profiles
+
     def add_texts(
         self,
         texts: Iterable[str],
         metadatas: Optional[List[dict]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_retries: int = DEFAULT_MAX_RETRIES,
         **kwargs: Any,
     ) -> List[str]:
         """
+        Texts are embedded and upserted by batches, embedding of a batch
+        overlaps with upserts of former batches in flight.
+
+        Args:
+            batch_size: the number of texts of an embedding and upsert request.
+            concurrency: the max upsert requests in flight.
+            max_retries: retries of a failed upsert, embeddings are reused.
         Returns:
             List of ids from adding the texts into the vectorstore.
         """
 
-        embeddings = None
-        if self.embedding_func is not None:
-            embeddings = self.embedding_func.embed_documents(list(texts))
-        if embeddings is None:
+        if self.embedding_func is None:
             raise ValueError("embeddings is None")
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1: %d" % concurrency)
+        texts = list(texts)
+        if len(texts) == 0:
+            return []
         self.field_list = self._get_matadata_field(metadatas)
-        dbs= self.vearch.list_databases()
-        dbs_list = [item.name["name"] for item in dbs]
-        if self.using_db_name not in dbs_list:
-            create_db_code = self.vearch.create_database(self.using_db_name)
-            if create_db_code.code != 0:
-                raise ValueError("create db failed!!!")
-        spaces = self.vearch.list_spaces(self.using_db_name)
-        space_list = [item.name["space_name"] for item in spaces]
-        if self.using_table_name not in space_list:
-            create_code = self.vearch.create_space(self.using_db_name, 
-                self._create_space_schema(len(embeddings[0])))
-            if create_code.code !=0 :
-                raise ValueError("create space failed!!!")
+        space = None
         docid = []
-        if embeddings is not None and metadatas is not None:
-            meta_field_list = [i["field"] for i in self.field_list]
-            for text, metadata, embed in zip(texts, metadatas, embeddings):
-                profiles: dict[str, Any] = {}
-                profiles["text"] = text
-                for f in meta_field_list:
-                    profiles[f] = metadata[f]
-                em_np = np.array(embed)
-                profiles["text_embedding"] = (em_np / np.linalg.norm(em_np)).tolist()
-                insert_res = self.vearch.upsert(
-                    self.using_db_name, self.using_table_name, [profiles]
+        pending = []
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for start in range(0, len(texts), batch_size):
+                batch = texts[start : start + batch_size]
+                embeddings = self.embedding_func.embed_documents(batch)
+                if embeddings is None or len(embeddings) == 0:
+                    raise ValueError("embeddings is None")
+                if space is None:
+                    self._create_db_and_space(len(embeddings[0]))
+                    space = self.vearch.space(self.using_db_name, self.using_table_name)
+                profiles = self._batch_profiles(batch, metadatas, start, embeddings)
+                # wait for the oldest upsert, so at most concurrency batches
+                # are embedded ahead of the server
+                if len(pending) >= concurrency:
+                    docid.extend(pending.pop(0).result())
+                pending.append(
+                    executor.submit(self._upsert_batch, space, profiles, max_retries)
                 )
-                if insert_res.code == 0:
-                    docid.append(insert_res.document_ids[0]["_id"])
-                    continue
-                else:
-                    retry_insert = self.vearch.upsert(
-                        self.using_db_name, self.using_table_name, [profiles]
+            for future in pending:
+                docid.extend(future.result())
+        return docid
+
+    def _get_async_vearch(self) -> AsyncVearch:
+        if self._async_vearch is None:
+            self._async_vearch = AsyncVearch(Config(host=self.url, token="secret"))
+        return self._async_vearch
+
+    async def _aupsert_batch(self, profiles: List[dict], max_retries: int) -> List[str]:
+        msg = ""
+        for delay in _retry_delays(max_retries):
+            await asyncio.sleep(delay)
+            try:
+                insert_res = await self._get_async_vearch().upsert(
+                    self.using_db_name, self.using_table_name, profiles
+                )
+            except Exception as e:
+                msg = str(e)
+                continue
+            if insert_res.code == 0:
+                return [item["_id"] for item in insert_res.document_ids]
+            msg = insert_res.msg
+        raise ValueError("upsert failed after %d retries: %s" % (max_retries, msg))
+
+    async def aadd_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        **kwargs: Any,
+    ) -> List[str]:
+        """
+        add_texts on the event loop, embedding of a batch overlaps with
+        upserts of former batches in flight.
+
+        Returns:
+            List of ids from adding the texts into the vectorstore.
+        """
+
+        if self.embedding_func is None:
+            raise ValueError("embeddings is None")
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1: %d" % concurrency)
+        texts = list(texts)
+        if len(texts) == 0:
+            return []
+        self.field_list = self._get_matadata_field(metadatas)
+        created = False
+        docid = []
+        pending = []
+        try:
+            for start in range(0, len(texts), batch_size):
+                batch = texts[start : start + batch_size]
+                embeddings = await self.embedding_func.aembed_documents(batch)
+                if embeddings is None or len(embeddings) == 0:
+                    raise ValueError("embeddings is None")
+                if not created:
+                    # once per store, database and space apis are sync only
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, self._create_db_and_space, len(embeddings[0])
                     )
-                    docid.append(retry_insert.document_ids[0]["_id"])
-                    continue
+                    created = True
+                profiles = self._batch_profiles(batch, metadatas, start, embeddings)
+                if len(pending) >= concurrency:
+                    docid.extend(await pending.pop(0))
+                pending.append(
+                    asyncio.ensure_future(self._aupsert_batch(profiles, max_retries))
+                )
+            while pending:
+                docid.extend(await pending.pop(0))
+        finally:
+            for task in pending:
+                task.cancel()
         return docid
 
+    def _meta_field_list(self) -> List[str]:
+        """fields of the space except the vector, looked up once"""
+        if self._meta_fields is None:
+            has, result, schema = self.vearch.is_space_exist(
+                self.using_db_name, self.using_table_name
+            )
+            if not has:
+                raise ValueError("space not exist: %s" % (result.msg))
+            self._meta_fields = {
+                field.name: field for field in schema.fields
+                if field.name != "text_embedding"
+            }
+        return list(self._meta_fields)
+
+    def _parse_filter(self, filter: dict) -> Tuple[str, list]:
+        """
+        the boolean operator and (field, operator, value) comparisons of a
+        filter dict, such as {"source": "a.txt", "page": {"$gte": 2}} or
+        {"$or": [{"source": "a.txt"}, {"source": "b.txt"}]}, conditions of
+        the server are a flat list so $and and $or can not be nested
+        """
+        operator = BooleanOperator.AND
+        clauses = [filter]
+        if len(filter) == 1 and next(iter(filter)) in ("$and", "$or"):
+            key, clauses = next(iter(filter.items()))
+            operator = BooleanOperator.AND if key == "$and" else BooleanOperator.OR
+        comparisons = []
+        for clause in clauses:
+            clause_comparisons = []
+            for field, value in clause.items():
+                if field.startswith("$"):
+                    raise ValueError("nested %s filters are not supported" % (field))
+                if not isinstance(value, dict):
+                    value = {"$eq": value}
+                for op, v in value.items():
+                    if op not in FILTER_OPERATORS:
+                        raise ValueError("filter operator %s is not supported" % (op))
+                    clause_comparisons.append((field, FILTER_OPERATORS[op], v))
+            if operator == BooleanOperator.OR and len(clause_comparisons) > 1:
+                raise ValueError("a clause of $or should have one comparison")
+            comparisons.extend(clause_comparisons)
+        return operator, comparisons
+
+    def _to_filter(self, filter: Union[dict, Filter, None]) -> Optional[Filter]:
+        """
+        a Filter of the server of a filter dict, the fields are looked up in
+        the cached schema, a Filter is passed through
+        """
+        if filter is None or isinstance(filter, Filter):
+            return filter
+        if len(filter) == 0:
+            return None
+        operator, comparisons = self._parse_filter(filter)
+        conditions = []
+        for field, op, value in comparisons:
+            if field not in self._meta_fields:
+                raise ValueError("metadata field %s not exist" % (field))
+            data_type = self._meta_fields[field].data_type
+            conditions.append(metadata_condition(field, op, value, data_type))
+        return Filter(operator, conditions)
+
+    def _warn_unindexed_fields(self, filter: Optional[Filter]) -> None:
+        """
+        filters of fields without a scalar index scan all documents, an index
+        can't be added to a field of an existing space, so it is warned once,
+        spaces created by the store index every metadata field
+        """
+        if filter is None:
+            return
+        for name in filter_fields(filter):
+            field = self._meta_fields.get(name)
+            if field is None or field.index is not None:
+                continue
+            if name not in self._unindexed_warned:
+                self._unindexed_warned.add(name)
+                logger.warning(
+                    "filter field %s of space %s has no scalar index, "
+                    "all documents are scanned" % (name, self.using_table_name)
+                )
+
+    def _search_filter(self, filter: Union[dict, Filter, None]) -> Optional[Filter]:
+        """filter of the server, fields without scalar indexes are warned"""
+        self._meta_field_list()
+        search_filter = self._to_filter(filter)
+        self._warn_unindexed_fields(search_filter)
+        return search_filter
+
+    async def _asearch_filter(
+        self, filter: Union[dict, Filter, None]
+    ) -> Optional[Filter]:
+        await self._ameta_field_list()
+        search_filter = self._to_filter(filter)
+        self._warn_unindexed_fields(search_filter)
+        return search_filter
+
+    def _select_mmr(
+        self,
+        embedding: List[float],
+        res: List[dict],
+        meta_field_list: List[str],
+        k: int,
+        lambda_mult: float,
+    ) -> List[Document]:
+        selected = maximal_marginal_relevance(
+            embedding, [item["text_embedding"] for item in res], k, lambda_mult
+        )
+        docs = self._to_documents([res[i] for i in selected], meta_field_list)
+        return [doc for doc, _ in docs]
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = DEFAULT_TOPN,
+        fetch_k: int = DEFAULT_FETCH_K,
+        lambda_mult: float = DEFAULT_LAMBDA_MULT,
+        filter: Union[dict, Filter, None] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        """
+        Docs selected by maximal marginal relevance among fetch_k candidates,
+        which are searched with their vectors in one request, filter is
+        applied by the server before the candidates are ranked.
+
+        Args:
+            lambda_mult: 1 is relevance only and 0 is diversity only.
+            filter: a filter dict of metadata or a Filter.
+        """
+        embed = np.array(embedding)
+        search_filter = self._search_filter(filter)
+        meta_field_list = self._meta_field_list()
+        vector = VectorInfo("text_embedding", (embed / np.linalg.norm(embed)).tolist())
+        query_result = self.vearch.search(
+            self.using_db_name, self.using_table_name, [vector,],
+            filter=search_filter, fields=meta_field_list + ["text_embedding"],
+            vector=True, limit=max(fetch_k, k))
+        if query_result.code != 0:
+            raise ValueError("search failed: %s" % (query_result.msg))
+        return self._select_mmr(
+            embedding, query_result.documents[0], meta_field_list, k, lambda_mult
+        )
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = DEFAULT_TOPN,
+        fetch_k: int = DEFAULT_FETCH_K,
+        lambda_mult: float = DEFAULT_LAMBDA_MULT,
+        **kwargs: Any,
+    ) -> List[Document]:
+        if self.embedding_func is None:
+            raise ValueError("embedding_func is None!!!")
+        embedding = self.embedding_func.embed_query(query)
+        return self.max_marginal_relevance_search_by_vector(
+            embedding, k, fetch_k, lambda_mult, **kwargs
+        )
+
+    async def amax_marginal_relevance_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = DEFAULT_TOPN,
+        fetch_k: int = DEFAULT_FETCH_K,
+        lambda_mult: float = DEFAULT_LAMBDA_MULT,
+        filter: Union[dict, Filter, None] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        embed = np.array(embedding)
+        search_filter = await self._asearch_filter(filter)
+        meta_field_list = await self._ameta_field_list()
+        vector = VectorInfo("text_embedding", (embed / np.linalg.norm(embed)).tolist())
+        query_result = await self._get_async_vearch().search(
+            self.using_db_name, self.using_table_name, [vector,],
+            filter=search_filter, fields=meta_field_list + ["text_embedding"],
+            vector=True, limit=max(fetch_k, k))
+        if query_result.code != 0:
+            raise ValueError("search failed: %s" % (query_result.msg))
+        return self._select_mmr(
+            embedding, query_result.documents[0], meta_field_list, k, lambda_mult
+        )
+
+    async def amax_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = DEFAULT_TOPN,
+        fetch_k: int = DEFAULT_FETCH_K,
+        lambda_mult: float = DEFAULT_LAMBDA_MULT,
+        **kwargs: Any,
+    ) -> List[Document]:
+        if self.embedding_func is None:
+            raise ValueError("embedding_func is None!!!")
+        embedding = await self.embedding_func.aembed_query(query)
+        return await self.amax_marginal_relevance_search_by_vector(
+            embedding, k, fetch_k, lambda_mult, **kwargs
+        )
+
+    async def _ameta_field_list(self) -> List[str]:
+        """fields of the space except the vector, looked up once"""
+        if self._meta_fields is None:
+            has, result, schema = await self._get_async_vearch().is_space_exist(
+                self.using_db_name, self.using_table_name
+            )
+            if not has:
+                raise ValueError("space not exist: %s" % (result.msg))
+            self._meta_fields = {
+                field.name: field for field in schema.fields
+                if field.name != "text_embedding"
+            }
+        return list(self._meta_fields)
+
+    def _to_documents(
+        self, res: List[dict], meta_field_list: List[str]
+    ) -> List[Tuple[Document, float]]:
+        results: List[Tuple[Document, float]] = []
+        for item in res:
+            content = item.get("text", "")
+            meta_data = {
+                key: item[key]
+                for key in meta_field_list
+                if key in item and key != "text"
+            }
+            results.append(
+                (Document(page_content=content, metadata=meta_data), item["_score"])
+            )
+        return results
+
+    async def asimilarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = DEFAULT_TOPN,
+        filter: Union[dict, Filter, None] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        embed = np.array(embedding)
+        search_filter = await self._asearch_filter(filter)
+        meta_field_list = await self._ameta_field_list()
+        vector = VectorInfo("text_embedding", (embed / np.linalg.norm(embed)).tolist())
+        query_result = await self._get_async_vearch().search(
+            self.using_db_name, self.using_table_name, [vector,],
+            filter=search_filter, fields=meta_field_list, limit=k)
+        if query_result.code != 0:
+            raise ValueError("search failed: %s" % (query_result.msg))
+        return self._to_documents(query_result.documents[0], meta_field_list)
+
+    async def asimilarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = DEFAULT_TOPN,
+        **kwargs: Any,
+    ) -> List[Document]:
+        results = await self.asimilarity_search_with_score_by_vector(
+            embedding, k, **kwargs
+        )
+        return [doc for doc, _ in results]
+
+    async def asimilarity_search_with_score(
+        self,
+        query: str,
+        k: int = DEFAULT_TOPN,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        if self.embedding_func is None:
+            raise ValueError("embedding_func is None!!!")
+        embedding = await self.embedding_func.aembed_query(query)
+        return await self.asimilarity_search_with_score_by_vector(
+            embedding, k, **kwargs
+        )
+
+    async def asimilarity_search(
+        self,
+        query: str,
+        k: int = DEFAULT_TOPN,
+        **kwargs: Any,
+    ) -> List[Document]:
+        results = await self.asimilarity_search_with_score(query, k, **kwargs)
+        return [doc for doc, _ in results]
+
+    async def adelete(
+        self,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> Optional[bool]:
+        if ids is None or len(ids) == 0:
+            return None
+        res = await self._get_async_vearch().delete(
+            self.using_db_name, self.using_table_name, ids
+        )
+        return res.code == 0
+
     def _get_field_list_from_c(self):
 
         pass
@@ -214,51 +655,54 @@ class VearchDb(VectorStore):
         if self.embedding_func is None:
             raise ValueError("embedding_func is None!!!")
         embeddings = self.embedding_func.embed_query(query)
-        docs = self.similarity_search_by_vector(embeddings, k)
+        docs = self.similarity_search_by_vector(embeddings, k, **kwargs)
         return docs
 
-    def similarity_search_by_vector(
+    def similarity_search_with_score_by_vector(
         self,
         embedding: List[float],
         k: int = DEFAULT_TOPN,
+        filter: Union[dict, Filter, None] = None,
         **kwargs: Any,
-    ) -> List[Document]:
+    ) -> List[Tuple[Document, float]]:
         """The most k similar documents and scores of the specified query.
         Args:
-            embeddings: embedding vector of the query.
+            embedding: embedding vector of the query.
             k: The k most similar documents to the text query.
+            filter: a filter dict of metadata, such as {"page": {"$gte": 2}},
+                or a Filter, applied by the server before the search.
         Returns:
             The k most similar documents to the specified text query.
             0 is dissimilar, 1 is the most similar.
         """
 
         embed = np.array(embedding)
-        _, _, schemas= self.vearch.is_space_exist(
-            self.using_db_name, self.using_table_name
-        )
-        raw_fields = json.loads(schemas)["schema"]["fields"]
-        meta_field_list = [item["name"] for item in raw_fields]
-        meta_field_list.remove("text_embedding")
+        search_filter = self._search_filter(filter)
+        meta_field_list = self._meta_field_list()
         vector = VectorInfo("text_embedding", (embed / np.linalg.norm(embed)).tolist())
         query_result = self.vearch.search(
             self.using_db_name, self.using_table_name, [vector,],
-            fields = meta_field_list, limit = k)
-        res = query_result.documents[0]
-        docs = []
-        for item in res:
-            content = ""
-            meta_data = {}
-            for item_key in item:
-                if item_key == "text":
-                    content = item[item_key]
-                    continue
-                if item_key in meta_field_list:
-                    meta_data[item_key] = item[item_key]
-                    meta_field_list.remove(item_key)
-                    continue
-            docs.append(Document(page_content=content, metadata=meta_data))
-        return docs
+            filter=search_filter, fields=meta_field_list, limit=k)
+        if query_result.code != 0:
+            raise ValueError("search failed: %s" % (query_result.msg))
+        return self._to_documents(query_result.documents[0], meta_field_list)
 
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = DEFAULT_TOPN,
+        **kwargs: Any,
+    ) -> List[Document]:
+        """The most k similar documents of the specified query.
+        Args:
+            embeddings: embedding vector of the query.
+            k: The k most similar documents to the text query.
+        Returns:
+            The k most similar documents to the specified text query.
+        """
+
+        results = self.similarity_search_with_score_by_vector(embedding, k, **kwargs)
+        return [doc for doc, _ in results]
 
     def similarity_search_with_score(
         self,
@@ -268,9 +712,9 @@ class VearchDb(VectorStore):
     ) -> List[Tuple[Document, float]]:
         """The most k similar documents and scores of the specified query.
         Args:
-            embeddings: embedding vector of the query.
+            query: the text query.
             k: The k most similar documents to the text query.
-            min_score: the score of similar documents to the text query
+            filter: a filter dict of metadata or a Filter.
         Returns:
             The k most similar documents to the specified text query.
             0 is dissimilar, 1 is the most similar.
@@ -279,35 +723,7 @@ class VearchDb(VectorStore):
         if self.embedding_func is None:
             raise ValueError("embedding_func is None!!!")
         embeddings = self.embedding_func.embed_query(query)
-        embed = np.array(embeddings)
-        _, _, schemas= self.vearch.is_space_exist(
-            self.using_db_name, self.using_table_name
-        )
-        raw_fields = json.loads(schemas)["schema"]["fields"]
-        meta_field_list = [item["name"] for item in raw_fields]
-        meta_field_list.remove("text_embedding")
-        vector = VectorInfo("text_embedding", (embed / np.linalg.norm(embed)).tolist())
-        query_result = self.vearch.search(
-            self.using_db_name, self.using_table_name, [vector,],
-            fields = meta_field_list, limit = k)
-        res = query_result.documents[0]
-        results: List[Tuple[Document, float]] = []
-        for item in res:
-            content = ""
-            meta_data = {}
-            score = item["_score"]
-            for item_key in item:
-                if item_key == "text":
-                    content = item[item_key]
-                    continue
-                if item_key in meta_field_list:
-                    meta_data[item_key] = item[item_key]
-                    meta_field_list.remove(item_key)
-                    continue
-            tmp_res = (Document(page_content=content, metadata=meta_data), score)
-            results.append(tmp_res)
-        return results
-
+        return self.similarity_search_with_score_by_vector(embeddings, k, **kwargs)
 
     def _similarity_search_with_relevance_scores(
         self,
@@ -354,18 +770,12 @@ class VearchDb(VectorStore):
         Returns:
             Documents which satisfy the input conditions.
         """
-        
-        _, _, schemas= self.vearch.is_space_exist(
-            self.using_db_name, self.using_table_name
-        )
-        raw_fields = json.loads(schemas)["schema"]["fields"]
-        meta_field_list = [item["name"] for item in raw_fields]
-        meta_field_list.remove("text_embedding")
 
         results: Dict[str, Document] = {}
 
         if ids is None or ids.__len__() == 0:
             return results
+        meta_field_list = self._meta_field_list()
         docs_detail = self.vearch.query(
             self.using_db_name, self.using_table_name, ids
         )
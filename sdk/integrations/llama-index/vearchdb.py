@@ -1,4 +1,4 @@
-import json
+import asyncio
 import logging
 import typing
 import uuid
@@ -6,8 +6,12 @@ from typing import TYPE_CHECKING, Any, Iterable, List, Optional
 
 import numpy as np
 from llama_index.core.schema import BaseNode, MetadataMode, TextNode
-from llama_index.core.vector_stores.types import (VectorStore,
+from llama_index.core.vector_stores.types import (FilterCondition,
+                                                  FilterOperator,
+                                                  MetadataFilters,
+                                                  VectorStore,
                                                   VectorStoreQuery,
+                                                  VectorStoreQueryMode,
                                                   VectorStoreQueryResult)
 from llama_index.core.vector_stores.utils import (legacy_metadata_dict_to_node,
                                                   metadata_dict_to_node,
@@ -15,15 +19,22 @@ from llama_index.core.vector_stores.utils import (legacy_metadata_dict_to_node,
 
 import vearch
 from vearch.config import Config
-from vearch.core.vearch import Vearch
+from vearch.const import MSG_NOT_EXIST
+from vearch.core.vearch import AsyncVearch, Vearch
+from vearch.filter import (BooleanOperator, Filter, filter_fields,
+                           metadata_condition)
 from vearch.schema.field import Field
 from vearch.schema.index import HNSWIndex, ScalarIndex
 from vearch.schema.space import SpaceSchema
-from vearch.utils import DataType, MetricType, VectorInfo
+from vearch.utils import (DataType, MetricType, VectorInfo,
+                          maximal_marginal_relevance)
 
 logger = logging.getLogger(__name__)
 _DEFAULT_TABLE_NAME = "liama_index_vearch"
 _DEFAULT_CLUSTER_DB_NAME = "liama_index_vearch_client_db"
+# candidates of MMR queries are similarity_top_k times of it
+_DEFAULT_MMR_PREFETCH_FACTOR = 4.0
+_DEFAULT_MMR_LAMBDA = 0.5
 
 
 class VearchVectorStore(VectorStore):
@@ -67,7 +78,15 @@ class VearchVectorStore(VectorStore):
         self.using_db_name = db_name
         self.using_table_name = table_name
         self.url = path_or_url
-        self.vearch = Vearch(Config(host=path_or_url))
+        self._vearch = Vearch(Config(host=path_or_url))
+        self.vearch = self._vearch
+        # the non-blocking client of async methods, opened on first use
+        self._async_vearch = None
+        # fields of the space except the vector, cached after creation or
+        # the first lookup, refreshed when a search hits a schema change
+        self._meta_fields = None
+        # unindexed filter fields, warned once
+        self._unindexed_warned = set()
         
 
     @property
@@ -107,32 +126,10 @@ class VearchVectorStore(VectorStore):
         if embeddings is None:
             raise ValueError("embeddings is None")
         self._get_matadata_field(metadatas)
-        dbs= self._vearch.list_databases()
-        dbs_list = [item.name["name"] for item in dbs]
-        if self.using_db_name not in dbs_list:
-            create_db_code = self._vearch.create_database(self.using_db_name)
-            if create_db_code.code != 0:
-                raise ValueError("create db failed!!!")
-        spaces = self._vearch.list_spaces(self.using_db_name)
-        space_list = [item.name["space_name"] for item in spaces]
-        if self.using_table_name not in space_list:
-            create_code = self._vearch.create_space(self.using_db_name, 
-                self._create_space_schema(len(embeddings[0])))
-            if create_code.code !=0 :
-                raise ValueError("create space failed!!!")
+        self._create_db_and_space(len(embeddings[0]))
         docid = []
-        if embeddings is not None and metadatas is not None:
-            meta_field_list = [i["field"] for i in self.field_list]
-            for text, metadata, embed, id_d in zip(
-                texts, metadatas, embeddings, ids
-            ):
-                profiles: typing.Dict[str, Any] = {}
-                profiles["ref_doc_id"] = id_d
-                profiles["text"] = text
-                for f in meta_field_list:
-                    profiles[f] = metadata[f]
-                embed_np = np.array(embed)
-                profiles["text_embedding"] = (embed_np / np.linalg.norm(embed_np)).tolist()
+        if metadatas is not None:
+            for profiles in self._profiles(ids, texts, metadatas, embeddings):
                 insert_res = self._vearch.upsert(self.using_db_name, self.using_table_name, [profiles])
                 if insert_res.code == 0:
                     docid.append(insert_res.document_ids[0]["_id"])
@@ -145,6 +142,44 @@ class VearchVectorStore(VectorStore):
                     continue
         return docid
 
+    def _create_db_and_space(self, dim: int) -> None:
+        dbs= self._vearch.list_databases()
+        dbs_list = [item.name["name"] for item in dbs]
+        if self.using_db_name not in dbs_list:
+            create_db_code = self._vearch.create_database(self.using_db_name)
+            if create_db_code.code != 0:
+                raise ValueError("create db failed!!!")
+        spaces = self._vearch.list_spaces(self.using_db_name)
+        space_list = [item.name["space_name"] for item in spaces]
+        if self.using_table_name not in space_list:
+            space_schema = self._create_space_schema(dim)
+            create_code = self._vearch.create_space(self.using_db_name, space_schema)
+            if create_code.code !=0 :
+                raise ValueError("create space failed!!!")
+            self._meta_fields = self._meta_fields_of(space_schema)
+
+    def _profiles(
+        self,
+        ids: Iterable[str],
+        texts: Iterable[str],
+        metadatas: List[dict],
+        embeddings: List[List[float]],
+    ) -> List[dict]:
+        meta_field_list = [i["field"] for i in self.field_list]
+        profiles_list = []
+        for text, metadata, embed, id_d in zip(
+            texts, metadatas, embeddings, ids
+        ):
+            profiles: typing.Dict[str, Any] = {}
+            profiles["ref_doc_id"] = id_d
+            profiles["text"] = text
+            for f in meta_field_list:
+                profiles[f] = metadata[f]
+            embed_np = np.array(embed)
+            profiles["text_embedding"] = (embed_np / np.linalg.norm(embed_np)).tolist()
+            profiles_list.append(profiles)
+        return profiles_list
+
     def _create_space_schema(self, dim) ->SpaceSchema:
         filed_list_add = self.field_list + [{"field": "text", "type": "str"},{"field":"ref_doc_id","type":"str"}]
         type_dict = {"int": DataType.INTEGER, "str": DataType.STRING, 
@@ -166,6 +201,15 @@ class VearchVectorStore(VectorStore):
         if not self._vearch:
             raise ValueError("Vearch Engine is not initialized")
 
+        ids, texts, metadatas, embeddings = self._nodes_to_lists(nodes)
+        return self._add_texts(
+            ids=ids,
+            texts=texts,
+            metadatas=metadatas,
+            embeddings=embeddings,
+        )
+
+    def _nodes_to_lists(self, nodes: List[BaseNode]):
         embeddings = []
         metadatas = []
         ids = []
@@ -179,13 +223,57 @@ class VearchVectorStore(VectorStore):
             )
             ids.append(node.node_id)
             texts.append(node.get_content(metadata_mode=MetadataMode.NONE) or "")
+        return ids, texts, metadatas, embeddings
 
-        return self._add_texts(
-            ids=ids,
-            texts=texts,
-            metadatas=metadatas,
-            embeddings=embeddings,
+    def _get_async_vearch(self) -> AsyncVearch:
+        if self._async_vearch is None:
+            self._async_vearch = AsyncVearch(Config(host=self.url))
+        return self._async_vearch
+
+    async def async_add(
+        self,
+        nodes: List[BaseNode],
+        batch_size: int = 64,
+        concurrency: int = 4,
+        **add_kwargs: Any,
+    ) -> List[str]:
+        """
+        add on the event loop, nodes are upserted by batches of batch_size
+        with at most concurrency requests in flight
+        """
+        if len(nodes) == 0:
+            return []
+        ids, texts, metadatas, embeddings = self._nodes_to_lists(nodes)
+        self._get_matadata_field(metadatas)
+        # once per store, database and space apis are sync only
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._create_db_and_space, len(embeddings[0])
         )
+        profiles = self._profiles(ids, texts, metadatas, embeddings)
+        semaphore = asyncio.Semaphore(concurrency)
+        avc = self._get_async_vearch()
+
+        async def upsert(batch: List[dict]) -> List[str]:
+            async with semaphore:
+                insert_res = await avc.upsert(
+                    self.using_db_name, self.using_table_name, batch
+                )
+                if insert_res.code != 0:
+                    # retried once as add does
+                    insert_res = await avc.upsert(
+                        self.using_db_name, self.using_table_name, batch
+                    )
+                if insert_res.code != 0:
+                    raise ValueError("upsert failed: %s" % (insert_res.msg))
+                return [item["_id"] for item in insert_res.document_ids]
+
+        results = await asyncio.gather(
+            *[
+                upsert(profiles[i : i + batch_size])
+                for i in range(0, len(profiles), batch_size)
+            ]
+        )
+        return [docid for result in results for docid in result]
 
     def query(
         self,
@@ -201,47 +289,126 @@ class VearchVectorStore(VectorStore):
         Returns:
             VectorStoreQueryResult: Query results.
         """
-        meta_filters = {}
-        if query.filters is not None:
-            for filter_ in query.filters.legacy_filters():
-                meta_filters[filter_.key] = filter_.value
-        _, _, schemas= self._vearch.is_space_exist(
-            self.using_db_name, self.using_table_name
-        )
-        raw_fields = json.loads(schemas)["schema"]["fields"]
-        meta_field_list = [item["name"] for item in raw_fields]
-        meta_field_list.remove("text_embedding")
         embed = query.query_embedding
         if embed is None:
             raise ValueError("query.query_embedding is None")
-        k = query.similarity_top_k
         vector = VectorInfo("text_embedding", (embed / np.linalg.norm(embed)).tolist())
+        meta_field_list = self._meta_field_list()
         query_result = self._vearch.search(
             self.using_db_name, self.using_table_name, [vector,],
-            fields = meta_field_list, limit = k)
-        res = query_result.documents[0]
+            **self._search_args(query, meta_field_list, **kwargs))
+        if self._is_schema_error(query_result):
+            self._meta_fields = None
+            meta_field_list = self._meta_field_list()
+            query_result = self._vearch.search(
+                self.using_db_name, self.using_table_name, [vector,],
+                **self._search_args(query, meta_field_list, **kwargs))
+        if query_result.code != 0:
+            raise ValueError("search failed: %s" % (query_result.msg))
+        return self._query_result(query, query_result.documents[0], meta_field_list)
+
+    def _search_args(
+        self, query: VectorStoreQuery, meta_field_list: List[str], **kwargs: Any
+    ) -> dict:
+        """
+        fields, filter and limit of the search of query, MMR queries
+        over-fetch candidates with their vectors in one search
+        """
+        k = query.similarity_top_k
+        search_filter = self._to_filter(query.filters)
+        self._warn_unindexed_fields(search_filter)
+        if query.mode != VectorStoreQueryMode.MMR:
+            return {"fields": meta_field_list, "filter": search_filter, "limit": k}
+        fetch_k = kwargs.get("mmr_prefetch_k") or int(
+            k * kwargs.get("mmr_prefetch_factor", _DEFAULT_MMR_PREFETCH_FACTOR)
+        )
+        return {
+            "fields": meta_field_list + ["text_embedding"],
+            "filter": search_filter,
+            "vector": True,
+            "limit": max(fetch_k, k),
+        }
+
+    def _to_filter(self, filters: Optional[MetadataFilters]) -> Optional[Filter]:
+        """
+        a Filter of the server of metadata filters, conditions of the server
+        are a flat list so nested MetadataFilters are not supported
+        """
+        if filters is None or len(filters.filters) == 0:
+            return None
+        if filters.condition in (None, FilterCondition.AND):
+            operator = BooleanOperator.AND
+        elif filters.condition == FilterCondition.OR:
+            operator = BooleanOperator.OR
+        else:
+            raise ValueError("filter condition %s is not supported" % (filters.condition))
+        conditions = []
+        for filter_ in filters.filters:
+            if isinstance(filter_, MetadataFilters):
+                raise ValueError("nested metadata filters are not supported")
+            field = self._meta_fields.get(filter_.key)
+            if field is None:
+                raise ValueError("metadata field %s not exist" % (filter_.key))
+            # ExactMatchFilter of legacy filters has no operator
+            operator_ = getattr(filter_, "operator", FilterOperator.EQ)
+            conditions.append(
+                metadata_condition(
+                    filter_.key, operator_.value, filter_.value, field.data_type
+                )
+            )
+        return Filter(operator, conditions)
+
+    def _warn_unindexed_fields(self, filter: Optional[Filter]) -> None:
+        """
+        filters of fields without a scalar index scan all documents, an index
+        can't be added to a field of an existing space, so it is warned once,
+        spaces created by the store index every metadata field
+        """
+        if filter is None:
+            return
+        for name in filter_fields(filter):
+            field = self._meta_fields.get(name)
+            if field is None or field.index is not None:
+                continue
+            if name not in self._unindexed_warned:
+                self._unindexed_warned.add(name)
+                logger.warning(
+                    "filter field %s of space %s has no scalar index, "
+                    "all documents are scanned" % (name, self.using_table_name)
+                )
+
+    def _query_result(
+        self, query: VectorStoreQuery, res: List[dict], meta_field_list: List[str]
+    ) -> VectorStoreQueryResult:
+        if query.mode == VectorStoreQueryMode.MMR:
+            lambda_mult = query.mmr_threshold
+            if lambda_mult is None:
+                lambda_mult = _DEFAULT_MMR_LAMBDA
+            selected = maximal_marginal_relevance(
+                query.query_embedding,
+                [item["text_embedding"] for item in res],
+                query.similarity_top_k,
+                lambda_mult,
+            )
+            res = [res[i] for i in selected]
+        return self._to_query_result(res, meta_field_list)
+
+    def _to_query_result(
+        self, res: List[dict], meta_field_list: List[str]
+    ) -> VectorStoreQueryResult:
         nodes = []
         similarities = []
         ids = []
         for item in res:
-            content = ""
-            meta_data = {}
-            node_id = ""
-           
-            score = item["_score"]
-            for item_key in item:
-                if item_key == "text":
-                    content = item[item_key]
-                    continue
-                elif item_key == "_id":
-                    node_id = item[item_key]
-                    ids.append(node_id)
-                    continue
-                if item_key in meta_field_list:
-                    meta_data[item_key] = item[item_key]
-                    meta_field_list.remove(item_key)
-                    continue
-            similarities.append(score)
+            content = item.get("text", "")
+            node_id = item.get("_id", "")
+            ids.append(node_id)
+            meta_data = {
+                key: item[key]
+                for key in meta_field_list
+                if key in item and key != "text"
+            }
+            similarities.append(item["_score"])
             try:
                 node = metadata_dict_to_node(meta_data)
                 node.set_content(content)
@@ -260,6 +427,79 @@ class VearchVectorStore(VectorStore):
             nodes.append(node)
         return VectorStoreQueryResult(nodes=nodes, similarities=similarities, ids=ids)
 
+    @staticmethod
+    def _meta_fields_of(space_schema: SpaceSchema) -> typing.Dict[str, Field]:
+        return {
+            field.name: field for field in space_schema.fields
+            if field.name != "text_embedding"
+        }
+
+    @staticmethod
+    def _is_schema_error(result) -> bool:
+        """the space is dropped or a cached field is gone"""
+        return result.code != 0 and (
+            MSG_NOT_EXIST in result.msg or "not exist" in result.msg
+        )
+
+    def _meta_field_list(self) -> List[str]:
+        if self._meta_fields is None:
+            has, result, space_schema = self._vearch.is_space_exist(
+                self.using_db_name, self.using_table_name
+            )
+            if not has:
+                raise ValueError("space not exist: %s" % (result.msg))
+            self._meta_fields = self._meta_fields_of(space_schema)
+        return list(self._meta_fields)
+
+    async def _ameta_field_list(self) -> List[str]:
+        if self._meta_fields is None:
+            has, result, space_schema = await self._get_async_vearch().is_space_exist(
+                self.using_db_name, self.using_table_name
+            )
+            if not has:
+                raise ValueError("space not exist: %s" % (result.msg))
+            self._meta_fields = self._meta_fields_of(space_schema)
+        return list(self._meta_fields)
+
+    async def aquery(
+        self,
+        query: VectorStoreQuery,
+        **kwargs: Any,
+    ) -> VectorStoreQueryResult:
+        """
+        query on the event loop.
+
+        Args:
+            query : vector store query.
+
+        Returns:
+            VectorStoreQueryResult: Query results.
+        """
+        embed = query.query_embedding
+        if embed is None:
+            raise ValueError("query.query_embedding is None")
+        vector = VectorInfo("text_embedding", (embed / np.linalg.norm(embed)).tolist())
+        meta_field_list = await self._ameta_field_list()
+        query_result = await self._get_async_vearch().search(
+            self.using_db_name, self.using_table_name, [vector,],
+            **self._search_args(query, meta_field_list, **kwargs))
+        if self._is_schema_error(query_result):
+            self._meta_fields = None
+            meta_field_list = await self._ameta_field_list()
+            query_result = await self._get_async_vearch().search(
+                self.using_db_name, self.using_table_name, [vector,],
+                **self._search_args(query, meta_field_list, **kwargs))
+        if query_result.code != 0:
+            raise ValueError("search failed: %s" % (query_result.msg))
+        return self._query_result(query, query_result.documents[0], meta_field_list)
+
+    async def adelete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        if len(ref_doc_id) == 0:
+            return
+        await self._get_async_vearch().delete(
+            self.using_db_name, self.using_table_name, [ref_doc_id]
+        )
+
     def _delete(
         self,
         ids: Optional[List[str]] = None,
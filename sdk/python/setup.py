@@ -11,4 +11,6 @@ setup(
     author_email="vearch-maintainers@groups.io",
     license="Apache License, Version 2.0",
     keywords="real time index, vector nearest neighbors",
+    # AsyncVearch sends requests by aiohttp
+    extras_require={"async": ["aiohttp"]},
 )
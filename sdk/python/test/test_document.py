@@ -4,7 +4,7 @@ import json
 import pytest
 import time
 from vearch.config import Config
-from vearch.core.vearch import Vearch
+from vearch.core.vearch import AsyncVearch, Vearch
 from vearch.schema.field import Field
 from vearch.schema.space import SpaceSchema
 from vearch.utils import DataType, MetricType, VectorInfo
@@ -220,6 +220,52 @@ def test_search():
     assert len(ret.documents[0]) >= 7
 
 
+def test_search_trace():
+    import random
+
+    feature = [random.uniform(0, 1) for _ in range(512)]
+    vi = VectorInfo("book_character", feature)
+    ret = vc.search(
+        database_name,
+        space_name,
+        vector_infos=[
+            vi,
+        ],
+        limit=7,
+        trace=True,
+    )
+    assert len(ret.documents[0]) >= 7
+    assert ret.trace["total"] >= ret.trace["service"] > 0
+
+
+def test_async_search():
+    import asyncio
+    import random
+
+    pytest.importorskip("aiohttp")
+
+    async def search():
+        avc = AsyncVearch(Config(host=test_host_url, token="secret"))
+        try:
+            features = [[random.uniform(0, 1) for _ in range(512)] for _ in range(4)]
+            return await asyncio.gather(
+                *[
+                    avc.search(
+                        database_name,
+                        space_name,
+                        vector_infos=[VectorInfo("book_character", feature)],
+                        limit=7,
+                    )
+                    for feature in features
+                ]
+            )
+        finally:
+            await avc.close()
+
+    for ret in asyncio.run(search()):
+        assert ret.code == 0 and len(ret.documents[0]) >= 7
+
+
 def test_multi_search():
     import random
 
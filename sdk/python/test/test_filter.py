@@ -0,0 +1,59 @@
+import pytest
+from vearch.exception import VearchException
+from vearch.filter import (BooleanOperator, Condition, Conditions, FieldValue,
+                           Filter, RelationOperator, filter_fields,
+                           metadata_condition)
+from vearch.utils import DataType
+
+
+def test_metadata_condition_range():
+    condition = metadata_condition("page", ">=", 2, DataType.INTEGER)
+    assert condition.dict() == {"field": "page", "operator": ">=", "value": 2}
+    condition = metadata_condition("page", "==", 2, DataType.INTEGER)
+    assert condition.dict() == {"field": "page", "operator": "=", "value": 2}
+
+
+def test_metadata_condition_term():
+    condition = metadata_condition("source", "==", "a.txt", DataType.STRING)
+    assert condition.dict() == {"field": "source", "operator": "IN", "value": ["a.txt"]}
+    condition = metadata_condition("source", "nin", ["a", "b"], DataType.STRING)
+    assert condition.dict() == {
+        "field": "source",
+        "operator": "NOT IN",
+        "value": ["a", "b"],
+    }
+
+
+def test_metadata_condition_unsupported():
+    with pytest.raises(VearchException):
+        metadata_condition("source", ">", "a", DataType.STRING)
+    with pytest.raises(VearchException):
+        metadata_condition("page", "in", [1, 2], DataType.INTEGER)
+    with pytest.raises(VearchException):
+        metadata_condition("page", "==", "2", DataType.INTEGER)
+
+
+def test_filter_fields():
+    fv = FieldValue("page", [1, 2])
+    assert filter_fields(Filter(RelationOperator.IN, fv)) == ["page"]
+
+    conditions = [
+        metadata_condition("page", ">=", 2, DataType.INTEGER),
+        metadata_condition("source", "==", "a.txt", DataType.STRING),
+        metadata_condition("page", "<", 5, DataType.INTEGER),
+    ]
+    assert filter_fields(Filter(BooleanOperator.AND, conditions)) == ["page", "source"]
+
+    nested = Conditions(
+        BooleanOperator.OR,
+        [
+            Condition(RelationOperator.IN, FieldValue("source", ["a.txt"])),
+            Condition(RelationOperator.GT, FieldValue("score", 0.5)),
+        ],
+    )
+    assert filter_fields(Filter(BooleanOperator.AND, nested)) == ["source", "score"]
+    assert filter_fields(Filter(BooleanOperator.AND, [conditions[0], nested])) == [
+        "page",
+        "source",
+        "score",
+    ]
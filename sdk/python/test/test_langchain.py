@@ -0,0 +1,99 @@
+import importlib.util
+import logging
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("langchain_core")
+
+from vearch.filter import BooleanOperator, Filter, RelationOperator
+from vearch.schema.field import Field
+from vearch.schema.index import ScalarIndex
+from vearch.utils import DataType
+
+# the module is named vearch as the sdk, so it is loaded by its path
+_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..", "..", "integrations", "langchain", "vearch.py",
+)
+_spec = importlib.util.spec_from_file_location("langchain_vearch", _PATH)
+langchain_vearch = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(langchain_vearch)
+
+
+@pytest.fixture
+def store():
+    store = langchain_vearch.VearchDb.__new__(langchain_vearch.VearchDb)
+    store.using_table_name = "langchain_vearch"
+    store._unindexed_warned = set()
+    store._meta_fields = {
+        "source": Field("source", DataType.STRING, index=ScalarIndex("source_idx")),
+        "page": Field("page", DataType.INTEGER),
+    }
+    return store
+
+
+def test_to_filter_and(store):
+    filter = store._to_filter({"source": "a.txt", "page": {"$gte": 2}})
+    assert filter.dict() == {
+        "operator": BooleanOperator.AND,
+        "conditions": [
+            {"field": "source", "operator": RelationOperator.IN, "value": ["a.txt"]},
+            {"field": "page", "operator": RelationOperator.GE, "value": 2},
+        ],
+    }
+
+
+def test_to_filter_or(store):
+    filter = store._to_filter({"$or": [{"source": "a.txt"}, {"page": {"$lt": 2}}]})
+    assert filter.dict() == {
+        "operator": BooleanOperator.OR,
+        "conditions": [
+            {"field": "source", "operator": RelationOperator.IN, "value": ["a.txt"]},
+            {"field": "page", "operator": RelationOperator.LT, "value": 2},
+        ],
+    }
+
+
+def test_to_filter_in_and_ne(store):
+    filter = store._to_filter({"source": {"$in": ["a.txt", "b.txt"]}})
+    assert filter.dict()["conditions"] == [
+        {"field": "source", "operator": RelationOperator.IN, "value": ["a.txt", "b.txt"]},
+    ]
+    filter = store._to_filter({"source": {"$ne": "a.txt"}})
+    assert filter.dict()["conditions"] == [
+        {"field": "source", "operator": RelationOperator.NOT_IN, "value": ["a.txt"]},
+    ]
+    filter = store._to_filter({"page": {"$ne": 2}})
+    assert filter.dict()["conditions"] == [
+        {"field": "page", "operator": RelationOperator.NE, "value": 2},
+    ]
+
+
+def test_to_filter_passthrough(store):
+    assert store._to_filter(None) is None
+    assert store._to_filter({}) is None
+    filter = Filter(BooleanOperator.AND, [])
+    assert store._to_filter(filter) is filter
+
+
+def test_to_filter_rejected(store):
+    with pytest.raises(ValueError, match="nested"):
+        store._to_filter({"$or": [{"$and": [{"source": "a.txt"}, {"page": 2}]}]})
+    with pytest.raises(ValueError, match="one comparison"):
+        store._to_filter({"$or": [{"source": "a.txt", "page": 2}]})
+    with pytest.raises(ValueError, match="not supported"):
+        store._to_filter({"page": {"$like": 2}})
+    with pytest.raises(ValueError, match="not exist"):
+        store._to_filter({"author": "a"})
+
+
+def test_warn_unindexed_fields_once(store, caplog):
+    filter = store._to_filter({"source": "a.txt", "page": 2})
+    with caplog.at_level(logging.WARNING):
+        store._warn_unindexed_fields(filter)
+        store._warn_unindexed_fields(filter)
+    warnings = [r.getMessage() for r in caplog.records]
+    assert len(warnings) == 1
+    assert "page" in warnings[0]
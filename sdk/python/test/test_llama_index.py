@@ -0,0 +1,116 @@
+import importlib.util
+import logging
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("llama_index.core")
+
+from llama_index.core.vector_stores.types import (ExactMatchFilter,
+                                                  FilterCondition,
+                                                  FilterOperator,
+                                                  MetadataFilter,
+                                                  MetadataFilters)
+from vearch.filter import BooleanOperator, RelationOperator
+from vearch.schema.field import Field
+from vearch.schema.index import ScalarIndex
+from vearch.utils import DataType
+
+_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..", "..", "integrations", "llama-index", "vearchdb.py",
+)
+_spec = importlib.util.spec_from_file_location("llama_index_vearchdb", _PATH)
+llama_index_vearchdb = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(llama_index_vearchdb)
+
+
+@pytest.fixture
+def store():
+    store_class = llama_index_vearchdb.VearchVectorStore
+    store = store_class.__new__(store_class)
+    store.using_table_name = "llama_index_vearch"
+    store._unindexed_warned = set()
+    store._meta_fields = {
+        "source": Field("source", DataType.STRING, index=ScalarIndex("source_idx")),
+        "page": Field("page", DataType.INTEGER),
+    }
+    return store
+
+
+def test_to_filter_or(store):
+    filters = MetadataFilters(
+        filters=[
+            MetadataFilter(key="source", value="a.txt"),
+            MetadataFilter(key="page", value=2, operator=FilterOperator.GTE),
+        ],
+        condition=FilterCondition.OR,
+    )
+    assert store._to_filter(filters).dict() == {
+        "operator": BooleanOperator.OR,
+        "conditions": [
+            {"field": "source", "operator": RelationOperator.IN, "value": ["a.txt"]},
+            {"field": "page", "operator": RelationOperator.GE, "value": 2},
+        ],
+    }
+
+
+def test_to_filter_in_and_ne(store):
+    filters = MetadataFilters(
+        filters=[
+            MetadataFilter(key="source", value=["a.txt", "b.txt"], operator=FilterOperator.IN),
+            MetadataFilter(key="page", value=2, operator=FilterOperator.NE),
+        ]
+    )
+    assert store._to_filter(filters).dict() == {
+        "operator": BooleanOperator.AND,
+        "conditions": [
+            {"field": "source", "operator": RelationOperator.IN, "value": ["a.txt", "b.txt"]},
+            {"field": "page", "operator": RelationOperator.NE, "value": 2},
+        ],
+    }
+    filters = MetadataFilters(
+        filters=[MetadataFilter(key="source", value="a.txt", operator=FilterOperator.NE)]
+    )
+    assert store._to_filter(filters).dict()["conditions"] == [
+        {"field": "source", "operator": RelationOperator.NOT_IN, "value": ["a.txt"]},
+    ]
+
+
+def test_to_filter_exact_match(store):
+    filters = MetadataFilters(filters=[ExactMatchFilter(key="page", value=2)])
+    assert store._to_filter(filters).dict()["conditions"] == [
+        {"field": "page", "operator": RelationOperator.EQ, "value": 2},
+    ]
+
+
+def test_to_filter_rejected(store):
+    assert store._to_filter(None) is None
+    assert store._to_filter(MetadataFilters(filters=[])) is None
+    nested = MetadataFilters(
+        filters=[
+            MetadataFilter(key="page", value=2),
+            MetadataFilters(filters=[MetadataFilter(key="source", value="a.txt")]),
+        ]
+    )
+    with pytest.raises(ValueError, match="nested"):
+        store._to_filter(nested)
+    with pytest.raises(ValueError, match="not exist"):
+        store._to_filter(MetadataFilters(filters=[MetadataFilter(key="author", value="a")]))
+
+
+def test_warn_unindexed_fields_once(store, caplog):
+    filters = MetadataFilters(
+        filters=[
+            MetadataFilter(key="source", value="a.txt"),
+            MetadataFilter(key="page", value=2),
+        ]
+    )
+    filter = store._to_filter(filters)
+    with caplog.at_level(logging.WARNING):
+        store._warn_unindexed_fields(filter)
+        store._warn_unindexed_fields(filter)
+    warnings = [r.getMessage() for r in caplog.records]
+    assert len(warnings) == 1
+    assert "page" in warnings[0]
@@ -0,0 +1,144 @@
+import random
+import tempfile
+import pytest
+from vearch.config import Config
+from vearch.core.vearch import Vearch
+from vearch.exception import VearchException
+from vearch.schema.field import Field
+from vearch.schema.space import SpaceSchema
+from vearch.utils import DataType, MetricType, VectorInfo
+from vearch.schema.index import FlatIndex, ScalarIndex
+from vearch.filter import Filter, Condition, FieldValue
+
+database_name = "database_test_local"
+space_name = "book_info"
+dimension = 64
+total = 100
+
+local_path = tempfile.mkdtemp(prefix="vearch_local_")
+try:
+    vc = Vearch(Config(host="local://" + local_path))
+except VearchException:
+    pytest.skip("vearch engine is not installed", allow_module_level=True)
+
+
+def create_space_schema() -> SpaceSchema:
+    book_name = Field(
+        "book_name",
+        DataType.STRING,
+        desc="the name of book",
+        index=ScalarIndex("book_name_idx"),
+    )
+    book_num = Field(
+        "book_num",
+        DataType.INTEGER,
+        desc="the num of book",
+        index=ScalarIndex("book_num_idx"),
+    )
+    book_vector = Field(
+        "book_character",
+        DataType.VECTOR,
+        FlatIndex("book_vec_idx", MetricType.Inner_product),
+        dimension=dimension,
+    )
+    return SpaceSchema(
+        space_name, fields=[book_name, book_num, book_vector], partition_num=1
+    )
+
+
+def book_documents():
+    return [
+        {
+            "_id": str(i),
+            "book_name": "book_" + str(i),
+            "book_num": i,
+            "book_character": [random.uniform(0, 1) for _ in range(dimension)],
+        }
+        for i in range(total)
+    ]
+
+
+class TestLocal(object):
+    def test_create_database(self):
+        ret = vc.create_database(database_name)
+        assert ret.is_success()
+        assert vc.is_database_exist(database_name)
+
+    def test_create_space(self):
+        ret = vc.create_space(database_name, create_space_schema())
+        assert ret.is_success()
+        assert vc.is_space_exist(database_name, space_name)[0]
+
+    def test_upsert(self):
+        ret = vc.upsert(database_name, space_name, book_documents())
+        assert ret.is_success()
+        assert len(ret.get_document_ids()) == total
+
+    def test_query_by_ids(self):
+        ret = vc.query(database_name, space_name, document_ids=["1", "2", "not_exist"])
+        assert ret.is_success()
+        assert ret.documents[0]["book_num"] == 1
+        assert ret.documents[1]["book_name"] == "book_2"
+        assert "code" in ret.documents[2]
+
+    def test_search_with_filter(self):
+        vi = VectorInfo(
+            "book_character", [random.uniform(0, 1) for _ in range(dimension)]
+        )
+        conditions = [
+            Condition(operator=">=", fv=FieldValue(field="book_num", value=10)),
+            Condition(operator="<", fv=FieldValue(field="book_num", value=20)),
+        ]
+        ret = vc.search(
+            database_name,
+            space_name,
+            vector_infos=[vi],
+            filter=Filter(operator="AND", conditions=conditions),
+            limit=5,
+        )
+        assert ret.is_success()
+        assert len(ret.documents[0]) == 5
+        for document in ret.documents[0]:
+            assert 10 <= document["book_num"] < 20
+
+    def test_search_with_equal_filter(self):
+        vi = VectorInfo(
+            "book_character", [random.uniform(0, 1) for _ in range(dimension)]
+        )
+        conditions = [Condition(operator="=", fv=FieldValue(field="book_num", value=10))]
+        ret = vc.search(
+            database_name,
+            space_name,
+            vector_infos=[vi],
+            filter=Filter(operator="AND", conditions=conditions),
+            limit=5,
+        )
+        assert ret.is_success()
+        assert [document["book_num"] for document in ret.documents[0]] == [10]
+
+    def test_search_with_not_equal_filter(self):
+        vi = VectorInfo(
+            "book_character", [random.uniform(0, 1) for _ in range(dimension)]
+        )
+        conditions = [Condition(operator="!=", fv=FieldValue(field="book_num", value=10))]
+        ret = vc.search(
+            database_name,
+            space_name,
+            vector_infos=[vi],
+            filter=Filter(operator="AND", conditions=conditions),
+            limit=5,
+        )
+        assert not ret.is_success()
+        assert "!=" in ret.msg
+
+    def test_delete(self):
+        ret = vc.delete(database_name, space_name, document_ids=["1", "2"])
+        assert ret.is_success()
+        assert ret.total == 2
+        ret = vc.query(database_name, space_name, document_ids=["1"])
+        assert "code" in ret.documents[0]
+
+    def test_drop(self):
+        assert vc.drop_space(database_name, space_name).is_success()
+        assert vc.drop_database(database_name).is_success()
+        vc.close()
@@ -0,0 +1,23 @@
+import numpy as np
+from vearch.utils import maximal_marginal_relevance
+
+
+def test_mmr_relevance_only():
+    rng = np.random.RandomState(0)
+    embeddings = rng.rand(200, 64)
+    query = rng.rand(64)
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    expected = np.argsort(-(normalized @ query))[:10].tolist()
+    assert maximal_marginal_relevance(query, embeddings, 10, 1.0) == expected
+
+
+def test_mmr_skips_duplicates():
+    query = np.array([1.0, 0.0])
+    # the nearest two are the same vector, diversity prefers the third
+    embeddings = np.array([[1.0, 0.1], [1.0, 0.1], [0.5, -0.5]])
+    assert maximal_marginal_relevance(query, embeddings, 2, 0.5) == [0, 2]
+
+
+def test_mmr_short_candidates():
+    assert maximal_marginal_relevance([1.0, 0.0], [[1.0, 0.0]], 4) == [0]
+    assert maximal_marginal_relevance([1.0, 0.0], np.zeros((0, 2)), 4) == []
@@ -12,6 +12,9 @@ INDEX_URI = "/document/index"
 
 AUTH_KEY = "Authorization"
 
+# host of embedded local mode, e.g. local:///path/to/data
+LOCAL_HOST_PREFIX = "local://"
+
 CODE_SUCCESS = 0
 CODE_INTERNAL_ERROR = 1
 CODE_UNKNOWN_ERROR = 2
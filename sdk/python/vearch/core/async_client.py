@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import List, Optional
+
+from vearch.config import (
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_RETRIES,
+    DEFAULT_TIMEOUT,
+    DEFAULT_TOKEN,
+    Config,
+)
+from vearch.const import (
+    CODE_CONFIG_ERROR,
+    DELETE_DOC_URI,
+    QUERY_DOC_URI,
+    SEARCH_DOC_URI,
+    SPACE_URI,
+    UPSERT_DOC_URI,
+)
+from vearch.exception import VearchException
+from vearch.filter import Filter
+from vearch.result import DeleteResult, Result, SearchResult, UpsertResult, get_result
+from vearch.utils import CodeType, VectorInfo
+
+logger = logging.getLogger("vearch")
+
+
+def _import_aiohttp():
+    try:
+        import aiohttp
+    except ImportError:
+        raise VearchException(
+            CODE_CONFIG_ERROR,
+            "async client needs aiohttp, please install it with `pip install pyvearch[async]`",
+        )
+    return aiohttp
+
+
+class _Response(object):
+    """the body of an aiohttp response, as read by the parsers of results"""
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncRestClient(object):
+    """
+    non-blocking client of the document apis of RestClient, the aiohttp
+    session is opened by the first request in the running event loop
+    """
+
+    @classmethod
+    def from_config(cls, config: Config) -> AsyncRestClient:
+        return cls(
+            host=config.host,
+            max_connections=config.max_connections,
+            max_retries=config.max_retries,
+            token=config.token,
+            timeout=config.timeout,
+        )
+
+    def __init__(
+        self,
+        host: str,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_retries: int = DEFAULT_RETRIES,
+        token: str = DEFAULT_TOKEN,
+        timeout: int = DEFAULT_TIMEOUT,
+    ):
+        self._aiohttp = _import_aiohttp()
+        self.host = host
+        self.token = token
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.s = None
+        self._loop = None
+
+    async def close(self):
+        if self.s is not None:
+            await self.s.close()
+            self.s = None
+
+    def _session(self):
+        # a session is bound to the event loop it is opened in
+        loop = asyncio.get_running_loop()
+        if self.s is None or self.s.closed or self._loop is not loop:
+            aiohttp = self._aiohttp
+            self._loop = loop
+            self.s = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                auth=aiohttp.BasicAuth("root", self.token),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self.s
+
+    async def _request(self, method: str, url: str, json=None) -> _Response:
+        """connection errors are retried as by the HTTPAdapter of RestClient"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._session().request(method, url, json=json) as resp:
+                    return _Response(resp.status, await resp.text())
+            except self._aiohttp.ClientConnectionError:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(0.1 * 2**attempt)
+
+    async def _get_space_detail(self, database_name: str, space_name: str) -> Result:
+        url_params = {"database_name": database_name, "space_name": space_name}
+        url = self.host + (SPACE_URI % url_params)
+        resp = await self._request("GET", url)
+        return get_result(resp)
+
+    async def _upsert(
+        self, database_name: str, space_name: str, documents: List
+    ) -> UpsertResult:
+        url = self.host + UPSERT_DOC_URI
+        req_body = {
+            "db_name": database_name,
+            "space_name": space_name,
+            "documents": documents,
+        }
+        resp = await self._request("POST", url, json=req_body)
+        return UpsertResult.parse_upsert_result_from_response(resp)
+
+    async def _delete_documents(
+        self,
+        database_name: str,
+        space_name: str,
+        document_ids: Optional[List[str]] = None,
+        filter: Optional[Filter] = None,
+        limit: int = 50,
+    ) -> DeleteResult:
+        url = self.host + DELETE_DOC_URI
+        req_body = {
+            "db_name": database_name,
+            "space_name": space_name,
+            "limit": limit,
+        }
+        if document_ids:
+            req_body["document_ids"] = document_ids
+        if filter:
+            req_body["filters"] = filter.dict()
+        resp = await self._request("POST", url, json=req_body)
+        return DeleteResult.parse_delete_result_from_response(resp)
+
+    async def _query_documents(
+        self,
+        database_name: str,
+        space_name: str,
+        document_ids: Optional[List] = None,
+        filter: Optional[Filter] = None,
+        partition_id: Optional[int] = None,
+        fields: Optional[List] = None,
+        vector: bool = False,
+        limit: int = 50,
+    ) -> SearchResult:
+        if (not document_ids) and (not filter):
+            return SearchResult(
+                CodeType.QUERY_DOC, "document_ids and filter can not both null"
+            )
+        url = self.host + QUERY_DOC_URI
+        req_body = {
+            "db_name": database_name,
+            "space_name": space_name,
+            "vector_value": vector,
+            "limit": limit,
+        }
+        if document_ids:
+            req_body["document_ids"] = document_ids
+        if partition_id:
+            req_body["partition_id"] = partition_id
+        if fields:
+            req_body["fields"] = fields
+        if filter:
+            req_body["filters"] = filter.dict()
+        resp = await self._request("POST", url, json=req_body)
+        return SearchResult.parse_search_result_from_response(resp)
+
+    async def _search_documents(
+        self,
+        database_name: str,
+        space_name: str,
+        vector_infos: List[VectorInfo],
+        filter: Optional[Filter] = None,
+        fields: Optional[List[str]] = None,
+        vector: bool = False,
+        limit: int = 50,
+        **kwargs,
+    ) -> SearchResult:
+        """the same params as RestClient._search_documents"""
+        if len(vector_infos) == 0:
+            return SearchResult(CodeType.SEARCH_DOC, "vector_info can not null")
+
+        url = self.host + SEARCH_DOC_URI
+        if kwargs.pop("trace", False):
+            url += "?trace=true"
+        req_body = {
+            "db_name": database_name,
+            "space_name": space_name,
+            "limit": limit,
+            "vectors": [vector_info.dict() for vector_info in vector_infos],
+            "vector_value": vector,
+            **kwargs,
+        }
+        if fields:
+            req_body["fields"] = fields
+        if filter:
+            req_body["filters"] = filter.dict()
+        resp = await self._request("POST", url, json=req_body)
+        return SearchResult.parse_search_result_from_response(resp)
@@ -74,6 +74,9 @@ class RestClient(object):
         self.token = config.token
         self.timeout = config.timeout
 
+    def close(self):
+        self.s.close()
+
     def _create_db(self, database_name: str) -> Result:
         url_params = {"database_name": database_name}
         url = self.host + DATABASE_URI % url_params
@@ -250,6 +253,8 @@ class RestClient(object):
             "load_balance": "leader",
             "l2_sqrt": false,
             "limit": 10
+            trace: return the milliseconds of router and ps phases in trace of
+             the result
 
             retrieval_param: the retrieval parameter which control the search action,user can asign it to precisely
              control search result,different index type different parameters
@@ -284,6 +289,8 @@ class RestClient(object):
             return SearchResult(CodeType.SEARCH_DOC, "vector_info can not null")
 
         url = self.host + SEARCH_DOC_URI
+        if kwargs.pop("trace", False):
+            url += "?trace=true"
         req_body = {
             "db_name": database_name,
             "space_name": space_name,
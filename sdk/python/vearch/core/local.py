@@ -0,0 +1,572 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from vearch.config import Config
+from vearch.const import (
+    CODE_CONFIG_ERROR,
+    CODE_DATABASE_NOT_EXIST,
+    CODE_DB_EXIST,
+    CODE_DOCUMENT_NOT_EXIST,
+    CODE_INTERNAL_ERROR,
+    CODE_PARAM_ERROR,
+    CODE_SPACE_NOT_EXIST,
+    CODE_SUCCESS,
+    LOCAL_HOST_PREFIX,
+    MSG_NOT_EXIST,
+)
+from vearch.exception import VearchException
+from vearch.filter import BooleanOperator, Conditions, Filter, RelationOperator
+from vearch.result import DeleteResult, Result, SearchResult, UpsertResult
+from vearch.schema.index import Index
+from vearch.schema.space import SpaceSchema
+from vearch.utils import CodeType, DataType, IndexType, VectorInfo
+
+logger = logging.getLogger("vearch")
+
+SPACE_SCHEMA_FILE = "space.json"
+
+
+def _import_engine():
+    """
+    the engine package is also named vearch, it shadows or is shadowed by
+    this sdk, so it is imported as vearch_engine when built with
+    PACKAGE_NAME=vearch_engine, else from vearch if it comes first
+    """
+    try:
+        from vearch_engine import Engine, GammaFieldInfo, GammaVectorInfo, dataType
+    except ImportError:
+        try:
+            from vearch import Engine, GammaFieldInfo, GammaVectorInfo, dataType
+        except ImportError:
+            raise VearchException(
+                CODE_CONFIG_ERROR,
+                "local mode needs the vearch engine python package, please "
+                "build it as vearch_engine with `PACKAGE_NAME=vearch_engine`",
+            )
+    return Engine, GammaFieldInfo, GammaVectorInfo, dataType
+
+
+def _to_python(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class LocalClient(object):
+    """
+    in-process client with the same interface as RestClient, spaces are
+    stored in vearch engines under the path of host "local:///path"
+    """
+
+    @classmethod
+    def from_config(cls, config: Config) -> LocalClient:
+        return cls(host=config.host)
+
+    def __init__(self, host: str):
+        self.host = host
+        self.path = host[len(LOCAL_HOST_PREFIX) :]
+        (
+            self._engine_cls,
+            self._field_info_cls,
+            self._vector_info_cls,
+            self._engine_data_type,
+        ) = _import_engine()
+        self._engines = {}
+        self._schemas = {}
+        os.makedirs(self.path, exist_ok=True)
+
+    def close(self):
+        for engine in self._engines.values():
+            engine.dump()
+            engine.close()
+        self._engines = {}
+
+    def _db_path(self, database_name: str) -> str:
+        return os.path.join(self.path, database_name)
+
+    def _space_path(self, database_name: str, space_name: str) -> str:
+        return os.path.join(self.path, database_name, space_name)
+
+    def _db_exist(self, database_name: str) -> bool:
+        return os.path.isdir(self._db_path(database_name))
+
+    def _space_exist(self, database_name: str, space_name: str) -> bool:
+        return os.path.isfile(
+            os.path.join(self._space_path(database_name, space_name), SPACE_SCHEMA_FILE)
+        )
+
+    def _spaces(self, database_name: str) -> List[str]:
+        return sorted(
+            name
+            for name in os.listdir(self._db_path(database_name))
+            if self._space_exist(database_name, name)
+        )
+
+    def _not_exist(self, database_name: str, space_name: str = None) -> Result:
+        if not self._db_exist(database_name):
+            return Result(
+                code=CODE_DATABASE_NOT_EXIST,
+                msg="database %s %s" % (database_name, MSG_NOT_EXIST),
+            )
+        if space_name is not None and not self._space_exist(database_name, space_name):
+            return Result(
+                code=CODE_SPACE_NOT_EXIST,
+                msg="space %s %s" % (space_name, MSG_NOT_EXIST),
+            )
+        return None
+
+    def _space_detail(self, database_name: str, space_name: str) -> Dict:
+        schema_path = os.path.join(
+            self._space_path(database_name, space_name), SPACE_SCHEMA_FILE
+        )
+        with open(schema_path, "r") as f:
+            return json.load(f)
+
+    def _schema(self, database_name: str, space_name: str) -> SpaceSchema:
+        key = (database_name, space_name)
+        if key not in self._schemas:
+            self._schemas[key] = SpaceSchema.from_dict(
+                self._space_detail(database_name, space_name)
+            )
+        return self._schemas[key]
+
+    def _table_info(self, space_schema: SpaceSchema) -> Tuple[Dict, List, object]:
+        data_type = self._engine_data_type
+        type_map = {
+            DataType.INTEGER: data_type.INT,
+            DataType.LONG: data_type.LONG,
+            DataType.FLOAT: data_type.FLOAT,
+            DataType.DOUBLE: data_type.DOUBLE,
+            DataType.STRING: data_type.STRING,
+        }
+        engine_info = {}
+        fields = []
+        vector_field = None
+        for field in space_schema.fields:
+            if field.data_type == DataType.VECTOR:
+                if vector_field is not None:
+                    raise VearchException(
+                        CodeType.CREATE_SPACE,
+                        "local mode supports only one vector field",
+                    )
+                index_type = field.index._index_type if field.index else IndexType.FLAT
+                params = dict(field.index._params or {}) if field.index else {}
+                engine_info["retrieval_type"] = index_type
+                engine_info["retrieval_param"] = params
+                if params.get("training_threshold"):
+                    engine_info["index_size"] = params["training_threshold"]
+                store_type = "RocksDB" if index_type == IndexType.IVFFLAT else "MemoryOnly"
+                vector_field = self._vector_info_cls(
+                    name=field.name,
+                    dimension=field.dim,
+                    store_type=field._extra.get("store_type", store_type),
+                    store_param=field._extra.get("store_param", {}),
+                )
+            elif field.data_type in type_map:
+                fields.append(
+                    self._field_info_cls(
+                        field.name, type_map[field.data_type], field.index is not None
+                    )
+                )
+            else:
+                raise VearchException(
+                    CodeType.CREATE_SPACE,
+                    "data type %s of field %s is not supported in local mode"
+                    % (field.data_type, field.name),
+                )
+        if vector_field is None:
+            raise VearchException(CodeType.CREATE_SPACE, "there are no vector fields")
+        return engine_info, fields, vector_field
+
+    def _engine(self, database_name: str, space_name: str):
+        key = (database_name, space_name)
+        if key in self._engines:
+            return self._engines[key]
+        space_path = self._space_path(database_name, space_name)
+        engine = self._engine_cls(
+            os.path.join(space_path, "data"), os.path.join(space_path, "logs")
+        )
+        if os.path.isfile(os.path.join(space_path, "data", "table.pickle")):
+            engine.load()
+        else:
+            engine_info, fields, vector_field = self._table_info(
+                self._schema(database_name, space_name)
+            )
+            engine.create_table(
+                engine_info, name=space_name, fields=fields, vector_field=vector_field
+            )
+        self._engines[key] = engine
+        return engine
+
+    def _create_db(self, database_name: str) -> Result:
+        if self._db_exist(database_name):
+            return Result(code=CODE_DB_EXIST, msg="database %s exist" % database_name)
+        os.makedirs(self._db_path(database_name))
+        return Result(code=CODE_SUCCESS, data={"name": database_name})
+
+    def _drop_db(self, database_name: str) -> Result:
+        not_exist = self._not_exist(database_name)
+        if not_exist:
+            return not_exist
+        if len(self._spaces(database_name)) > 0:
+            return Result(
+                code=CODE_PARAM_ERROR,
+                msg="database %s has spaces, drop them first" % database_name,
+            )
+        shutil.rmtree(self._db_path(database_name))
+        return Result(code=CODE_SUCCESS)
+
+    def _list_db(self) -> Result:
+        data = [{"name": name} for name in sorted(os.listdir(self.path)) if self._db_exist(name)]
+        return Result(code=CODE_SUCCESS, data=data)
+
+    def _get_db_detail(self, database_name: str) -> Result:
+        not_exist = self._not_exist(database_name)
+        if not_exist:
+            return not_exist
+        return Result(code=CODE_SUCCESS, data={"name": database_name})
+
+    def _list_space(self, database_name: str) -> Result:
+        not_exist = self._not_exist(database_name)
+        if not_exist:
+            return not_exist
+        data = [{"space_name": name} for name in self._spaces(database_name)]
+        return Result(code=CODE_SUCCESS, data=data)
+
+    def _create_space(self, database_name: str, space_schema: SpaceSchema) -> Result:
+        not_exist = self._not_exist(database_name)
+        if not_exist:
+            return not_exist
+        if self._space_exist(database_name, space_schema.name):
+            return Result(
+                code=CODE_PARAM_ERROR, msg="space %s exist" % space_schema.name
+            )
+        space_dict = space_schema.dict()
+        for field, field_dict in zip(space_schema.fields, space_dict["fields"]):
+            for key in ("store_type", "store_param"):
+                if key in field._extra:
+                    field_dict[key] = field._extra[key]
+        detail = {
+            "space_name": space_schema.name,
+            "db_name": database_name,
+            "desc": space_dict["desc"],
+            "partition_num": space_dict["partition_num"],
+            "replica_num": space_dict["replica_num"],
+            "schema": {"fields": space_dict["fields"]},
+        }
+        space_path = self._space_path(database_name, space_schema.name)
+        os.makedirs(space_path, exist_ok=True)
+        with open(os.path.join(space_path, SPACE_SCHEMA_FILE), "w") as f:
+            json.dump(detail, f)
+        try:
+            self._engine(database_name, space_schema.name)
+        except Exception as e:
+            self._schemas.pop((database_name, space_schema.name), None)
+            shutil.rmtree(space_path)
+            return Result(code=CODE_INTERNAL_ERROR, msg=str(e))
+        return Result(code=CODE_SUCCESS, data=detail)
+
+    def _drop_space(self, database_name: str, space_name: str) -> Result:
+        not_exist = self._not_exist(database_name, space_name)
+        if not_exist:
+            return not_exist
+        engine = self._engines.pop((database_name, space_name), None)
+        if engine is not None:
+            engine.close()
+        self._schemas.pop((database_name, space_name), None)
+        shutil.rmtree(self._space_path(database_name, space_name))
+        return Result(code=CODE_SUCCESS)
+
+    def _get_space_detail(self, database_name: str, space_name: str) -> Result:
+        not_exist = self._not_exist(database_name, space_name)
+        if not_exist:
+            return not_exist
+        detail = self._space_detail(database_name, space_name)
+        status = self._engine(database_name, space_name).get_status()
+        detail["doc_num"] = status["doc_num"]
+        detail["partitions"] = [
+            {
+                "index_status": status["index_status"],
+                "index_num": status["min_indexed_num"],
+            }
+        ]
+        return Result(code=CODE_SUCCESS, data=detail)
+
+    def _create_index(
+        self, database_name: str, space_name: str, field: str, index: Index
+    ) -> Result:
+        return Result(
+            code=CODE_PARAM_ERROR, msg="create index is not supported in local mode"
+        )
+
+    def _upsert(
+        self, database_name: str, space_name: str, documents: List
+    ) -> UpsertResult:
+        not_exist = self._not_exist(database_name, space_name)
+        if not_exist:
+            return UpsertResult(not_exist.code, not_exist.msg)
+        docs_info = []
+        for document in documents:
+            doc_info = dict(document)
+            if "_id" not in doc_info:
+                doc_info["_id"] = "".join(str(uuid.uuid4()).split("-"))
+            docs_info.append(doc_info)
+        try:
+            doc_ids = self._engine(database_name, space_name).add(docs_info)
+        except Exception as e:
+            return UpsertResult(CodeType.UPSERT_DOC, str(e))
+        ur = UpsertResult(CODE_SUCCESS, "success", len(doc_ids))
+        ur.document_ids = [
+            {"_id": doc_id, "status": 200, "error": "success"} for doc_id in doc_ids
+        ]
+        return ur
+
+    def _filter_to_engine(self, space_schema: SpaceSchema, filter: Filter) -> List:
+        """translate filter conditions to range and term filters of engine"""
+        if filter.operator == BooleanOperator.OR:
+            raise VearchException(
+                CodeType.SEARCH_DOC, "OR filter is not supported in local mode"
+            )
+        if filter.operator == BooleanOperator.AND:
+            if any(isinstance(condition, Conditions) for condition in filter.conditions):
+                raise VearchException(
+                    CodeType.SEARCH_DOC, "nested filter is not supported in local mode"
+                )
+            conditions = [
+                (condition.relation_operator, condition.fv)
+                for condition in filter.conditions
+            ]
+        else:
+            conditions = [(filter.operator, filter.conditions)]
+
+        field_types = {field.name: field.data_type for field in space_schema.fields}
+        ranges = {}
+        engine_filters = []
+        for operator, fv in conditions:
+            if operator in (RelationOperator.IN, RelationOperator.NOT_IN):
+                values = fv.value if isinstance(fv.value, list) else [fv.value]
+                term = {
+                    fv.field: [str(value) for value in values],
+                    "operator": "or" if operator == RelationOperator.IN else "not in",
+                }
+                engine_filters.append({"term": term})
+                continue
+            if fv.field not in ranges:
+                ranges[fv.field] = {}
+            if operator in (RelationOperator.GT, RelationOperator.GE):
+                ranges[fv.field]["gte"] = fv.value
+                ranges[fv.field]["include_lower"] = operator == RelationOperator.GE
+            elif operator in (RelationOperator.LT, RelationOperator.LE):
+                ranges[fv.field]["lte"] = fv.value
+                ranges[fv.field]["include_upper"] = operator == RelationOperator.LE
+            elif operator == RelationOperator.EQ:
+                ranges[fv.field].update(
+                    gte=fv.value, lte=fv.value, include_lower=True, include_upper=True
+                )
+            elif operator == RelationOperator.NE:
+                # term filters of engine are of string fields, a range is one
+                # interval, so a numeric field can't exclude a value
+                raise VearchException(
+                    CodeType.SEARCH_DOC,
+                    "filter operator != of numeric field %s is not supported in "
+                    "local mode" % fv.field,
+                )
+            else:
+                raise VearchException(
+                    CodeType.SEARCH_DOC,
+                    "filter operator %s is not supported in local mode" % operator,
+                )
+        for field_name, field_range in ranges.items():
+            if field_types.get(field_name) in (DataType.INTEGER, DataType.LONG):
+                info = np.iinfo(
+                    np.int32 if field_types[field_name] == DataType.INTEGER else np.int64
+                )
+                lower, upper = int(info.min), int(info.max)
+            else:
+                info = np.finfo(
+                    np.float32 if field_types.get(field_name) == DataType.FLOAT else np.float64
+                )
+                lower, upper = float(info.min), float(info.max)
+            field_range.setdefault("gte", lower)
+            field_range.setdefault("lte", upper)
+            engine_filters.append({"range": {field_name: field_range}})
+        return engine_filters
+
+    def _documents(self, results: List, vector_fields: List[str], vector: bool) -> List:
+        documents = []
+        for result in results:
+            items = []
+            for result_item in result["result_items"]:
+                document = {}
+                for name, value in result_item.items():
+                    if name in ("score", "extra"):
+                        continue
+                    if name in vector_fields and not vector:
+                        continue
+                    document[name] = _to_python(value)
+                document["_score"] = _to_python(result_item["score"])
+                items.append(document)
+            documents.append(items)
+        return documents
+
+    def _delete_documents(
+        self,
+        database_name: str,
+        space_name: str,
+        document_ids: Optional[List[str]] = None,
+        filter: Optional[Filter] = None,
+        limit: int = 50,
+    ) -> DeleteResult:
+        not_exist = self._not_exist(database_name, space_name)
+        if not_exist:
+            return DeleteResult(not_exist.code, not_exist.msg)
+        if not document_ids and filter:
+            result = self._query_documents(
+                database_name, space_name, filter=filter, fields=["_id"], limit=limit
+            )
+            if not result.is_success():
+                return DeleteResult(result.code, result.msg)
+            document_ids = [document["_id"] for document in result.documents]
+        if not document_ids:
+            return DeleteResult(CODE_SUCCESS, "success", 0)
+        try:
+            codes = self._engine(database_name, space_name).del_docs(document_ids)
+        except Exception as e:
+            return DeleteResult(CodeType.DELETE_DOC, str(e))
+        dr = DeleteResult(CODE_SUCCESS, "success", int((codes == 0).sum()))
+        dr.document_ids = [
+            doc_id for doc_id, code in zip(document_ids, codes) if code == 0
+        ]
+        return dr
+
+    def _query_documents(
+        self,
+        database_name: str,
+        space_name: str,
+        document_ids: Optional[List] = None,
+        filter: Optional[Filter] = None,
+        partition_id: Optional[int] = None,
+        fields: Optional[List] = None,
+        vector: bool = False,
+        limit: int = 50,
+    ) -> SearchResult:
+        if (not document_ids) and (not filter):
+            return SearchResult(
+                CodeType.QUERY_DOC, "document_ids and filter can not both null"
+            )
+        not_exist = self._not_exist(database_name, space_name)
+        if not_exist:
+            return SearchResult(not_exist.code, not_exist.msg)
+        engine = self._engine(database_name, space_name)
+        space_schema = self._schema(database_name, space_name)
+        vector_fields = [
+            field.name for field in space_schema.fields if field.data_type == DataType.VECTOR
+        ]
+        try:
+            if document_ids:
+                codes, docs = engine.get_docs(
+                    document_ids, fields=fields or None, as_arrays=False
+                )
+                documents = []
+                for doc_id, code, doc in zip(document_ids, codes, docs):
+                    if code != 0:
+                        documents.append(
+                            {
+                                "_id": doc_id,
+                                "code": CODE_DOCUMENT_NOT_EXIST,
+                                "msg": "document " + MSG_NOT_EXIST,
+                            }
+                        )
+                        continue
+                    document = {
+                        name: _to_python(value)
+                        for name, value in doc.items()
+                        if vector or name not in vector_fields
+                    }
+                    document["_id"] = doc_id
+                    documents.append(document)
+                return SearchResult(CODE_SUCCESS, "success", documents=documents)
+
+            query = {
+                "filter": self._filter_to_engine(space_schema, filter),
+                "topn": limit,
+            }
+            if fields:
+                query["fields"] = fields
+            results = engine.search(query)
+        except VearchException as e:
+            return SearchResult(e.code, e.message)
+        except Exception as e:
+            return SearchResult(CodeType.QUERY_DOC, str(e))
+        documents = self._documents(results, vector_fields, vector)
+        return SearchResult(
+            CODE_SUCCESS, "success", documents=documents[0] if documents else []
+        )
+
+    def _search_documents(
+        self,
+        database_name: str,
+        space_name: str,
+        vector_infos: List[VectorInfo],
+        filter: Optional[Filter] = None,
+        fields: Optional[List[str]] = None,
+        vector: bool = False,
+        limit: int = 50,
+        **kwargs,
+    ) -> SearchResult:
+        if len(vector_infos) == 0:
+            return SearchResult(CodeType.SEARCH_DOC, "vector_info can not null")
+        not_exist = self._not_exist(database_name, space_name)
+        if not_exist:
+            return SearchResult(not_exist.code, not_exist.msg)
+        engine = self._engine(database_name, space_name)
+        space_schema = self._schema(database_name, space_name)
+        dimensions = {
+            field.name: field.dim
+            for field in space_schema.fields
+            if field.data_type == DataType.VECTOR
+        }
+        query = {"vector": [], "topn": limit}
+        for vector_info in vector_infos:
+            if vector_info.field_name not in dimensions:
+                return SearchResult(
+                    CodeType.SEARCH_DOC,
+                    "vector field %s not exist" % vector_info.field_name,
+                )
+            feature = np.asarray(vector_info.feature, dtype=np.float32).reshape(
+                -1, dimensions[vector_info.field_name]
+            )
+            vector_query = {"field": vector_info.field_name, "feature": feature}
+            if vector_info.min_score != -1:
+                vector_query["min_score"] = vector_info.min_score
+            if vector_info.max_score != -1:
+                vector_query["max_score"] = vector_info.max_score
+            query["vector"].append(vector_query)
+        if fields:
+            query["fields"] = fields
+        if "index_params" in kwargs:
+            query["retrieval_param"] = kwargs["index_params"]
+        if "is_brute_search" in kwargs:
+            query["is_brute_search"] = kwargs["is_brute_search"]
+        if "l2_sqrt" in kwargs:
+            query["l2_sqrt"] = kwargs["l2_sqrt"]
+        try:
+            if filter:
+                query["filter"] = self._filter_to_engine(space_schema, filter)
+            results = engine.search(query)
+        except VearchException as e:
+            return SearchResult(e.code, e.message)
+        except Exception as e:
+            return SearchResult(CodeType.SEARCH_DOC, str(e))
+        documents = self._documents(results, list(dimensions.keys()), vector)
+        return SearchResult(CODE_SUCCESS, "success", documents=documents)
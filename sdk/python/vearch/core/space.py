@@ -159,6 +159,8 @@ class Space(object):
             "load_balance": "leader",
             "l2_sqrt": false,
             "limit": 10
+            trace: return the milliseconds of router and ps phases in trace of
+             the result
 
             retrieval_param: the retrieval parameter which control the search action,user can asign it to precisely
              control search result,different index type different parameters
@@ -6,9 +6,12 @@ import pandas as pd
 from vearch.config import Config
 from vearch.const import (
     CODE_SPACE_NOT_EXIST,
+    LOCAL_HOST_PREFIX,
     MSG_NOT_EXIST,
 )
+from vearch.core.async_client import AsyncRestClient
 from vearch.core.client import RestClient
+from vearch.core.local import LocalClient
 from vearch.core.db import Database
 from vearch.core.space import Space
 from vearch.exception import (
@@ -32,7 +35,13 @@ logger = logging.getLogger("vearch")
 
 class Vearch(object):
     def __init__(self, config: Config):
-        self.client = RestClient.from_config(config)
+        if config.host.startswith(LOCAL_HOST_PREFIX):
+            self.client = LocalClient.from_config(config)
+        else:
+            self.client = RestClient.from_config(config)
+
+    def close(self):
+        self.client.close()
 
     def database(self, database_name: str) -> Database:
         return Database(database_name, self.client)
@@ -134,6 +143,8 @@ class Vearch(object):
             "load_balance": "leader",
             "l2_sqrt": false,
             "limit": 10
+            trace: return the milliseconds of router and ps phases in trace of
+             the result
             index_params: the retrieval parameter which control the search action,user can asign it to precisely
              control search result,different index type different parameters
              For IVFPQ:
@@ -201,3 +212,97 @@ class Vearch(object):
     ) -> DeleteResult:
         space = self.space(database_name, space_name)
         return space.delete(document_ids, filter, limit)
+
+
+class AsyncVearch(object):
+    """
+    non-blocking Vearch of document operations for event loops, databases
+    and spaces are managed by Vearch
+    """
+
+    def __init__(self, config: Config):
+        self.client = AsyncRestClient.from_config(config)
+
+    async def close(self):
+        await self.client.close()
+
+    async def is_space_exist(
+        self, database_name: str, space_name: str
+    ) -> Tuple[bool, Result, SpaceSchema]:
+        try:
+            result = await self.client._get_space_detail(database_name, space_name)
+        except VearchException as e:
+            if e.code == CODE_SPACE_NOT_EXIST and MSG_NOT_EXIST in e.message:
+                return False, Result(code=e.code, msg=e.message), None
+            raise SpaceException(CodeType.CHECK_SPACE_EXIST, e.message)
+        if result.is_success():
+            return True, result, SpaceSchema.from_dict(result.data)
+        return False, result, None
+
+    async def upsert(
+        self, database_name: str, space_name: str, data: List[Dict]
+    ) -> UpsertResult:
+        """documents are dicts of field name and value"""
+        if data is None or len(data) == 0:
+            return UpsertResult(
+                CodeType.UPSERT_DOC, "data type has error: data is null"
+            )
+        return await self.client._upsert(database_name, space_name, data)
+
+    async def search(
+        self,
+        database_name: str,
+        space_name: str,
+        vector_infos: List[VectorInfo],
+        filter: Optional[Filter] = None,
+        fields: Optional[List] = None,
+        vector: bool = False,
+        limit: int = 50,
+        **kwargs,
+    ) -> SearchResult:
+        """the same params as Vearch.search"""
+        return await self.client._search_documents(
+            database_name,
+            space_name,
+            vector_infos,
+            filter,
+            fields,
+            vector,
+            limit,
+            **kwargs,
+        )
+
+    async def query(
+        self,
+        database_name: str,
+        space_name: str,
+        document_ids: Optional[List] = None,
+        filter: Optional[Filter] = None,
+        partition_id: Optional[int] = None,
+        fields: Optional[List] = None,
+        vector: bool = False,
+        limit: int = 50,
+    ) -> SearchResult:
+        """the same params as Vearch.query"""
+        return await self.client._query_documents(
+            database_name,
+            space_name,
+            document_ids,
+            filter,
+            partition_id,
+            fields,
+            vector,
+            limit,
+        )
+
+    async def delete(
+        self,
+        database_name: str,
+        space_name: str,
+        document_ids: Optional[List] = [],
+        filter: Optional[Filter] = None,
+        limit: int = 50,
+    ) -> DeleteResult:
+        return await self.client._delete_documents(
+            database_name, space_name, document_ids, filter, limit
+        )
@@ -1,10 +1,15 @@
-from typing import List, Union
+from typing import Any, List, Union
+
+from vearch.const import CODE_PARAM_ERROR
+from vearch.exception import VearchException
+from vearch.utils import DataType
 
 
 class RelationOperator:
     IN = "IN"
     NOT_IN = "NOT IN"
-    # TODO EQ = "="
+    EQ = "="
+    NE = "!="
     GT = ">"
     GE = ">="
     LT = "<"
@@ -130,3 +135,78 @@ class Filter(object):
             return {"operator": self.operator, "field": self.conditions.field, "value": self.conditions.value}
         conditions_dict = [condition.dict() for condition in self.conditions]
         return {"operator": self.operator, "conditions": conditions_dict}
+
+
+def filter_fields(filter: Filter) -> List[str]:
+    """
+    names of the fields compared by a filter, in order without duplicates,
+    its conditions are a FieldValue, Conditions or a list of Condition and
+    Conditions
+    """
+    fields = []
+
+    def visit(item):
+        if isinstance(item, FieldValue):
+            if item.field not in fields:
+                fields.append(item.field)
+        elif isinstance(item, Condition):
+            visit(item.fv)
+        elif isinstance(item, Conditions):
+            visit(item.conditions)
+        elif isinstance(item, (list, tuple)):
+            for child in item:
+                visit(child)
+
+    visit(filter.conditions)
+    return fields
+
+
+# numeric fields are filtered by ranges, string fields by terms
+RANGE_FIELD_TYPES = [DataType.INTEGER, DataType.LONG, DataType.FLOAT, DataType.DOUBLE]
+STRING_FIELD_TYPES = [DataType.STRING, DataType.STRING_ARRAY]
+
+_RANGE_OPERATORS = {
+    "==": RelationOperator.EQ,
+    "!=": RelationOperator.NE,
+    ">": RelationOperator.GT,
+    ">=": RelationOperator.GE,
+    "<": RelationOperator.LT,
+    "<=": RelationOperator.LE,
+}
+_TERM_OPERATORS = {
+    "==": RelationOperator.IN,
+    "in": RelationOperator.IN,
+    "!=": RelationOperator.NOT_IN,
+    "nin": RelationOperator.NOT_IN,
+}
+
+
+def metadata_condition(field: str, operator: str, value: Any, data_type: str) -> Condition:
+    """
+    a Condition of a metadata comparison, operator is one of ==, !=, >, >=, <,
+    <=, in and nin as in the filters of llama-index and langchain, numeric
+    fields are compared by ranges and string fields by lists of terms
+    """
+    if data_type in STRING_FIELD_TYPES:
+        if operator not in _TERM_OPERATORS:
+            raise VearchException(
+                CODE_PARAM_ERROR,
+                "operator %s is not supported by string field %s" % (operator, field),
+            )
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        return Condition(_TERM_OPERATORS[operator], FieldValue(field, [str(v) for v in values]))
+    if data_type in RANGE_FIELD_TYPES:
+        if operator not in _RANGE_OPERATORS:
+            raise VearchException(
+                CODE_PARAM_ERROR,
+                "operator %s is not supported by numeric field %s" % (operator, field),
+            )
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise VearchException(
+                CODE_PARAM_ERROR,
+                "numeric field %s can not be compared with %r" % (field, value),
+            )
+        return Condition(_RANGE_OPERATORS[operator], FieldValue(field, value))
+    raise VearchException(
+        CODE_PARAM_ERROR, "field %s of type %s can not be filtered" % (field, data_type)
+    )
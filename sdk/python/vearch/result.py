@@ -82,6 +82,8 @@ class SearchResult(object):
         self.code = code
         self.msg = msg
         self.documents = documents
+        # milliseconds of router and ps phases when searched with trace
+        self.trace = None
 
     @classmethod
     def parse_search_result_from_response(cls, resp: requests.Response):
@@ -90,9 +92,12 @@ class SearchResult(object):
         msg = ret.get("msg", "")
         data = ret.get("data", None)
         documents = None
+        trace = None
         if data is not None:
             documents = data.get("documents", None)
+            trace = data.get("trace", None)
         sr = cls(code, msg, documents=documents)
+        sr.trace = trace
         return sr
 
     def is_success(self):
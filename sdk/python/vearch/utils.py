@@ -3,7 +3,9 @@ import logging.config
 import logging.handlers
 import re
 from enum import IntEnum
+from typing import List
 
+import numpy as np
 from requests.auth import HTTPBasicAuth
 
 LOG_LEVEL = "DEBUG"
@@ -141,6 +143,38 @@ class VectorInfo:
         return vi_dict
 
 
+def maximal_marginal_relevance(
+    query_embedding, embeddings, k: int = 4, lambda_mult: float = 0.5
+) -> List[int]:
+    """
+    indexes of k embeddings selected by maximal marginal relevance to the
+    query by cosine similarity, 1 of lambda_mult is relevance only and 0 is
+    diversity only, relevance is one matrix product and the similarity to
+    the selected embeddings is updated by one row per selection
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    k = min(k, len(embeddings))
+    if k <= 0:
+        return []
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings = embeddings / np.where(norms > 0, norms, 1)
+    query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+    query_norm = np.linalg.norm(query)
+    relevance = embeddings @ (query / query_norm if query_norm > 0 else query)
+
+    selected = [int(np.argmax(relevance))]
+    redundancy = embeddings @ embeddings[selected[0]]
+    scores = np.empty_like(relevance)
+    for _ in range(1, k):
+        np.multiply(lambda_mult, relevance, out=scores)
+        scores -= (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        i = int(np.argmax(scores))
+        selected.append(i)
+        np.maximum(redundancy, embeddings @ embeddings[i], out=redundancy)
+    return selected
+
+
 reg_exp = "^([a-zA-Z]+)([a-z0-9A-Z]*[\-\_]{0,1}[a-z0-9A-Z]+)+"
 
 
@@ -0,0 +1,143 @@
+#
+# Copyright 2019 The Vearch Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+# -*- coding: UTF-8 -*-
+
+import numpy as np
+
+
+__description__ = """ search quality metrics over nq x k arrays of result ids
+and ground truth ids, -1 pads short rows, only numpy is needed so the
+tests and scripts/benchmarks share it"""
+
+
+def to_ids(documents: list, k: int, key: str = "_id", dtype=np.int64, pad=-1):
+    """
+    nq x k array of key of the first k documents of every result, short
+    results are padded, documents are lists of dicts as returned by search
+    """
+    lengths = np.fromiter(
+        (min(len(result), k) for result in documents),
+        dtype=np.int64,
+        count=len(documents),
+    )
+    # ids are strings in search results
+    cast = int if np.issubdtype(dtype, np.integer) else float
+    values = np.fromiter(
+        (cast(document[key]) for result in documents for document in result[:k]),
+        dtype=dtype,
+        count=int(lengths.sum()),
+    )
+    ids = np.full((len(documents), k), pad, dtype=dtype)
+    # boolean assignment fills row by row, the order values are in
+    ids[np.arange(k)[np.newaxis, :] < lengths[:, np.newaxis]] = values
+    return ids
+
+
+def one_recall_at(search: np.ndarray, gt: np.ndarray, ks: list):
+    """1-recall@k, the ratio of queries whose nearest neighbor is in top k"""
+    nq = gt.shape[0]
+    hits = search == gt[:, :1]
+    # a nearest neighbor appears once in a result, the cumulative sum of
+    # hits is whether it is found in the first k
+    found = np.cumsum(hits, axis=1)
+    return {
+        k: float(found[:, min(k, search.shape[1]) - 1].sum()) / nq for k in ks
+    }
+
+
+def knn_hits(search: np.ndarray, gt: np.ndarray, k: int):
+    """
+    nq x k bools, whether every result of top k is in top k of ground truth,
+    the rows are offset into disjoint ranges so one sorted search does all
+    """
+    search = np.asarray(search[:, :k], dtype=np.int64)
+    gt = np.asarray(gt[:, :k], dtype=np.int64)
+    span = int(max(search.max(initial=0), gt.max(initial=0))) + 2
+    offsets = np.arange(search.shape[0], dtype=np.int64)[:, np.newaxis] * span
+    # + 1 so -1 padding stays in the range of its row
+    keys = np.sort((gt + 1 + offsets).ravel())
+    values = search + 1 + offsets
+    positions = np.minimum(np.searchsorted(keys, values), len(keys) - 1)
+    return (keys[positions] == values) & (search >= 0)
+
+
+def recall_at(search: np.ndarray, gt: np.ndarray, ks: list):
+    """
+    k-NN recall@k, the overlap of top k results and top k of ground truth,
+    over the valid ground truth ids when it is padded
+    """
+    recalls = {}
+    for k in ks:
+        valid = (gt[:, :k] >= 0).sum()
+        hits = knn_hits(search, gt, k).sum()
+        recalls[k] = float(hits) / valid if valid > 0 else 0.0
+    return recalls
+
+
+def mrr(search: np.ndarray, gt: np.ndarray):
+    """mean reciprocal rank of the nearest neighbor"""
+    hits = search == gt[:, :1]
+    found = hits.any(axis=1)
+    ranks = hits.argmax(axis=1) + 1
+    return float(np.where(found, 1.0 / ranks, 0.0).mean())
+
+
+def ndcg_at(search: np.ndarray, gt: np.ndarray, ks: list):
+    """nDCG@k, a result is relevant when it is in top k of ground truth"""
+    ndcgs = {}
+    for k in ks:
+        discounts = 1.0 / np.log2(np.arange(2, k + 2))
+        hits = knn_hits(search, gt, k)
+        dcg = (hits * discounts[: hits.shape[1]]).sum(axis=1)
+        ideal = np.cumsum(discounts)[np.maximum((gt[:, :k] >= 0).sum(axis=1) - 1, 0)]
+        ndcgs[k] = float(np.where(ideal > 0, dcg / ideal, 0.0).mean())
+    return ndcgs
+
+
+def distance_ratio(distances: np.ndarray, gt_distances: np.ndarray, k: int):
+    """
+    mean over queries of the mean distance of top k results to the mean
+    distance of exact top k, 1 is exact and larger is worse for distances
+    such as L2, rows with padding are compared on the shorter length
+    """
+    distances = np.asarray(distances[:, :k], dtype=np.float64)
+    gt_distances = np.asarray(gt_distances[:, :k], dtype=np.float64)
+    valid = np.isfinite(distances) & np.isfinite(gt_distances)
+    found = np.where(valid, distances, 0).sum(axis=1)
+    exact = np.where(valid, gt_distances, 0).sum(axis=1)
+    ratios = np.where(exact > 0, found / np.where(exact > 0, exact, 1), 1.0)
+    return float(ratios[valid.any(axis=1)].mean()) if valid.any() else 0.0
+
+
+def power_of_ten(k: int):
+    """1, 10, 100 ... up to k, the cut offs reported by the benchmarks"""
+    ks = []
+    i = 1
+    while i <= k:
+        ks.append(i)
+        i *= 10
+    return ks
+
+
+def evaluate_all(search: np.ndarray, gt: np.ndarray, k: int):
+    """all metrics at 1, 10, 100 ... up to k"""
+    ks = power_of_ten(min(k, search.shape[1], gt.shape[1]))
+    return {
+        "one_recall": one_recall_at(search, gt, ks),
+        "recall": recall_at(search, gt, ks),
+        "ndcg": ndcg_at(search, gt, ks),
+        "mrr": mrr(search, gt),
+    }
@@ -24,6 +24,7 @@ import logging
 from multiprocessing import Pool as ThreadPool
 import numpy as np
 import datetime
+from utils.metrics import one_recall_at, power_of_ten
 
 router_url = os.getenv("ROUTER_URL", "http://127.0.0.1:9001")
 db_name = "ts_db"
@@ -1446,11 +1447,7 @@ def evaluate(xq, gt, k, batch, query_dict):
     I = search(xq, k, batch, query_dict)
     t1 = time.time()
 
-    recalls = {}
-    i = 1
-    while i <= k:
-        recalls[i] = (I[:, :i] == gt[:, :1]).sum() / float(nq)
-        i *= 10
+    recalls = one_recall_at(I, gt, power_of_ten(k))
 
     return (t1 - t0) * 1000.0 / nq, recalls
 